@@ -0,0 +1,228 @@
+"""
+Suíte de benchmarks das consultas e transformações do app em volumes de produção.
+
+Uso:
+    python -m benchmarks.bench_app --database-url URL [--tamanhos 1000,10000,100000] [--repeticoes 5]
+    python -m benchmarks.bench_app --embutido ...        (Postgres temporário via pgserver, se instalado)
+    python -m benchmarks.bench_app ... --comparar resultado_anterior.json
+
+Para cada tamanho, carrega dados sintéticos (benchmarks.dados_sinteticos,
+mesma semente → mesmos dados) e mede geração da folha, página da lista,
+consultas dos Relatórios e exportações XLSX/CSV. O cache de consultas do
+app não é usado: mede-se sempre o caminho frio. O resultado vai para um
+JSON (--saida) que pode ser comparado com o de outra execução.
+
+ATENÇÃO: apaga os dados do banco indicado.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import date, datetime
+
+import pandas as pd
+
+from benchmarks import dados_sinteticos
+from gestao_colab import analise, colaboradores, db, dinheiro, exportacao, folha, migrations, relatorios, resumos, snapshot
+
+
+# o app usa uma conexão psycopg2 direto no read_sql_query, como aqui
+warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy")
+
+
+def _query_df(pool, q, params=()):
+    with pool.connection() as conn:
+        return pd.read_sql_query(q, conn, params=list(params))
+
+
+def _casos(pool, meses):
+    """Lista de (nome, função, preparo) medidos a cada tamanho."""
+    ultimo = meses[-1]
+    novo = date(ultimo.year + ultimo.month // 12, ultimo.month % 12 + 1, 1)
+    filtro = colaboradores.filtros_sql(["Serrinha"], "Ativos")
+    todos = ("", [])
+    cols_lista = ["id", "nome", "funcao", "unidade", "salario_reais", "ativo_texto"]
+
+    def apagar_mes_novo():
+        with pool.cursor() as cur:
+            cur.execute("DELETE FROM folha_pagamento WHERE mes_referencia = %s", (novo,))
+            resumos.atualizar(cur, meses=[novo])
+
+    def chave_pagina(n, where, params):
+        q, p = colaboradores.pagina_sql(["id", "nome"], where, params, limite=colaboradores.PAGE_SIZE * n)
+        return colaboradores.chave_da_linha(_query_df(pool, q, p).iloc[-1])
+
+    def pagina(where, params, depois_de=None):
+        df = _query_df(pool, *colaboradores.pagina_sql(cols_lista, where, params, depois_de=depois_de))
+        df["salario_reais"] = df["salario_cents"].fillna(0) / 100
+        df["ativo_texto"] = df["ativo"].map({1: "Ativo", 0: "Não-ativo"})
+        return df
+
+    chave_20 = {}
+
+    def prep_pagina_20():
+        chave_20["k"] = chave_pagina(20, *todos)
+
+    def relatorio(sql_e_params):
+        return lambda: _query_df(pool, *sql_e_params)
+
+    def pagina_relatorios():
+        for sql_e_params in [
+            relatorios.unidades_sql(), relatorios.total_sql(), relatorios.tempo_medio_sql(),
+            relatorios.mais_antigos_sql(), relatorios.novatos_sql(), relatorios.folha_por_unidade_sql(),
+            relatorios.alerta_contagens_sql(), relatorios.comparativo_sql(),
+            resumos.tendencia_sql(None, meses[-12]),
+        ]:
+            _query_df(pool, *sql_e_params)
+
+    snap = snapshot.Snapshot(pool, intervalo=0)
+
+    def pagina_relatorios_snapshot():
+        # como o app: atualização incremental (nada mudou) + relatórios em memória
+        filtrada = snapshot.filtrar(snap.tabela(), colaboradores.UNIDADES)
+        df = snapshot.para_pandas(filtrada, analise.COLUNAS_ANALISE)
+        for fn in (analise.tempo_medio, analise.mais_antigos, analise.novatos, analise.folha_por_unidade,
+                   analise.comparativo, analise.alerta_contagens):
+            fn(df)
+        for i, n in enumerate(analise.alerta_contagens(df)):
+            if n:
+                _query_df(pool, *relatorios.alerta_linhas_sql(i))
+        _query_df(pool, *resumos.tendencia_sql(None, meses[-12]))
+
+    def exportar_xlsx():
+        with tempfile.TemporaryFile() as f:
+            exportacao.exportar_folha_xlsx(pool, f, ultimo, incluir_extras=True)
+
+    def exportar_csv():
+        df = _query_df(pool, *relatorios.exportacao_sql())
+        df["salario_reais"] = dinheiro.cents_to_real_series(df["salario_cents"])
+        df.to_csv(index=False).encode("utf-8")
+
+    return [
+        ("folha: gerar mês novo (todas as unidades)", lambda: folha.gerar_lancamentos(pool, [novo]), apagar_mes_novo),
+        ("folha: ler mês (grade)", lambda: _query_df(
+            pool, "SELECT * FROM folha_pagamento WHERE mes_referencia = %s ORDER BY colaborador_nome", (ultimo,)), None),
+        ("lista: contagem (sem filtro)", relatorio(colaboradores.contagem_sql(*todos)), None),
+        ("lista: 1ª página (sem filtro)", lambda: pagina(*todos), None),
+        ("lista: 1ª página (Serrinha, ativos)", lambda: pagina(*filtro), None),
+        ("lista: página 20 (sem filtro)", lambda: pagina(*todos, depois_de=chave_20["k"]), prep_pagina_20),
+        ("relatórios: tempo médio de casa", relatorio(relatorios.tempo_medio_sql()), None),
+        ("relatórios: alertas (contagens)", relatorio(relatorios.alerta_contagens_sql()), None),
+        ("relatórios: comparativo", relatorio(relatorios.comparativo_sql()), None),
+        ("relatórios: tendências (12 meses)", relatorio(resumos.tendencia_sql(None, meses[-12])), None),
+        ("relatórios: página inteira (SQL)", pagina_relatorios, None),
+        ("snapshot: leitura completa", lambda: snap.atualizar(completa=True), None),
+        ("relatórios: página inteira (cópia colunar)", pagina_relatorios_snapshot, None),
+        ("exportação: XLSX mês inteiro", exportar_xlsx, None),
+        ("exportação: CSV colaboradores", exportar_csv, None),
+    ]
+
+
+def _medir(fn, preparo, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        if preparo:
+            preparo()
+        t0 = time.perf_counter()
+        fn()
+        tempos.append((time.perf_counter() - t0) * 1000)
+    return tempos
+
+
+def _meta(pool, args):
+    with pool.cursor() as cur:
+        cur.execute("SHOW server_version")
+        versao_pg = cur.fetchone()[0]
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "postgres": versao_pg,
+        "maquina": platform.node(),
+        "seed": args.seed,
+        "anos": args.anos,
+        "repeticoes": args.repeticoes,
+    }
+
+
+def _comparar(atual, arquivo):
+    with open(arquivo, encoding="utf-8") as f:
+        anterior = {(r["tamanho"], r["caso"]): r for r in json.load(f)["resultados"]}
+    print(f"\ncomparação com {arquivo} (mediana; <1 = mais rápido agora)")
+    for r in atual:
+        a = anterior.get((r["tamanho"], r["caso"]))
+        if a:
+            print(f"{r['tamanho']:>7}  {r['caso']:<45} {a['mediana_ms']:9.1f} → {r['mediana_ms']:9.1f} ms"
+                  f"  ({r['mediana_ms'] / a['mediana_ms']:.2f}x)")
+
+
+def _servidor_embutido():
+    try:
+        import pgserver
+    except ImportError:
+        sys.exit("--embutido precisa do pacote pgserver (pip install pgserver)")
+    srv = pgserver.get_server(tempfile.mkdtemp(prefix="bench_gestao_"), cleanup_mode="delete")
+    return srv, srv.get_uri()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--database-url")
+    ap.add_argument("--embutido", action="store_true", help="sobe um Postgres temporário (pgserver)")
+    ap.add_argument("--tamanhos", default="1000,10000,100000")
+    ap.add_argument("--anos", type=int, default=2, help="anos de folha gerados")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--repeticoes", type=int, default=5)
+    ap.add_argument("--saida", help="arquivo JSON de resultados (padrão: bench_app_<data>.json)")
+    ap.add_argument("--comparar", help="JSON de uma execução anterior")
+    args = ap.parse_args(argv)
+    if not args.database_url and not args.embutido:
+        ap.error("informe --database-url (o banco será apagado) ou --embutido")
+
+    servidor = None
+    if args.embutido:
+        servidor, args.database_url = _servidor_embutido()
+    pool = db.Pool(args.database_url, maxconn=2)
+    resultados = []
+    try:
+        migrations.migrate(pool)
+        meta = _meta(pool, args)
+        for tamanho in [int(t) for t in args.tamanhos.split(",")]:
+            t0 = time.perf_counter()
+            _, n_lanc, meses = dados_sinteticos.carregar(pool, tamanho, args.anos, args.seed, substituir=True)
+            print(f"\n{tamanho} colaboradores, {n_lanc} lançamentos (carga {time.perf_counter() - t0:.1f} s)")
+            for caso, fn, preparo in _casos(pool, meses):
+                tempos = _medir(fn, preparo, args.repeticoes)
+                r = {
+                    "tamanho": tamanho, "caso": caso, "lancamentos": n_lanc,
+                    "mediana_ms": round(statistics.median(tempos), 2),
+                    "min_ms": round(min(tempos), 2), "max_ms": round(max(tempos), 2),
+                }
+                resultados.append(r)
+                print(f"{tamanho:>7}  {caso:<45} {r['mediana_ms']:9.1f} ms  (min {r['min_ms']:.1f})")
+    finally:
+        pool.close()
+        if servidor is not None:
+            servidor.cleanup()
+
+    saida = args.saida or f"bench_app_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "resultados": resultados}, f, ensure_ascii=False, indent=1)
+    print(f"\nresultados em {os.path.abspath(saida)}")
+    if args.comparar:
+        _comparar(resultados, args.comparar)
+
+
+if __name__ == "__main__":
+    main()
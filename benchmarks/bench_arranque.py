@@ -0,0 +1,75 @@
+"""
+Tempo de import a frio do app, por página: cada medida roda num interpretador novo.
+
+Uso: python -m benchmarks.bench_arranque [--repeticoes 5]
+
+Compara o que cada página importa hoje (topo do gestao_main + o import sob
+demanda da página) com o topo antigo, que importava tudo antes de saber a
+página. O tempo até a primeira renderização de cada página, com banco, fica
+no painel "⏱️ Arranque" do app (gestao_colab.arranque).
+"""
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gestao_main.py")
+
+
+def _imports_do_topo(caminho):
+    """Módulos dos import do nível de módulo do script, na ordem (os de medidas.importar ficam de fora)."""
+    with open(caminho, encoding="utf-8") as f:
+        arvore = ast.parse(f.read())
+    modulos = []
+    for no in arvore.body:
+        if isinstance(no, ast.Import):
+            modulos += [a.name for a in no.names]
+        elif isinstance(no, ast.ImportFrom):
+            # "from pacote import modulo" importa o submódulo; "from modulo import nome", só o módulo
+            modulos += [f"{no.module}.{a.name}" if no.module == "gestao_colab" else no.module for a in no.names]
+    return list(dict.fromkeys(modulos))
+
+
+# o que o gestao_main importa antes de saber a página
+TOPO = _imports_do_topo(APP)
+CENARIOS = [
+    ("topo antigo (tudo)", TOPO + ["plotly.express", "gestao_colab.exportacao", "gestao_colab.importacao",
+                                   "gestao_colab.indices"]),
+    ("Gestão de Colaboradores", TOPO),
+    ("Folha de Pagamento (com exportação)", TOPO + ["gestao_colab.exportacao"]),
+    ("Relatórios e Estatísticas", TOPO + ["plotly.express", "gestao_colab.snapshot", "gestao_colab.analise"]),
+    ("Importação em Lote", TOPO + ["gestao_colab.importacao"]),
+    ("CLI (python -m gestao_colab report)", ["gestao_colab.__main__", "gestao_colab.db", "gestao_colab.colaboradores",
+                                             "gestao_colab.relatorios", "gestao_colab.resumos"]),
+]
+
+
+def _medir(modulos):
+    codigo = (
+        "import time; t0 = time.perf_counter()\n"
+        + "".join(f"import {m}\n" for m in modulos)
+        + "print((time.perf_counter() - t0) * 1000)"
+    )
+    saida = subprocess.run([sys.executable, "-c", codigo], check=True, capture_output=True, text=True)
+    return float(saida.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--repeticoes", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    _medir(TOPO)  # aquece o cache de disco / bytecode
+    base = None
+    print(f"{'cenário':<40} {'mediana':>9} {'mínimo':>9}")
+    for nome, modulos in CENARIOS:
+        tempos = [_medir(modulos) for _ in range(args.repeticoes)]
+        mediana = statistics.median(tempos)
+        base = base or mediana
+        print(f"{nome:<40} {mediana:7.0f} ms {min(tempos):7.0f} ms  ({mediana / base:.0%} do topo antigo)")
+
+
+if __name__ == "__main__":
+    main()
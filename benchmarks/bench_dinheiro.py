@@ -0,0 +1,68 @@
+"""
+Micro-benchmark: conversão de dinheiro linha a linha (.apply) vs. vetorizada.
+
+Uso: python -m benchmarks.bench_dinheiro [--linhas 100000] [--repeticoes 5]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from gestao_colab import dinheiro
+
+
+# versões originais do gestao_main.py, usadas via Series.apply
+def _cents_to_real_antigo(cents):
+    if cents is None:
+        return "0,00"
+    return f"{cents/100:.2f}".replace(".", ",")
+
+
+def _real_to_cents_antigo(valor):
+    if not valor:
+        return 0
+    valor = valor.strip().replace("R$", "").replace(" ", "").replace(",", ".")
+    try:
+        return int(float(valor) * 100)
+    except ValueError:
+        return 0
+
+
+def _melhor_tempo(fn, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--linhas", type=int, default=100_000)
+    ap.add_argument("--repeticoes", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    rng = np.random.default_rng(42)
+    cents = pd.Series(rng.integers(0, 2_000_000, args.linhas))
+    textos = pd.Series(dinheiro.cents_to_real_series(cents))
+
+    casos = [
+        ("centavos → texto", lambda: cents.apply(_cents_to_real_antigo), lambda: dinheiro.cents_to_real_series(cents)),
+        ("texto → centavos", lambda: textos.apply(_real_to_cents_antigo), lambda: dinheiro.real_to_cents_series(textos)),
+    ]
+    print(f"{args.linhas} linhas, melhor de {args.repeticoes}")
+    for nome, antigo, novo in casos:
+        t_antigo = _melhor_tempo(antigo, args.repeticoes)
+        t_novo = _melhor_tempo(novo, args.repeticoes)
+        print(f"{nome:18} apply {t_antigo*1000:8.1f} ms | vetorizado {t_novo*1000:8.1f} ms | {t_antigo/t_novo:5.1f}x")
+
+    # exatidão: o parser antigo perde um centavo em valores como 0,29
+    perdidos = int((textos.apply(_real_to_cents_antigo) != cents).sum())
+    errados = int((dinheiro.real_to_cents_series(textos) != cents).sum())
+    print(f"divergências no ida-e-volta: apply {perdidos}, vetorizado {errados}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark da geração de holerites em lote (gestao_colab.holerites): ZIP de
+um mês (ou unidade/mês) no próprio processo e com 2, 4… processos.
+
+Uso: python -m benchmarks.bench_holerites --database-url URL [--mes 2026-09] [--unidade Serrinha] [--processos 1,2,4]
+
+Só lê o banco (use os dados de benchmarks.dados_sinteticos). O tempo de
+subir os processos é medido à parte: no app o executor é criado uma vez
+por processo e reaproveitado.
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date
+
+from gestao_colab import db, holerites
+
+
+def _mes(texto):
+    return date.fromisoformat(texto[:7] + "-01")
+
+
+def _medir(pool, args, executor, processos):
+    melhor = float("inf")
+    for _ in range(args.repeticoes):
+        with tempfile.TemporaryFile() as destino:
+            t0 = time.perf_counter()
+            n = holerites.gerar_zip(pool, destino, args.mes, args.unidade, executor=executor,
+                                    processos=processos, bloco=args.bloco)
+            melhor = min(melhor, time.perf_counter() - t0)
+            tamanho = destino.tell()
+    return n, melhor, tamanho
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    ap.add_argument("--mes", type=_mes, help="AAAA-MM; padrão: último mês com lançamentos")
+    ap.add_argument("--unidade")
+    ap.add_argument("--processos", default="1,2,4", help="1 = sem executor (no próprio processo)")
+    ap.add_argument("--bloco", type=int, default=200)
+    ap.add_argument("--repeticoes", type=int, default=3)
+    args = ap.parse_args(argv)
+    if not args.database_url:
+        ap.error("informe --database-url ou DATABASE_URL")
+
+    pool = db.Pool(args.database_url, maxconn=2)
+    try:
+        if args.mes is None:
+            with pool.cursor() as cur:
+                cur.execute("SELECT max(mes_referencia) FROM folha_pagamento WHERE mes_referencia <= current_date")
+                args.mes = cur.fetchone()[0]
+        print(f"{args.mes:%Y-%m}, unidade: {args.unidade or 'todas'}, {os.cpu_count()} CPU(s), melhor de {args.repeticoes}")
+        for processos in [int(p) for p in args.processos.split(",")]:
+            t0 = time.perf_counter()
+            executor = holerites.novo_executor(processos)
+            rotulo = "sem executor"
+            if executor is not None:
+                # sobe os processos antes de medir
+                list(executor.map(holerites.renderizar_bloco, [[]] * processos))
+                rotulo = f"{processos} processo(s) (subida {(time.perf_counter() - t0) * 1000:.0f} ms)"
+            try:
+                n, segundos, tamanho = _medir(pool, args, executor, processos)
+            finally:
+                if executor is not None:
+                    executor.close()
+                    executor.join()
+            print(f"{rotulo:<36} {n:>7} holerites  {segundos:7.2f} s  {n / segundos:9.0f}/s  ZIP {tamanho / 2**20:.1f} MB")
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
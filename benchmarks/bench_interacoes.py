@@ -0,0 +1,187 @@
+"""
+Latência por interação nas páginas Folha de Pagamento e Relatórios
+(streamlit.testing AppTest, uma sessão).
+
+Uso: python -m benchmarks.bench_interacoes --database-url URL [--mes 2026-09] [--unidade Serrinha]
+         [--busca silva] [--repeticoes 5] [--saida interacoes.json]
+
+Para cada interação (buscar na grade, marcar "incluir extras", trocar o
+formato da remessa, mudar o período das tendências, preparar o CSV) mede
+o rerun completo do script e, quando o widget está num st.fragment, o
+rerun só do fragmento, como o navegador pede. O AppTest sempre roda o
+script inteiro: o rerun do fragmento é pedido aqui com a fila de
+fragmentos do ScriptRunner (API interna do Streamlit), e o id do
+fragmento é achado pelo nome da função. Numa versão do app sem
+fragmentos sai só a coluna do rerun completo.
+
+O AppTest recompila o script a cada run() (~140 ms neste app, o mesmo
+para os dois tipos de rerun); o servidor compila uma vez. Aqui o script
+compilado é reaproveitado, como no servidor.
+
+Só lê o banco; os botões medidos não gravam nada.
+"""
+import argparse
+import functools
+import json
+import os
+import statistics
+import sys
+import time
+import warnings
+from datetime import date, datetime
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gestao_main.py")
+
+warnings.filterwarnings("ignore")
+
+
+def _mes(texto):
+    return date.fromisoformat(texto[:7] + "-01")
+
+
+def _alternar(valores):
+    """Ação que, a cada chamada, põe o próximo de `valores` no widget."""
+    estado = {"i": 0}
+
+    def acao(widget):
+        estado["i"] += 1
+        widget.set_value(valores[estado["i"] % len(valores)])
+    return acao
+
+
+def _interacoes(args):
+    """(nome, página, função do fragmento, localizar o widget, ação) de cada interação medida."""
+    return [
+        ("folha: buscar na grade", "Folha de Pagamento", "secao_grade",
+         lambda at: next(t for t in at.text_input if t.key == "folha_busca"), _alternar([args.busca, ""])),
+        ("folha: incluir extras", "Folha de Pagamento", "secao_exportacao",
+         lambda at: next(c for c in at.checkbox if c.label.startswith("Incluir colunas extras")),
+         lambda c: c.set_value(not c.value)),
+        ("folha: formato da remessa", "Folha de Pagamento", "secao_remessa",
+         lambda at: next(s for s in at.selectbox if s.label == "Formato"), _alternar(["cnab240", "pix"])),
+        ("relatórios: período das tendências", "Relatórios e Estatísticas", "secao_tendencias",
+         lambda at: next(s for s in at.slider if s.label == "Período (meses)"), _alternar([12, 24])),
+        ("relatórios: preparar CSV", "Relatórios e Estatísticas", "secao_exportacao_csv",
+         lambda at: next(b for b in at.button if b.label == "Preparar exportação (CSV)"), lambda b: b.click()),
+    ]
+
+
+def _compilar_uma_vez():
+    """O mesmo ScriptCache para todos os run() do AppTest (cada LocalScriptRunner criaria o seu)."""
+    from streamlit.testing.v1 import local_script_runner
+
+    cache = local_script_runner.ScriptCache()
+    local_script_runner.ScriptCache = lambda: cache
+
+
+def _id_do_fragmento(at, nome):
+    """Id do fragmento registrado pela função `nome` na última execução (None se não houver)."""
+    for fragment_id, fragmento in at._fragment_storage._fragments.items():
+        for celula in fragmento.__closure__ or ():
+            f = celula.cell_contents
+            if callable(f) and getattr(f, "__name__", None) == nome:
+                return fragment_id
+    return None
+
+
+def _rodar_fragmento(at, fragment_id):
+    """at.run(), mas o ScriptRunner executa só o fragmento (como o rerun pedido pelo navegador)."""
+    from streamlit.testing.v1 import local_script_runner
+
+    original = local_script_runner.RerunData
+    arvore = at._tree
+    local_script_runner.RerunData = functools.partial(original, fragment_id_queue=[fragment_id])
+    try:
+        at.run()
+    finally:
+        local_script_runner.RerunData = original
+    erro = at.exception[0].message if at.exception else None
+    # a árvore de um rerun de fragmento só tem os elementos do fragmento:
+    # volta a da página inteira (com o valor novo do widget) para o próximo rerun
+    at._tree = arvore
+    return erro
+
+
+def _abrir(at, pagina, mes, unidade):
+    at.sidebar.radio[0].set_value(pagina).run()
+    if pagina == "Folha de Pagamento":
+        at.date_input[0].set_value(mes).run()
+        if unidade:
+            at.selectbox[0].set_value(unidade).run()
+
+
+def _medir(at, args, nome, pagina, fragmento, localizar, acao):
+    _abrir(at, pagina, args.mes, args.unidade)
+    completo, so_fragmento, erros = [], [], []
+    for _ in range(args.repeticoes):
+        acao(localizar(at))
+        t0 = time.perf_counter()
+        at.run()
+        completo.append((time.perf_counter() - t0) * 1000)
+        if at.exception:
+            erros.append(at.exception[0].message)
+
+        fragment_id = _id_do_fragmento(at, fragmento)
+        if fragment_id is None:
+            continue
+        acao(localizar(at))
+        t0 = time.perf_counter()
+        erro = _rodar_fragmento(at, fragment_id)
+        so_fragmento.append((time.perf_counter() - t0) * 1000)
+        if erro:
+            erros.append(erro)
+    return {
+        "rerun_completo_ms": round(statistics.median(completo), 1),
+        "fragmento_ms": round(statistics.median(so_fragmento), 1) if so_fragmento else None,
+        "erros": erros[:3],
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    ap.add_argument("--mes", type=_mes, help="AAAA-MM; padrão: último mês com lançamentos")
+    ap.add_argument("--unidade", default="Serrinha", help="unidade da Folha ('' = todas)")
+    ap.add_argument("--busca", default="silva", help="termo digitado na busca da grade (nome, CPF ou conta)")
+    ap.add_argument("--repeticoes", type=int, default=5)
+    ap.add_argument("--timeout", type=float, default=300, help="tempo máximo de um rerun, em segundos")
+    ap.add_argument("--saida", help="grava o resultado em JSON")
+    args = ap.parse_args(argv)
+    if not args.database_url:
+        ap.error("informe --database-url ou DATABASE_URL")
+
+    from streamlit.testing.v1 import AppTest
+
+    from gestao_colab import db
+
+    if args.mes is None:
+        pool = db.Pool(args.database_url, maxconn=1)
+        try:
+            with pool.cursor() as cur:
+                cur.execute("SELECT max(mes_referencia) FROM folha_pagamento WHERE mes_referencia <= current_date")
+                args.mes = cur.fetchone()[0]
+        finally:
+            pool.close()
+
+    _compilar_uma_vez()
+    at = AppTest.from_file(APP, default_timeout=args.timeout)
+    at.secrets["ConnectDB"] = args.database_url
+    at.run()
+    print(f"Folha {args.mes:%Y-%m}, unidade: {args.unidade or 'todas'}; mediana de {args.repeticoes}")
+    print(f"{'interação':<38} {'rerun completo':>15} {'só o fragmento':>15}")
+    resultado = {}
+    for nome, pagina, fragmento, localizar, acao in _interacoes(args):
+        r = resultado[nome] = _medir(at, args, nome, pagina, fragmento, localizar, acao)
+        so = f"{r['fragmento_ms']:13.0f}ms" if r["fragmento_ms"] is not None else f"{'-':>15}"
+        print(f"{nome:<38} {r['rerun_completo_ms']:13.0f}ms {so}")
+        for erro in r["erros"]:
+            print("  erro:", erro)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"data": datetime.now().isoformat(timespec="seconds"), "mes": args.mes,
+                       "unidade": args.unidade, "interacoes": resultado}, f, ensure_ascii=False, indent=1, default=str)
+    return 1 if any(r["erros"] for r in resultado.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+Teste de carga: N sessões simultâneas do app (streamlit.testing AppTest)
+navegando pelas páginas como operadores no fechamento do mês.
+
+Uso: python -m benchmarks.carga_sessoes --database-url URL [--sessoes 10] [--iteracoes 5]
+         [--carregar 10000] [--gerar] [--exportar] [--pool-max 10] [--saida carga.json]
+
+Cada sessão repete o roteiro: Gestão (e próxima página da lista) →
+Folha de Pagamento no último mês com lançamentos (opcionalmente gerando
+e exportando) → Relatórios. Cada rerun é cronometrado; ao fim saem
+p50/p95/p99 por passo e no total, e o uso de conexões: amostras de
+pg_stat_activity durante o teste e as estatísticas do pool mostradas
+pelo próprio app na barra lateral.
+
+Todas as sessões rodam no mesmo processo, como num servidor Streamlit:
+compartilham o pool, o cache de consultas e o listener.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import warnings
+from datetime import datetime
+
+import psycopg2
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gestao_main.py")
+
+warnings.filterwarnings("ignore")
+
+
+def _percentis(valores):
+    if not valores:
+        return {}
+    if len(valores) == 1:
+        p = [valores[0]] * 99
+    else:
+        p = statistics.quantiles(valores, n=100, method="inclusive")
+    return {
+        "n": len(valores),
+        "p50_ms": round(p[49], 1), "p95_ms": round(p[94], 1), "p99_ms": round(p[98], 1),
+        "max_ms": round(max(valores), 1),
+    }
+
+
+class Amostrador(threading.Thread):
+    """Lê pg_stat_activity do banco do teste a cada `intervalo` segundos."""
+
+    def __init__(self, dsn, intervalo=0.1):
+        super().__init__(daemon=True)
+        self.dsn = dsn
+        self.intervalo = intervalo
+        self.amostras = []
+        self._parar = threading.Event()
+
+    def run(self):
+        conn = psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        cur = conn.cursor()
+        try:
+            while not self._parar.is_set():
+                cur.execute("""
+                    SELECT count(*), count(*) FILTER (WHERE state = 'active'),
+                           count(*) FILTER (WHERE state LIKE 'idle in transaction%%')
+                    FROM pg_stat_activity
+                    WHERE datname = current_database() AND pid <> pg_backend_pid() AND backend_type = 'client backend'
+                """)
+                self.amostras.append(cur.fetchone())
+                self._parar.wait(self.intervalo)
+        finally:
+            conn.close()
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+    def resumo(self):
+        if not self.amostras:
+            return {}
+        total, ativas, em_transacao = zip(*self.amostras)
+        return {
+            "amostras": len(self.amostras),
+            "conexoes_max": max(total), "conexoes_media": round(statistics.mean(total), 1),
+            "ativas_max": max(ativas), "ativas_media": round(statistics.mean(ativas), 2),
+            "ociosas_em_transacao_max": max(em_transacao),
+        }
+
+
+def _ultimo_mes_com_folha(dsn):
+    conn = psycopg2.connect(dsn)
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT max(mes_referencia) FROM folha_pagamento")
+        return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _apptest_concorrente():
+    """
+    O AppTest foi feito para um teste por vez: cada run() instala um Runtime
+    falso global e o remove no fim, e compila o script com ast.parse (magic),
+    que não é seguro entre threads no CPython 3.11. Para várias sessões
+    simultâneas no mesmo processo: o Runtime falso nunca é removido
+    (todas as sessões usam mocks equivalentes) e o magic fica desligado
+    (o app não depende dele).
+    """
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.testing.v1 import app_test
+
+    config.set_option("runner.magicEnabled", False)
+
+    class _Meta(type):
+        def __getattr__(cls, nome):
+            return getattr(Runtime, nome)
+
+        def __setattr__(cls, nome, valor):
+            if nome == "_instance" and valor is None:
+                return
+            setattr(Runtime, nome, valor)
+
+    class RuntimeCompartilhado(metaclass=_Meta):
+        pass
+
+    app_test.Runtime = RuntimeCompartilhado
+
+
+def _sessao(i, args, mes, tempos, erros, pools):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=args.timeout)
+    at.secrets["ConnectDB"] = args.database_url
+
+    def passo(nome, acao=None):
+        try:
+            if acao:
+                acao()  # StopIteration se o botão não estiver na tela
+            t0 = time.perf_counter()
+            at.run()
+        except Exception as e:  # timeout do AppTest, por exemplo
+            erros.append({"sessao": i, "passo": nome, "erro": repr(e)})
+            return
+        tempos.append((nome, (time.perf_counter() - t0) * 1000))
+        if at.exception:
+            erros.append({"sessao": i, "passo": nome, "erro": at.exception[0].message})
+
+    def botao(rotulo):
+        return lambda: next(b for b in at.button if b.label.startswith(rotulo)).click()
+
+    def pagina(nome):
+        return lambda: at.sidebar.radio[0].set_value(nome)
+
+    passo("abrir app")
+    for _ in range(args.iteracoes):
+        passo("gestão", pagina("Gestão de Colaboradores"))
+        passo("gestão: próxima página", botao("Próxima"))
+        passo("folha", pagina("Folha de Pagamento"))
+        if mes is not None:
+            passo("folha: escolher mês", lambda: at.date_input[0].set_value(mes))
+        if args.gerar:
+            passo("folha: gerar lançamentos", botao("Gerar lançamentos"))
+        if args.exportar:
+            passo("folha: exportar mês (XLSX)", botao("Exportar mês inteiro"))
+        passo("relatórios", pagina("Relatórios e Estatísticas"))
+
+    # estatísticas do pool como o app mostra na barra lateral
+    try:
+        pools.append(json.loads(at.sidebar.expander[0].json[0].value))
+    except (IndexError, ValueError):
+        pass
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--database-url", required=True)
+    ap.add_argument("--sessoes", type=int, default=10)
+    ap.add_argument("--iteracoes", type=int, default=5)
+    ap.add_argument("--carregar", type=int, help="antes, substitui os dados por N colaboradores sintéticos")
+    ap.add_argument("--gerar", action="store_true", help="clica em 'Gerar lançamentos' (idempotente)")
+    ap.add_argument("--exportar", action="store_true", help="exporta o mês inteiro em XLSX")
+    ap.add_argument("--pool-max", type=int, help="DB_POOL_MAX do app (padrão do app: 10)")
+    ap.add_argument("--timeout", type=float, default=120, help="tempo máximo de um rerun, em segundos")
+    ap.add_argument("--saida", help="grava o resultado em JSON")
+    args = ap.parse_args(argv)
+
+    if args.pool_max:
+        os.environ["DB_POOL_MAX"] = str(args.pool_max)
+    if args.carregar:
+        from benchmarks import dados_sinteticos
+        from gestao_colab import db, migrations
+
+        pool = db.Pool(args.database_url, maxconn=1)
+        try:
+            migrations.migrate(pool)
+            dados_sinteticos.carregar(pool, args.carregar, substituir=True)
+        finally:
+            pool.close()
+    mes = _ultimo_mes_com_folha(args.database_url)
+
+    _apptest_concorrente()
+    tempos, erros, pools = [], [], []
+    amostrador = Amostrador(args.database_url)
+    amostrador.start()
+    t0 = time.perf_counter()
+    sessoes = [threading.Thread(target=_sessao, args=(i, args, mes, tempos, erros, pools)) for i in range(args.sessoes)]
+    for s in sessoes:
+        s.start()
+    for s in sessoes:
+        s.join()
+    duracao = time.perf_counter() - t0
+    amostrador.parar()
+
+    passos = {}
+    for nome, ms in tempos:
+        passos.setdefault(nome, []).append(ms)
+    resultado = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "sessoes": args.sessoes, "iteracoes": args.iteracoes,
+        "gerar": args.gerar, "exportar": args.exportar,
+        "duracao_s": round(duracao, 1),
+        "reruns_por_s": round(len(tempos) / duracao, 2),
+        "total": _percentis([ms for _, ms in tempos]),
+        "passos": {nome: _percentis(v) for nome, v in passos.items()},
+        "conexoes": amostrador.resumo(),
+        "pool_app": pools[-1] if pools else None,
+        "erros": erros,
+    }
+
+    print(f"{args.sessoes} sessões × {args.iteracoes} iterações: {len(tempos)} reruns em {duracao:.1f} s "
+          f"({resultado['reruns_por_s']} reruns/s), {len(erros)} erro(s)")
+    print(f"{'passo':<32} {'n':>5} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for nome, p in list(resultado["passos"].items()) + [("TOTAL", resultado["total"])]:
+        print(f"{nome:<32} {p['n']:>5} {p['p50_ms']:7.0f}ms {p['p95_ms']:7.0f}ms {p['p99_ms']:7.0f}ms")
+    print("conexões (pg_stat_activity):", resultado["conexoes"])
+    print("pool do app:", resultado["pool_app"])
+    for e in erros[:5]:
+        print("erro:", e)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=1, default=str)
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""
+Gerador de dados sintéticos (determinístico pela semente) para reproduzir
+volumes de produção: colaboradores com CPF válido, telefone, CEP e datas
+plausíveis, espalhados por UNIDADES/FUNCOES, e vários anos de folha_pagamento.
+
+Uso: python -m benchmarks.dados_sinteticos --database-url URL --colaboradores 10000 [--anos 2] [--seed 42] [--substituir]
+
+APAGA colaboradores, folha_pagamento e resumo_mensal do banco indicado
+(só com --substituir, se houver dados). Nunca lê DATABASE_URL sozinho.
+"""
+import argparse
+import io
+import sys
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from gestao_colab import colaboradores, particoes, resumos
+
+PRENOMES = [
+    "Ana", "Maria", "José", "João", "Antônio", "Francisco", "Carlos", "Paulo", "Pedro", "Lucas",
+    "Luiz", "Marcos", "Gabriel", "Rafael", "Daniel", "Marcelo", "Bruno", "Eduardo", "Felipe", "Raimundo",
+    "Adriana", "Juliana", "Márcia", "Fernanda", "Patrícia", "Aline", "Sandra", "Camila", "Amanda", "Bruna",
+    "Jéssica", "Letícia", "Júlia", "Luciana", "Vanessa", "Mariana", "Gabriela", "Vera", "Vitória", "Larissa",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+    "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas",
+    "Cardoso", "Ramos", "Gonçalves", "Santana", "Teixeira", "Bispo", "Conceição", "Jesus", "Araújo", "Reis",
+]
+BAIRROS = ["Centro", "Rodoviária", "Ginásio", "Bela Vista", "Cidade Nova", "Alto do Cruzeiro", "Vila Nova", "Zona Rural"]
+NATURALIDADES = ["Serrinha-BA", "Feira de Santana-BA", "Anguera-BA", "Ipirá-BA", "Salvador-BA", "Coração de Maria-BA"]
+# peso de cada unidade em colaboradores.UNIDADES e salário base (centavos) de cada função
+PESOS_UNIDADES = [0.45, 0.15, 0.15, 0.25]
+SALARIOS_FUNCOES = [151_800, 220_000]
+
+
+def _dias(d):
+    return np.datetime64(d, "D")
+
+
+def _cpfs(rng, n):
+    """CPFs com dígitos verificadores válidos, no formato 000.000.000-00."""
+    m = rng.integers(0, 10, size=(n, 11))
+    m[:, 9] = (m[:, :9] @ np.arange(10, 1, -1)) * 10 % 11 % 10
+    m[:, 10] = (m[:, :10] @ np.arange(11, 1, -1)) * 10 % 11 % 10
+    s = pd.Series((m + ord("0")).astype(np.uint8).view("S11").ravel()).str.decode("ascii")
+    return s.str[:3] + "." + s.str[3:6] + "." + s.str[6:9] + "-" + s.str[9:]
+
+
+def _pick(rng, opcoes, n, p=None):
+    return np.asarray(opcoes, dtype=object)[rng.choice(len(opcoes), size=n, p=p)]
+
+
+def _sem_alguns(rng, valores, fracao):
+    """Zera (None) uma fração das posições, para os alertas de qualidade terem o que mostrar."""
+    valores = np.asarray(valores, dtype=object)
+    valores[rng.random(len(valores)) < fracao] = None
+    return valores
+
+
+def gerar_colaboradores(n, seed=42, ate=None):
+    """DataFrame com `n` colaboradores (colunas da tabela, sem id)."""
+    rng = np.random.default_rng(seed)
+    ate = _dias(ate or date.today())
+    inicio_admissoes = _dias(date(2012, 1, 1))
+
+    funcao_idx = rng.choice(len(colaboradores.FUNCOES), size=n, p=[0.85, 0.15])
+    salario = np.asarray(SALARIOS_FUNCOES)[funcao_idx] + rng.integers(0, 40, size=n) * 1_000
+    admissao = inicio_admissoes + rng.integers(0, (ate - inicio_admissoes).astype(int), size=n)
+    saiu = rng.random(n) < 0.2
+    saida = admissao + rng.integers(30, 2_000, size=n)
+    saida = np.where(saiu & (saida < ate), saida, np.datetime64("NaT"))
+    nascimento = _dias(date(1965, 1, 1)) + rng.integers(0, 40 * 365, size=n)
+    emissao = nascimento + rng.integers(18 * 365, 30 * 365, size=n)
+
+    telefone = pd.Series(rng.integers(0, 10_000, size=n)).map("{:04d}".format)
+    telefone = "(75) 9" + pd.Series(rng.integers(1000, 10_000, size=n)).astype(str) + "-" + telefone
+    telefone[rng.random(n) < 0.03] = "75 9999-000"  # fora do padrão
+    cep = "44" + pd.Series(rng.integers(700, 800, size=n)).astype(str) + "-000"
+
+    df = pd.DataFrame({
+        "nome": pd.Series(_pick(rng, PRENOMES, n)) + " " + _pick(rng, SOBRENOMES, n) + " " + _pick(rng, SOBRENOMES, n),
+        "conta_deposito": pd.Series(rng.integers(1, 9_999, size=n)).map("{:04d}".format)
+        + " " + pd.Series(rng.integers(10_000, 999_999, size=n)).astype(str) + "-" + pd.Series(rng.integers(0, 10, size=n)).astype(str),
+        "nascimento": _sem_alguns(rng, pd.to_datetime(nascimento).date, 0.02),
+        "cpf": _sem_alguns(rng, _cpfs(rng, n), 0.01),
+        "rg_outro": pd.Series(rng.integers(10_000_000, 99_999_999, size=n)).astype(str) + "-" + pd.Series(rng.integers(10, 99, size=n)).astype(str),
+        "orgao_emissor": "SSP/BA",
+        "emissao": _sem_alguns(rng, pd.to_datetime(emissao).date, 0.02),
+        "admissao": pd.to_datetime(admissao).date,
+        "saida": pd.Series(pd.to_datetime(saida).date, dtype=object).where(~pd.isna(saida), None),
+        "ativo": np.where(pd.isna(saida), 1, 0),
+        "funcao": np.asarray(colaboradores.FUNCOES, dtype=object)[funcao_idx],
+        "salario_cents": np.where(rng.random(n) < 0.01, 0, salario),
+        "estado_civil": _sem_alguns(rng, _pick(rng, colaboradores.ESTADOS_CIVIS, n, p=[0.5, 0.35, 0.05, 0.1]), 0.02),
+        "escolaridade": _pick(rng, colaboradores.ESCOLARIDADES, n),
+        "nacionalidade": colaboradores.NACIONALIDADES[0],
+        "naturalidade": _pick(rng, NATURALIDADES, n),
+        "cep": _sem_alguns(rng, cep, 0.02),
+        "bairro": _pick(rng, BAIRROS, n),
+        "endereco": "Rua " + pd.Series(_pick(rng, SOBRENOMES, n)) + ", " + pd.Series(rng.integers(1, 2_000, size=n)).astype(str),
+        "telefone": telefone,
+        "unidade": _pick(rng, colaboradores.UNIDADES, n, p=PESOS_UNIDADES),
+        "observacoes": None,
+    })
+    return df
+
+
+def gerar_folha(colabs, meses, seed=42):
+    """
+    Lançamentos de `colabs` (com coluna id) para cada mês de `meses`
+    (primeiros dias) em que a pessoa estava na empresa.
+    """
+    rng = np.random.default_rng(seed + 1)
+    inicio = np.asarray(meses, dtype="datetime64[D]")
+    fim = (inicio.astype("datetime64[M]") + 1).astype("datetime64[D]") - 1
+    admissao = pd.to_datetime(colabs["admissao"]).to_numpy(dtype="datetime64[D]")
+    saida = pd.to_datetime(colabs["saida"]).to_numpy(dtype="datetime64[D]")
+    presente = (admissao[:, None] <= fim[None, :]) & (np.isnat(saida)[:, None] | (saida[:, None] >= inicio[None, :]))
+    i, j = np.nonzero(presente)
+    n = len(i)
+
+    base = colabs["salario_cents"].to_numpy()[i]
+    horas_extras = np.where(rng.random(n) < 0.3, rng.integers(0, 30_000, size=n), 0)
+    bonus = np.where(rng.random(n) < 0.1, rng.integers(5_000, 50_000, size=n), 0)
+    descontos = np.where(rng.random(n) < 0.2, rng.integers(1_000, 20_000, size=n), 0)
+    pagamento = (inicio.astype("datetime64[M]") + 1).astype("datetime64[D]") + 4
+    return pd.DataFrame({
+        "colaborador_id": colabs["id"].to_numpy()[i],
+        "colaborador_nome": colabs["nome"].to_numpy()[i],
+        "cpf": colabs["cpf"].to_numpy()[i],
+        "unidade": colabs["unidade"].to_numpy()[i],
+        "mes_referencia": pd.to_datetime(inicio[j]).date,
+        "salario_base_cents": base,
+        "valor_depositado_cents": base + horas_extras + bonus - descontos,
+        "conta_deposito": colabs["conta_deposito"].to_numpy()[i],
+        "data_pagamento": pd.to_datetime(pagamento[j]).date,
+        "observacoes": None,
+        "horas_extras_cents": horas_extras,
+        "bonus_cents": bonus,
+        "descontos_cents": descontos,
+    })
+
+
+def _copy(cur, tabela, df, bloco=200_000):
+    colunas = ", ".join(df.columns)
+    for ini in range(0, len(df), bloco):
+        buf = io.StringIO()
+        df.iloc[ini:ini + bloco].to_csv(buf, index=False, header=False, na_rep="\\N")
+        buf.seek(0)
+        cur.copy_expert(f"COPY {tabela} ({colunas}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buf)
+
+
+def carregar(pool, n, anos=2, seed=42, ate=None, substituir=False):
+    """
+    Substitui o conteúdo das tabelas por `n` colaboradores sintéticos e
+    `anos` de folha terminando no mês anterior a `ate`. Retorna
+    (colaboradores, lançamentos, meses).
+    """
+    ate = ate or date.today().replace(day=1)
+    meses = [d.date() for d in pd.date_range(end=pd.Timestamp(ate) - pd.offsets.MonthBegin(1), periods=12 * anos, freq="MS")]
+    colabs = gerar_colaboradores(n, seed, ate)
+    with pool.cursor() as cur:
+        cur.execute("SELECT EXISTS (SELECT 1 FROM colaboradores)")
+        if cur.fetchone()[0] and not substituir:
+            raise SystemExit("o banco já tem colaboradores; use --substituir para apagar")
+        cur.execute("TRUNCATE colaboradores, folha_pagamento, resumo_mensal RESTART IDENTITY")
+        _copy(cur, "colaboradores", colabs)
+        colabs.insert(0, "id", np.arange(1, n + 1))  # RESTART IDENTITY: ids na ordem do COPY
+        lanc = gerar_folha(colabs, meses, seed)
+        particoes.garantir(cur, meses)
+        _copy(cur, "folha_pagamento", lanc)
+        resumos.atualizar(cur)
+    with pool.connection() as conn:
+        conn.autocommit = True
+        try:
+            conn.cursor().execute("VACUUM ANALYZE colaboradores, folha_pagamento, resumo_mensal")
+        finally:
+            conn.autocommit = False
+    return n, len(lanc), meses
+
+
+def main(argv=None):
+    from gestao_colab import db, migrations
+
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--database-url", required=True)
+    ap.add_argument("--colaboradores", type=int, default=10_000)
+    ap.add_argument("--anos", type=int, default=2)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--substituir", action="store_true")
+    args = ap.parse_args(argv)
+
+    pool = db.Pool(args.database_url, maxconn=1)
+    try:
+        migrations.migrate(pool)
+        n, n_lanc, meses = carregar(pool, args.colaboradores, args.anos, args.seed, substituir=args.substituir)
+    finally:
+        pool.close()
+    print(f"{n} colaboradores, {n_lanc} lançamentos ({meses[0]:%Y-%m} a {meses[-1]:%Y-%m})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
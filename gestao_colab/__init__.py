@@ -0,0 +1,4 @@
+"""
+Núcleo da gestão de colaboradores: acesso ao banco e regras de negócio
+compartilhadas pelo app Streamlit (gestao_main.py).
+"""
@@ -0,0 +1,233 @@
+"""
+Linha de comando (sem navegador), para rodar pelo cron:
+
+    python -m gestao_colab generate --month 2026-10 [--ate 2026-12] [--unidade Serrinha]
+    python -m gestao_colab export --month 2026-10 [--unidade Serrinha] [--extras] [--saida folha.xlsx]
+    python -m gestao_colab remessa --month 2026-10 [--formato cnab240|pix] [--unidade Serrinha] [--saida arquivo]
+    python -m gestao_colab report comparativo|folha|alertas|tendencia [--unidade X ...] [--status Ativos] [--csv]
+    python -m gestao_colab migrate
+    python -m gestao_colab particoes [--a-frente 3] [--arquivar-ate 2025-12] [--reanexar 2025-06]
+
+A conexão vem da variável de ambiente DATABASE_URL. Não importa streamlit
+nem plotly; pandas/openpyxl só são carregados pelo `export` e pela `remessa`.
+"""
+import argparse
+import csv
+import os
+import sys
+from datetime import date
+from decimal import Decimal
+
+
+def _mes(texto):
+    """'2026-10' → date(2026, 10, 1)"""
+    try:
+        ano, mes = texto.split("-")[:2]
+        return date(int(ano), int(mes), 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"mês inválido: {texto!r} (use AAAA-MM)")
+
+
+def _pool():
+    from gestao_colab import db
+
+    dsn = os.environ.get("DATABASE_URL")
+    if not dsn:
+        sys.exit("defina DATABASE_URL")
+    return db.Pool(dsn, maxconn=1)
+
+
+def _imprimir(colunas, linhas, como_csv=False):
+    if como_csv:
+        w = csv.writer(sys.stdout)
+        w.writerow(colunas)
+        w.writerows(linhas)
+        return
+    def fmt(v):
+        if v is None:
+            return ""
+        return f"{v:.2f}" if isinstance(v, Decimal) else str(v)
+
+    texto = [[fmt(v) for v in linha] for linha in linhas]
+    larguras = [max([len(c)] + [len(l[i]) for l in texto]) for i, c in enumerate(colunas)]
+    print("  ".join(c.ljust(n) for c, n in zip(colunas, larguras)))
+    print("  ".join("-" * n for n in larguras))
+    for linha in texto:
+        print("  ".join(v.ljust(n) for v, n in zip(linha, larguras)))
+
+
+def cmd_migrate(args):
+    from gestao_colab import migrations, particoes
+
+    pool = _pool()
+    try:
+        aplicadas = migrations.migrate(pool)
+        particoes.criar_a_frente(pool)
+    finally:
+        pool.close()
+    print(f"{len(aplicadas)} migração(ões) aplicada(s)")
+    return 0
+
+
+def cmd_particoes(args):
+    from gestao_colab import particoes
+
+    pool = _pool()
+    try:
+        try:
+            if args.reanexar:
+                particoes.reanexar(pool, args.reanexar)
+                print(f"{args.reanexar:%Y-%m} reanexado")
+            if args.arquivar_ate:
+                feitos = particoes.arquivar(pool, args.arquivar_ate)
+                print(f"{len(feitos)} mês(es) arquivado(s)" + (f": {feitos[0]:%Y-%m} a {feitos[-1]:%Y-%m}" if feitos else ""))
+            particoes.criar_a_frente(pool, args.a_frente)
+        except ValueError as e:
+            sys.exit(str(e))
+        lista = particoes.listar(pool)
+    finally:
+        pool.close()
+    _imprimir(["mes", "tabela", "arquivada", "linhas", "MB"], [
+        (f"{p['mes']:%Y-%m}", p["tabela"], "sim" if p["arquivada"] else "", p["linhas"], f"{p['bytes'] / 2**20:.1f}")
+        for p in lista
+    ])
+    return 0
+
+
+def cmd_generate(args):
+    from gestao_colab import folha
+
+    meses = folha.meses_entre(args.month, args.ate or args.month)
+    pool = _pool()
+    try:
+        inseridos, ignorados = folha.gerar_lancamentos(pool, meses, args.unidade)
+    finally:
+        pool.close()
+    print(f"{inseridos} lançamento(s) gerado(s), {ignorados} já existiam "
+          f"({meses[0]:%Y-%m} a {meses[-1]:%Y-%m}, unidade: {args.unidade or 'todas'})")
+    return 0
+
+
+def cmd_export(args):
+    from gestao_colab import exportacao
+
+    saida = args.saida or f"folha_{args.month:%Y-%m}{'_' + args.unidade if args.unidade else ''}.xlsx"
+    pool = _pool()
+    try:
+        with open(saida, "wb") as destino:
+            totais = exportacao.exportar_folha_xlsx(
+                pool, destino, args.month, unidade=args.unidade, incluir_extras=args.extras
+            )
+    finally:
+        pool.close()
+    print(f"{saida}: {sum(t['lancamentos'] for t in totais.values())} lançamento(s) em {len(totais)} unidade(s)")
+    return 0
+
+
+def cmd_remessa(args):
+    import tempfile
+
+    from gestao_colab import remessa
+
+    saida = args.saida or f"remessa_{args.month:%Y-%m}{'_' + args.unidade if args.unidade else ''}.{remessa.EXTENSOES[args.formato]}"
+    pool = _pool()
+    # grava num temporário ao lado e só renomeia se a remessa saiu: erro ou remessa
+    # vazia não criam `saida` nem apagam arquivo anterior, e o temporário sai em
+    # qualquer caso (inclusive exceção)
+    destino = tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(saida)), delete=False)
+    try:
+        with destino:
+            try:
+                r = remessa.gerar(pool, destino, args.month, args.formato, unidade=args.unidade)
+            except ValueError as e:
+                r = {"erro": str(e)}
+            finally:
+                pool.close()
+        if "erro" in r or not r["remessa"]:
+            sys.exit(r.get("erro") or "nenhum lançamento com depósito a remeter")
+        os.replace(destino.name, saida)
+    finally:
+        if os.path.exists(destino.name):
+            os.remove(destino.name)
+    for linha in r["invalidos"].itertuples(index=False):
+        print(f"fora da remessa: lançamento {linha.id} ({linha.colaborador_nome}): {linha.motivo}", file=sys.stderr)
+    print(f"{saida}: remessa {r['remessa']}, {r['lancamentos']} lançamento(s), "
+          f"{r['total_cents'] // 100}.{r['total_cents'] % 100:02d}, {len(r['invalidos'])} de fora")
+    return 0
+
+
+def cmd_report(args):
+    from gestao_colab import colaboradores, relatorios, resumos
+
+    where, params = colaboradores.filtros_sql(args.unidade, args.status)
+    if args.nome == "comparativo":
+        q, p = relatorios.comparativo_sql(where, params)
+    elif args.nome == "folha":
+        q, p = relatorios.folha_por_unidade_sql(where, params)
+    elif args.nome == "alertas":
+        q, p = relatorios.alerta_contagens_sql(where, params)
+    else:
+        q, p = resumos.tendencia_sql(args.unidade, args.desde)
+
+    pool = _pool()
+    try:
+        with pool.cursor() as cur:
+            cur.execute(q, p)
+            colunas = [d[0] for d in cur.description]
+            linhas = cur.fetchall()
+    finally:
+        pool.close()
+
+    if args.nome == "alertas":
+        colunas, linhas = ["alerta", "quantidade"], [(t, n) for (t, _, _), n in zip(relatorios.ALERTAS, linhas[0])]
+    _imprimir(colunas, linhas, args.csv)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gestao_colab", description="Gestão de colaboradores (linha de comando)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("migrate", help="aplica as migrações pendentes")
+    p.set_defaults(func=cmd_migrate)
+
+    p = sub.add_parser("particoes", help="lista, cria e arquiva as partições mensais da folha")
+    p.add_argument("--a-frente", type=int, default=3, help="meses à frente do atual com partição criada")
+    p.add_argument("--arquivar-ate", type=_mes, help="desanexa e arquiva os meses até este (AAAA-MM), inclusive")
+    p.add_argument("--reanexar", type=_mes, help="traz de volta o mês arquivado (AAAA-MM)")
+    p.set_defaults(func=cmd_particoes)
+
+    p = sub.add_parser("generate", help="gera os lançamentos da folha")
+    p.add_argument("--month", type=_mes, required=True, help="mês inicial (AAAA-MM)")
+    p.add_argument("--ate", type=_mes, help="mês final (AAAA-MM); padrão: o próprio --month")
+    p.add_argument("--unidade", help="só esta unidade")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("export", help="exporta a folha do mês em XLSX (uma aba por unidade)")
+    p.add_argument("--month", type=_mes, required=True)
+    p.add_argument("--unidade")
+    p.add_argument("--extras", action="store_true", help="inclui horas extras, bônus e descontos")
+    p.add_argument("--saida", help="arquivo de saída; padrão: folha_AAAA-MM.xlsx")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("remessa", help="gera o arquivo de remessa dos depósitos do mês (CNAB 240 ou PIX)")
+    p.add_argument("--month", type=_mes, required=True)
+    p.add_argument("--formato", choices=["cnab240", "pix"], default="pix")
+    p.add_argument("--unidade")
+    p.add_argument("--saida", help="arquivo de saída; padrão: remessa_AAAA-MM.rem|csv")
+    p.set_defaults(func=cmd_remessa)
+
+    p = sub.add_parser("report", help="imprime um relatório")
+    p.add_argument("nome", choices=["comparativo", "folha", "alertas", "tendencia"])
+    p.add_argument("--unidade", action="append", help="pode repetir")
+    p.add_argument("--status", choices=["Todos", "Ativos", "Inativos"], default="Todos")
+    p.add_argument("--desde", type=_mes, help="tendencia: a partir deste mês")
+    p.add_argument("--csv", action="store_true", help="saída em CSV")
+    p.set_defaults(func=cmd_report)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Relatórios da página Relatórios e Estatísticas calculados em memória,
+sobre o DataFrame da cópia colunar de colaboradores (gestao_colab.snapshot)
+já filtrado. Mesmos resultados e colunas das consultas de relatorios.py,
+sem ida ao banco.
+"""
+from datetime import date, timedelta
+
+import pandas as pd
+
+from gestao_colab import relatorios
+
+# colunas de que as funções abaixo precisam (datas como datetime64)
+COLUNAS_ANALISE = ["id", "nome", "unidade", "admissao", "saida", "ativo", "salario_cents", "qualidade"]
+
+
+def _por_unidade(df):
+    # como o GROUP BY do SQL: unidade nula também é um grupo (e só as unidades presentes)
+    return df.groupby("unidade", dropna=False, observed=True)
+
+
+def _unidade_texto(res):
+    res["unidade"] = res["unidade"].astype(object).where(res["unidade"].notna(), None)
+    return res
+
+
+def _dias_de_casa(df):
+    return (pd.Timestamp(date.today()) - df["admissao"]).dt.days
+
+
+def _tempo_de_casa(df):
+    return pd.DataFrame({
+        "id": df["id"], "nome": df["nome"], "unidade": df["unidade"].astype(object),
+        "tenure_days": _dias_de_casa(df), "admissao_parsed": df["admissao"].dt.date,
+    }).reset_index(drop=True)
+
+
+def tempo_medio(df):
+    df = df[df["admissao"].notna()]
+    res = _por_unidade(df.assign(tenure_days=_dias_de_casa(df).astype(float)))["tenure_days"].mean()
+    return _unidade_texto(res.reset_index()).sort_values("unidade", ignore_index=True)
+
+
+def mais_antigos(df, limite=10):
+    return _tempo_de_casa(df[df["admissao"].notna()].nsmallest(limite, ["admissao", "id"]))
+
+
+def novatos(df, dias=90):
+    df = df[df["admissao"] > pd.Timestamp(date.today() - timedelta(days=dias))]
+    return _tempo_de_casa(df.sort_values(["admissao", "id"], ascending=[False, True]))
+
+
+def folha_por_unidade(df):
+    res = _unidade_texto((_por_unidade(df)["salario_cents"].sum() / 100.0).rename("folha_total").reset_index())
+    return res.sort_values("folha_total", ascending=False, kind="stable", ignore_index=True)
+
+
+def comparativo(df):
+    g = _por_unidade(df.assign(
+        ativo_1=df["ativo"] == 1,
+        saiu_12m=df["saida"] >= pd.Timestamp(date.today() - timedelta(days=365)),
+    ))
+    res = pd.DataFrame({
+        "Total": g.size(),
+        "Ativos": g["ativo_1"].sum(),
+        "Media_Salarial": (g["salario_cents"].mean() / 100.0).round(2),
+        "Folha": g["salario_cents"].sum() / 100.0,
+        "saidas_12m": g["saiu_12m"].sum(),
+    }).reset_index()
+    res["unidade"] = res["unidade"].astype(object).fillna("(Sem Unidade)")
+    res["Turnover"] = (res["saidas_12m"] / res["Total"]).round(3)
+    return res.sort_values("unidade", ignore_index=True)
+
+
+def alerta_contagens(df):
+    """Contagem de cada alerta (a0, a1, …), como a linha de relatorios.alerta_contagens_sql."""
+    q = df["qualidade"].to_numpy()
+    return pd.Series({f"a{i}": int(((q & (1 << i)) != 0).sum()) for i in range(len(relatorios.ALERTAS))})
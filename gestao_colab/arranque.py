@@ -0,0 +1,68 @@
+"""
+Medidas de arranque a frio do app: quanto custam os imports (os do topo do
+script e os feitos sob demanda por página) e quanto tempo cada página leva
+até terminar de renderizar, na primeira vez no processo e na última.
+
+Um objeto Arranque por processo (o app guarda em st.cache_resource); os
+números valem para o processo atual, então um worker reciclado começa do zero.
+"""
+import importlib
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# referência para "desde o início do processo" (primeiro import do pacote)
+INICIO = time.perf_counter()
+
+
+class Arranque:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._imports = {}   # módulo → ms do primeiro import no processo
+        self._paginas = {}   # página → {"primeira_ms", "ultima_ms", "renders"}
+        self._primeira_render_ms = None
+
+    def importar(self, nome):
+        """
+        Importa `nome` sob demanda (ex: "plotly.express"), registrando quanto
+        custou na primeira vez. Depois disso sai do sys.modules.
+        """
+        t0 = time.perf_counter()
+        # import_module (e não sys.modules.get) espera se outra thread estiver
+        # no meio do mesmo import, em vez de devolver o módulo pela metade
+        modulo = importlib.import_module(nome)
+        self.registrar_import(nome, (time.perf_counter() - t0) * 1000)
+        return modulo
+
+    def registrar_import(self, nome, ms):
+        with self._lock:
+            if nome in self._imports:
+                return
+            self._imports[nome] = ms
+        log.info("import %s: %.0f ms", nome, ms)
+
+    def registrar_render(self, pagina, ms):
+        """`ms`: do início da execução do script até o fim da página."""
+        with self._lock:
+            p = self._paginas.get(pagina)
+            primeira = p is None
+            if primeira:
+                p = self._paginas[pagina] = {"primeira_ms": ms, "ultima_ms": ms, "renders": 0}
+            p["ultima_ms"] = ms
+            p["renders"] += 1
+            if self._primeira_render_ms is None:
+                self._primeira_render_ms = (time.perf_counter() - INICIO) * 1000
+        if primeira:
+            log.info("primeira renderização de %r: %.0f ms", pagina, ms)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "processo_ate_primeira_render_ms": None if self._primeira_render_ms is None
+                else round(self._primeira_render_ms, 1),
+                "imports_ms": {k: round(v, 1) for k, v in self._imports.items()},
+                "paginas": {k: {**v, "primeira_ms": round(v["primeira_ms"], 1), "ultima_ms": round(v["ultima_ms"], 1)}
+                            for k, v in self._paginas.items()},
+            }
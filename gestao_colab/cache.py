@@ -0,0 +1,96 @@
+"""
+Cache de consultas em memória (por processo), com TTL e limite de entradas.
+
+Cada entrada guarda o escopo que ela cobre: a tabela e, opcionalmente, os
+ids, unidades e meses envolvidos (None = "qualquer"). As escritas chamam
+`invalidate` com o escopo que alteraram e só as entradas que se sobrepõem a
+ele são descartadas.
+
+Uma carga que corre enquanto alguém invalida pode ter lido o banco antes da
+escrita: `invalidate` e `clear` avançam um contador de geração e
+`get_or_load` não guarda o que carregou se a geração mudou nesse meio-tempo.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+def _overlap(a, b):
+    return a is None or b is None or not a.isdisjoint(b)
+
+
+def _as_set(valores):
+    if valores is None:
+        return None
+    if isinstance(valores, (str, int)) or not hasattr(valores, "__iter__"):
+        return frozenset([valores])
+    return frozenset(valores)
+
+
+class QueryCache:
+    """LRU com expiração: no máximo `maxsize` entradas, cada uma válida por `ttl` segundos."""
+
+    def __init__(self, maxsize=256, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._geracao = 0  # avança a cada invalidate/clear
+
+    def get_or_load(self, key, loader, table, ids=None, unidades=None, meses=None):
+        """
+        Devolve o valor em cache para `key` ou chama `loader()` e guarda o
+        resultado (a não ser que tenha havido invalidação durante o loader).
+        """
+        agora = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] > agora:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            self.misses += 1
+            geracao = self._geracao
+        valor = loader()
+        escopo = (table, _as_set(ids), _as_set(unidades), _as_set(meses))
+        with self._lock:
+            if self._geracao != geracao:
+                return valor
+            self._data[key] = (agora + self.ttl, valor, escopo)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return valor
+
+    def invalidate(self, table, ids=None, unidades=None, meses=None):
+        """Remove as entradas de `table` cujo escopo se sobrepõe ao informado. Retorna quantas."""
+        ids, unidades, meses = _as_set(ids), _as_set(unidades), _as_set(meses)
+        with self._lock:
+            self._geracao += 1
+            alvo = [
+                k for k, (_, _, (t, e_ids, e_uni, e_mes)) in self._data.items()
+                if t == table and _overlap(e_ids, ids) and _overlap(e_uni, unidades) and _overlap(e_mes, meses)
+            ]
+            for k in alvo:
+                del self._data[k]
+        return len(alvo)
+
+    def clear(self):
+        with self._lock:
+            self._geracao += 1
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entradas": len(self._data),
+                "max": self.maxsize,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "descartes_lru": self.evictions,
+            }
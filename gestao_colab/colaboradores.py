@@ -0,0 +1,124 @@
+"""
+Consultas de colaboradores usadas pelas páginas.
+"""
+import re
+
+# colunas da tabela, na ordem do CREATE TABLE (e das migrações seguintes)
+COLUNAS = [
+    "id", "nome", "conta_deposito", "nascimento", "cpf", "rg_outro", "orgao_emissor",
+    "emissao", "admissao", "saida", "ativo", "funcao", "salario_cents",
+    "estado_civil", "escolaridade", "nacionalidade", "naturalidade",
+    "cep", "bairro", "endereco", "telefone", "unidade", "observacoes",
+    "qualidade",  # gerada pelo banco (bits dos alertas), só leitura
+]
+
+# colunas calculadas na exibição -> coluna da tabela de que dependem
+COLUNAS_DERIVADAS = {"salario_reais": "salario_cents", "ativo_texto": "ativo"}
+
+PAGE_SIZE = 50
+
+# opções dos formulários (também usadas pela importação e pelos dados sintéticos)
+UNIDADES = ["Serrinha", "Anguera", "Coração de Maria", "Ipirá"]
+ESCOLARIDADES = ["E.M. Completo", "E.M. Incompleto", "E.F. Completo", "E.F. Incompleto", "Ensino Superior", "Sem escolaridade"]
+ESTADOS_CIVIS = ["Solteiro(a)", "Casado(a)", "Viúvo(a)", "Divorciado(a)"]
+FUNCOES = ["Alimentador de Linha de Produção", "Auxiliar Administrativo(a)"]
+NACIONALIDADES = ["Brasileiro(a)"]
+
+
+def filtros_sql(unidades=None, status="Todos"):
+    """Monta (where, params) para os filtros da lista. Ex: (["Serrinha"], "Ativos") → ("unidade IN (%s) AND ativo = 1", ["Serrinha"])"""
+    where_clauses = []
+    params = []
+    if unidades:
+        placeholders = ','.join(['%s']*len(unidades))
+        where_clauses.append(f"unidade IN ({placeholders})")
+        params.extend(unidades)
+    if status == "Ativos":
+        where_clauses.append("ativo = 1")
+    elif status == "Inativos":
+        where_clauses.append("ativo = 0")
+    return " AND ".join(where_clauses), params
+
+
+def pagina_sql(colunas, where="", params=(), depois_de=None, limite=PAGE_SIZE):
+    """
+    SELECT de uma página da lista, paginada por chave (nome, id).
+
+    `depois_de` é o (nome, id) da última linha da página anterior; None para a
+    primeira. Só as `colunas` pedidas são buscadas (mais as chaves da
+    paginação e as colunas de origem das derivadas).
+    """
+    pedidas = []
+    for c in ["id", "nome"] + list(colunas):
+        c = COLUNAS_DERIVADAS.get(c, c)
+        if c not in COLUNAS:
+            raise ValueError(f"coluna desconhecida: {c}")
+        if c not in pedidas:
+            pedidas.append(c)
+    clauses = [where] if where else []
+    params = list(params)
+    if depois_de is not None:
+        clauses.append("(COALESCE(nome, ''), id) > (%s, %s)")
+        params.extend(depois_de)
+    q = "SELECT " + ", ".join(pedidas) + " FROM colaboradores"
+    if clauses:
+        q += " WHERE " + " AND ".join(clauses)
+    q += " ORDER BY COALESCE(nome, ''), id LIMIT %s"
+    params.append(limite)
+    return q, params
+
+
+def contagem_sql(where="", params=()):
+    q = "SELECT count(*) AS total FROM colaboradores"
+    if where:
+        q += " WHERE " + where
+    return q, list(params)
+
+
+def chave_da_linha(row):
+    """Chave (nome, id) de uma linha, no formato usado por `depois_de`."""
+    return (row["nome"] or "", int(row["id"]))
+
+
+# colunas devolvidas pela busca (seletores de Editar/Excluir e filtro da folha)
+COLUNAS_BUSCA = ["id", "nome", "cpf", "conta_deposito", "unidade", "ativo"]
+
+
+def _busca(termo):
+    """(where, params, order by, params do order by) da busca por `termo`; where vazio = todos."""
+    termo = (termo or "").strip()
+    if not termo:
+        return "", [], "nome, id", []
+    digitos = re.sub(r"\D", "", termo)
+    if digitos and not re.search(r"[^\d\s.\-/]", termo):
+        where = r"regexp_replace(cpf, '\D', '', 'g') = %s OR regexp_replace(conta_deposito, '\D', '', 'g') = %s"
+        return where, [digitos, digitos], "nome, id", []
+    # curingas do LIKE digitados pelo usuário valem como texto
+    literal = re.sub(r"([\\%_])", r"\\\1", termo)
+    where = "busca_normalizada(nome) LIKE busca_normalizada(%s) OR busca_normalizada(%s) <%% busca_normalizada(nome)"
+    ordem = ("busca_normalizada(nome) LIKE busca_normalizada(%s) DESC, "
+             "word_similarity(busca_normalizada(%s), busca_normalizada(nome)) DESC, nome, id")
+    return where, [f"%{literal}%", termo], ordem, [f"{literal}%", termo]
+
+
+def busca_sql(termo, limite=20):
+    """
+    SELECT dos colaboradores que casam com `termo`, melhores primeiro.
+
+    Só dígitos e pontuação (ex: "123.456.789-09", "0123 45678-9"): CPF ou
+    conta iguais, comparando só os dígitos. Com letras: nome sem acentos e
+    sem caixa contendo o termo, ou parecido com ele (pg_trgm, <%), com os
+    que começam pelo termo na frente. Vazio: os primeiros por nome. Usa os
+    índices das migrações 7 e 9.
+    """
+    where, params, ordem, params_ordem = _busca(termo)
+    q = f"SELECT {', '.join(COLUNAS_BUSCA)} FROM colaboradores"
+    if where:
+        q += " WHERE " + where
+    return q + f" ORDER BY {ordem} LIMIT %s", params + params_ordem + [limite]
+
+
+def busca_contagem_sql(termo):
+    """SELECT count(*) AS n dos colaboradores que casam com `termo` (mesmas regras de busca_sql)."""
+    where, params, _, _ = _busca(termo)
+    return "SELECT count(*) AS n FROM colaboradores" + (" WHERE " + where if where else ""), params
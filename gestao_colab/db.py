@@ -0,0 +1,179 @@
+"""
+Camada de acesso ao PostgreSQL.
+
+Um único pool de conexões (limitado) por processo; cada operação pega uma
+conexão emprestada, usa e devolve. O app cria o pool uma vez via
+st.cache_resource, então reruns e sessões não abrem conexões novas.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions, pool as pg_pool
+
+
+class PoolTimeout(pg_pool.PoolError):
+    """Todas as conexões estão em uso e o tempo de espera acabou."""
+
+
+class Pool:
+    """
+    Pool limitado a `maxconn` conexões, seguro para várias threads.
+
+    Diferente do ThreadedConnectionPool puro, quem pede uma conexão com o
+    pool cheio espera até `timeout` segundos em vez de receber erro na hora.
+    Conexões ociosas há mais de `health_interval` segundos são testadas com
+    SELECT 1 antes de serem entregues. `cursor_factory` vira o cursor padrão
+    das conexões (o app usa instrumentacao.CursorMedido).
+    """
+
+    def __init__(self, dsn, minconn=1, maxconn=10, timeout=30.0, health_interval=30.0, cursor_factory=None):
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_interval = health_interval
+        self._pool = pg_pool.ThreadedConnectionPool(minconn, maxconn, dsn, cursor_factory=cursor_factory)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._last_used = {}
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._discarded = 0
+
+    # --------------------------
+    # empréstimo / devolução
+    # --------------------------
+    def getconn(self):
+        t0 = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._waits += 1
+            if not self._slots.acquire(timeout=self.timeout):
+                raise PoolTimeout(f"nenhuma conexão livre em {self.timeout:.0f}s (max={self.maxconn})")
+        waited = time.perf_counter() - t0
+        try:
+            conn = self._checkout_healthy()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_seconds += waited
+        return conn
+
+    def putconn(self, conn, close=False):
+        if not close and not conn.closed:
+            status = conn.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                close = True
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                # transação esquecida aberta: descarta o que ficou pendente
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    close = True
+        close = close or bool(conn.closed)
+        with self._lock:
+            self._in_use -= 1
+            if close:
+                self._discarded += 1
+                self._last_used.pop(id(conn), None)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+        try:
+            self._pool.putconn(conn, close=close)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        Empresta uma conexão pelo tempo do bloco `with`.
+        Faz commit ao sair normalmente e rollback se houver exceção.
+        """
+        conn = self.getconn()
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except psycopg2.OperationalError:
+            broken = True
+            raise
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self.putconn(conn, close=broken)
+
+    @contextmanager
+    def cursor(self):
+        """Atalho para `with pool.connection() as conn, conn.cursor() as cur`."""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                yield cur
+
+    def _checkout_healthy(self):
+        # no máximo algumas tentativas: se o servidor caiu, o erro sobe
+        for _ in range(3):
+            conn = self._pool.getconn()
+            if not conn.closed and self._is_fresh(conn):
+                return conn
+            if not conn.closed and self._ping(conn):
+                return conn
+            with self._lock:
+                self._discarded += 1
+                self._last_used.pop(id(conn), None)
+            self._pool.putconn(conn, close=True)
+        return self._pool.getconn()
+
+    def _is_fresh(self, conn):
+        last = self._last_used.get(id(conn))
+        return last is not None and time.monotonic() - last < self.health_interval
+
+    @staticmethod
+    def _ping(conn):
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    # --------------------------
+    # saúde e métricas
+    # --------------------------
+    def health_check(self):
+        """Executa SELECT 1 numa conexão do pool. Retorna (ok, latência em ms, erro)."""
+        t0 = time.perf_counter()
+        try:
+            with self.cursor() as cur:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+        except Exception as e:
+            return False, (time.perf_counter() - t0) * 1000, str(e)
+        return True, (time.perf_counter() - t0) * 1000, None
+
+    def stats(self):
+        """Tamanho e uso do pool, para exibir no painel lateral."""
+        with self._lock:
+            idle = len(self._pool._pool)
+            return {
+                "max": self.maxconn,
+                "abertas": idle + self._in_use,
+                "em_uso": self._in_use,
+                "ociosas": idle,
+                "emprestimos": self._checkouts,
+                "esperas": self._waits,
+                "espera_media_ms": round(self._wait_seconds / self._checkouts * 1000, 2) if self._checkouts else 0.0,
+                "descartadas": self._discarded,
+            }
+
+    def close(self):
+        self._pool.closeall()
@@ -0,0 +1,226 @@
+"""
+Conversão de valores em dinheiro (centavos inteiros ↔ reais).
+
+As funções escalares servem para um valor por vez; as de Series convertem
+uma coluna inteira sem `.apply`: o texto é tratado como uma matriz de bytes
+(uma linha por posição de caractere) e tudo é feito com aritmética inteira do
+numpy. Nada passa por float no caminho texto → centavos, então "0,29" vira
+29, não 28. Ver benchmarks/bench_dinheiro.py.
+"""
+import re
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+import numpy as np
+import pandas as pd
+
+_P10 = 10 ** np.arange(19, dtype=np.int64)
+_ZERO, _VIRG, _PONTO, _MENOS, _R, _CIFRAO = (ord(c) for c in "0,.-R$")
+# espaços aceitos antes e depois do número (e NUL, preenchimento do dtype "S")
+_ESPACOS = np.array([0, ord(" "), ord("\t"), ord("\n"), ord("\r")], dtype=np.uint8)
+# espaços, um "-" antes ou depois de um "R$" opcional, parte inteira (dígitos e
+# pontos), vírgula e decimais, espaços; nada de expoente
+_TEXTO = re.compile(r"[ \t\n\r]*(-?)[ \t\n\r]*(?:R\$[ \t\n\r]*(-?)[ \t\n\r]*)?([0-9.]*)(?:,([0-9]*))?[ \t\n\r]*")
+# mais que isto estoura o int64 dos centavos
+MAX_DIGITOS_INTEIROS, MAX_DIGITOS = 16, 18
+
+
+def _milhar(grupos):
+    """Pontos como separador de milhar: 1 a 3 dígitos sem zero à esquerda e depois grupos de 3. Ex: "1.234.567" """
+    return 1 <= len(grupos[0]) <= 3 and not grupos[0].startswith("0") and all(len(g) == 3 for g in grupos[1:])
+
+
+def _limpar(valor):
+    """
+    Texto pt-BR → texto para Decimal, ou None se inválido.
+    Ex: "R$ 1.234,56" → "1234.56", "1.234" → "1234", "0.290" → "0.290", "12.34.5" → None
+    """
+    m = _TEXTO.fullmatch(valor)
+    if m is None:
+        return None
+    sinal, sinal_depois, inteira, fracao = m.groups()
+    if sinal and sinal_depois:
+        return None
+    sinal = sinal or sinal_depois or ""
+    if "." in inteira:
+        grupos = inteira.split(".")
+        if _milhar(grupos):
+            inteira = "".join(grupos)
+        elif fracao is None and len(grupos) == 2:
+            # sem vírgula, um ponto que não é de milhar é decimal: "12.5", "0.290"
+            inteira, fracao = grupos
+        else:
+            return None
+    if not inteira and not fracao:
+        return None
+    if len(inteira) > MAX_DIGITOS_INTEIROS or len(inteira) + len(fracao or "") > MAX_DIGITOS:
+        return None
+    return f"{sinal}{inteira or 0}.{fracao or 0}"
+
+
+def cents_to_real(cents: int) -> str:
+    """
+    Converte um valor em centavos (inteiro) para string em reais no formato brasileiro.
+    Ex: 12345 → "123,45"
+    """
+    if cents is None or pd.isna(cents):
+        return "0,00"
+    cents = int(cents)
+    sinal = "-" if cents < 0 else ""
+    return f"{sinal}{abs(cents) // 100},{abs(cents) % 100:02d}"
+
+
+def real_to_cents(valor: str) -> int:
+    """
+    Converte um valor em reais (string) no formato brasileiro para centavos (inteiro),
+    arredondando meio centavo para cima. Vazio ou inválido → 0.
+    Ex: "123,45" → 12345, "1.234,5" → 123450, "0,29" → 29, "1e3" → 0
+    """
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return 0
+    if isinstance(valor, str):
+        valor = _limpar(valor)
+    else:
+        valor = repr(float(valor))
+    if not valor:
+        return 0
+    try:
+        return int((Decimal(valor) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except InvalidOperation:
+        return 0
+
+
+def cents_to_real_series(cents: pd.Series, nulo="0,00") -> pd.Series:
+    """
+    Versão vetorizada de cents_to_real para uma coluna inteira.
+    Ex: [12345, None, -5] → ["123,45", "0,00", "-0,05"]
+    """
+    vazio = cents.isna().to_numpy()
+    c = cents.fillna(0).to_numpy(dtype=np.int64)
+    n = len(c)
+    neg = c < 0
+    inteiro, centavos = np.divmod(np.abs(c), 100)
+    digitos = np.ones(n, dtype=np.int64)
+    for k in range(1, 19):
+        maior = inteiro >= _P10[k]
+        if not maior.any():
+            break
+        digitos += maior
+    tamanho = digitos + neg + 3
+    largura = int(tamanho.max(initial=4))
+    # texto alinhado à direita, uma linha da matriz por posição: só aritmética inteira
+    r = np.empty((largura, n), dtype=np.uint8)
+    r[-1] = _ZERO + centavos % 10
+    r[-2] = _ZERO + centavos // 10
+    r[-3] = _VIRG
+    resto = inteiro
+    for pos in range(largura - 4, -1, -1):
+        r[pos] = _ZERO + resto % 10
+        resto = resto // 10
+    r = r.T
+    # alinha à esquerda por grupo de tamanho (são poucos); o que sobra fica NUL e o dtype "S" corta
+    m = np.zeros((n, largura), dtype=np.uint8)
+    for t in np.unique(tamanho):
+        linhas = np.flatnonzero(tamanho == t)
+        m[linhas, :t] = r[linhas, largura - t:]
+    m[neg, 0] = _MENOS
+    texto = m.view(f"S{largura}").ravel().astype(str).astype(object)
+    texto[vazio] = nulo
+    return pd.Series(texto, index=cents.index, dtype=object)
+
+
+def real_to_cents_series(valores: pd.Series, invalido=0) -> pd.Series:
+    """
+    Versão vetorizada de real_to_cents (texto pt-BR → centavos, Int64), com
+    as mesmas regras (_TEXTO): vírgula decimal, ponto de milhar (ver
+    _milhar), "R$" e sinal só na frente, sem expoente, no máximo
+    MAX_DIGITOS dígitos, meio centavo arredondado para cima.
+    Vazio/nulo/inválido → `invalido` (0 por padrão; use pd.NA para marcar).
+    Ex: ["123,45", "1.234,5", "x", None] → [12345, 123450, 0, 0]
+    """
+    brutos = valores.to_numpy(dtype=object, na_value="")
+    try:
+        arr = brutos.astype("S")
+    except UnicodeEncodeError:
+        arr = np.array([str(x).encode("ascii", "replace") for x in brutos], dtype="S")
+    n, w = len(arr), max(arr.dtype.itemsize, 1)
+    m = arr.view(np.uint8).reshape(n, w) if arr.dtype.itemsize else np.zeros((n, 1), np.uint8)
+    m = np.ascontiguousarray(m.T)  # uma linha por posição de caractere
+    eh_dig = (m >= _ZERO) & (m <= _ZERO + 9)
+    virg, ponto, menos = m == _VIRG, m == _PONTO, m == _MENOS
+    espaco = np.isin(m, _ESPACOS)
+
+    # forma do texto, como _TEXTO: 0 antes do "R$", 1 leu o "R", 2 depois do "R$",
+    # 3 no número, 4 espaços do fim, 5 inválido (o "-" só cabe em 0 e 2; quantos, n_menos diz)
+    estado = np.zeros(n, dtype=np.int8)
+    for j in range(w):
+        prefixo = (estado == 0) | (estado == 2)
+        estado = np.select(
+            [prefixo & (espaco[j] | menos[j]), (estado == 0) & (m[j] == _R), (estado == 1) & (m[j] == _CIFRAO),
+             (prefixo | (estado == 3)) & (eh_dig[j] | virg[j] | ponto[j]), ((estado == 3) | (estado == 4)) & espaco[j]],
+            [estado, 1, 2, 3, 4], 5,
+        ).astype(np.int8)
+    n_virg = np.count_nonzero(virg, axis=0)
+    n_ponto = np.count_nonzero(ponto, axis=0)
+    n_menos = np.count_nonzero(menos, axis=0)
+    pos_virg = np.where(n_virg > 0, virg.argmax(0), w)
+    pos_ponto = np.where(n_ponto > 0, ponto.argmax(0), w)
+
+    # pontos antes da vírgula são de milhar só como em _milhar: 1 a 3 dígitos sem
+    # zero à esquerda e depois grupos de exatamente 3 ("1.234.567")
+    grupo = np.zeros(n, dtype=np.int64)     # dígitos do grupo atual
+    primeiro = np.zeros(n, dtype=np.int64)  # dígitos do primeiro grupo
+    zero_esq = np.zeros(n, dtype=bool)
+    grupo_ruim = np.zeros(n, dtype=bool)
+    pontos = np.zeros(n, dtype=np.int64)
+    for j in range(w):
+        antes_virg = j < pos_virg
+        dig, pto = eh_dig[j] & antes_virg, ponto[j] & antes_virg
+        zero_esq |= dig & (pontos == 0) & (grupo == 0) & (m[j] == _ZERO)
+        grupo += dig
+        primeiro = np.where(pto & (pontos == 0), grupo, primeiro)
+        grupo_ruim |= pto & (pontos > 0) & (grupo != 3)
+        grupo = np.where(pto, 0, grupo)
+        pontos += pto
+    grupo_ruim |= (pontos > 0) & (grupo != 3)
+    milhar = (pontos > 0) & ~grupo_ruim & (primeiro >= 1) & (primeiro <= 3) & ~zero_esq
+    # sem vírgula, um único ponto que não é de milhar é decimal ("12.5", "0.290")
+    ponto_decimal = (n_virg == 0) & (n_ponto == 1) & ~milhar
+    # ponto depois da vírgula ou vários pontos fora do padrão de milhar ("12.34.5"): inválido
+    pontos_ok = (n_ponto == 0) | (milhar & (pontos == n_ponto)) | ponto_decimal
+    pos_dec = np.where(n_virg > 0, pos_virg, np.where(ponto_decimal, pos_ponto, w))
+
+    inteiro = np.zeros(n, dtype=np.int64)
+    fracao = np.zeros(n, dtype=np.int64)
+    n_int = np.zeros(n, dtype=np.int64)
+    n_frac = np.zeros(n, dtype=np.int64)
+    arred = np.zeros(n, dtype=bool)
+    for j in range(w):
+        dig = eh_dig[j]
+        d = m[j].astype(np.int64) - _ZERO
+        antes = dig & (j < pos_dec)
+        depois = dig & (j > pos_dec)
+        # além de MAX_DIGITOS_INTEIROS o valor estoura (e é descartado abaixo)
+        inteiro = np.where(antes, inteiro * 10 + d, inteiro)
+        n_int += antes
+        # dois dígitos de centavos; o terceiro só decide o arredondamento
+        fracao = np.where(depois & (n_frac < 2), fracao * 10 + d, fracao)
+        arred |= depois & (n_frac == 2) & (d >= 5)
+        n_frac += depois
+    fracao = np.where(n_frac == 1, fracao * 10, fracao)
+    ok = (
+        ((estado == 3) | (estado == 4)) & (n_int + n_frac > 0) & (n_virg <= 1) & (n_menos <= 1) & pontos_ok
+        & (n_int <= MAX_DIGITOS_INTEIROS) & (n_int + n_frac <= MAX_DIGITOS)
+    )
+    cent = inteiro * 100 + fracao + arred
+    cent = np.where(n_menos > 0, -cent, cent)
+    return pd.Series(cent, index=valores.index, dtype="Int64").where(ok, invalido)
+
+
+def cents_to_reais(cents: pd.Series) -> pd.Series:
+    """Centavos → reais numéricos (float), preservando nulos. Para grades e planilhas."""
+    return pd.to_numeric(cents, errors="coerce") / 100
+
+
+def reais_to_cents(reais: pd.Series) -> pd.Series:
+    """Reais numéricos → centavos (Int64) arredondando ao centavo mais próximo. Ex: 0.29 → 29"""
+    return pd.Series(np.rint(pd.to_numeric(reais, errors="coerce") * 100), index=reais.index).astype("Int64")
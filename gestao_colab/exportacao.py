@@ -0,0 +1,122 @@
+"""
+Exportação da folha para XLSX em fluxo contínuo.
+
+As linhas vêm de um cursor nomeado (server-side), em blocos de `itersize`,
+e vão direto para uma planilha openpyxl em modo write-only, que grava as
+linhas em arquivo temporário em vez de mantê-las em memória. Uma aba por
+unidade e uma aba "Totais" no final.
+"""
+import re
+from collections import OrderedDict
+
+import pandas as pd
+from openpyxl import Workbook
+
+from gestao_colab import dinheiro
+
+# (coluna no banco, cabeçalho na planilha, é dinheiro?)
+COLUNAS_PADRAO = [
+    ("id", "ID", False),
+    ("colaborador_nome", "Nome", False),
+    ("valor_depositado_cents", "Valor depositado (R$)", True),
+    ("conta_deposito", "Conta de depósito", False),
+    ("salario_base_cents", "Salário base (R$)", True),
+    ("mes_referencia", "Mês referência", False),
+    ("data_pagamento", "Data pagamento", False),
+    ("cpf", "CPF", False),
+]
+COLUNAS_EXTRAS = [
+    ("horas_extras_cents", "horas_extras", True),
+    ("bonus_cents", "bonus", True),
+    ("descontos_cents", "descontos", True),
+    ("observacoes", "observacoes", False),
+]
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _nome_aba(unidade, usados):
+    nome = re.sub(r"[\[\]:*?/\\]", "-", unidade or "(Sem Unidade)")[:31]
+    base, n = nome, 2
+    while nome in usados:
+        sufixo = f" ({n})"
+        nome = base[:31 - len(sufixo)] + sufixo
+        n += 1
+    usados.add(nome)
+    return nome
+
+
+def _preparar_bloco(bloco, colunas):
+    """Converte um bloco de linhas do cursor num DataFrame pronto para a planilha (dinheiro em reais, mês AAAA-MM)."""
+    df = pd.DataFrame(bloco, columns=["unidade"] + [c for c, _, _ in colunas])
+    saida = df.drop(columns="unidade")
+    for c, _, eh_dinheiro in colunas:
+        if eh_dinheiro:
+            saida[c] = dinheiro.cents_to_reais(saida[c])
+    saida["mes_referencia"] = pd.to_datetime(saida["mes_referencia"]).dt.strftime("%Y-%m")
+    saida = saida.astype(object).where(saida.notna(), None)
+    return df, saida
+
+
+def exportar_folha_xlsx(pool, destino, mes_ref, unidade=None, ids=None, incluir_extras=False, itersize=2000):
+    """
+    Grava em `destino` (caminho ou arquivo binário) a folha de `mes_ref`,
+    opcionalmente só de uma `unidade` ou de uma lista de `ids`.
+    Retorna os totais por unidade: {unidade: {"lancamentos": n, "<coluna>_cents": soma, ...}}.
+    """
+    colunas = COLUNAS_PADRAO + (COLUNAS_EXTRAS if incluir_extras else [])
+    dinheiro_cols = [c for c, _, d in colunas if d]
+    clauses = ["mes_referencia = %s"]
+    params = [mes_ref]
+    if unidade is not None:
+        clauses.append("unidade = %s")
+        params.append(unidade)
+    if ids is not None:
+        clauses.append("id = ANY(%s)")
+        params.append(list(ids))
+    q = (
+        "SELECT unidade, " + ", ".join(c for c, _, _ in colunas)
+        + " FROM folha_pagamento WHERE " + " AND ".join(clauses)
+        + " ORDER BY unidade NULLS LAST, colaborador_nome, id"
+    )
+
+    wb = Workbook(write_only=True)
+    cabecalho = [h for _, h, _ in colunas]
+    totais = OrderedDict()
+    abas = set()
+    ws = None
+    atual = object()
+    with pool.connection() as conn:
+        with conn.cursor(name="exportar_folha_xlsx") as cur:
+            cur.itersize = itersize
+            cur.execute(q, params)
+            while True:
+                bloco = cur.fetchmany(itersize)
+                if not bloco:
+                    break
+                df, saida = _preparar_bloco(bloco, colunas)
+                # as linhas vêm ordenadas por unidade: cada troca abre uma aba nova
+                for unidade_row, grupo in df.groupby("unidade", sort=False, dropna=False):
+                    unidade_row = None if pd.isna(unidade_row) else unidade_row
+                    if unidade_row != atual:
+                        atual = unidade_row
+                        ws = wb.create_sheet(_nome_aba(unidade_row, abas))
+                        ws.append(cabecalho)
+                        totais[unidade_row] = dict.fromkeys(["lancamentos"] + dinheiro_cols, 0)
+                    t = totais[unidade_row]
+                    t["lancamentos"] += len(grupo)
+                    for c in dinheiro_cols:
+                        t[c] += int(grupo[c].sum())
+                    for row in saida.loc[grupo.index].itertuples(index=False, name=None):
+                        ws.append(row)
+
+    ws = wb.create_sheet("Totais")
+    ws.append(["Unidade", "Lançamentos"] + [h for c, h, d in colunas if d])
+    geral = dict.fromkeys(["lancamentos"] + dinheiro_cols, 0)
+    for unidade_row, t in totais.items():
+        ws.append([unidade_row or "(Sem Unidade)", t["lancamentos"]] + [t[c] / 100 for c in dinheiro_cols])
+        for k in geral:
+            geral[k] += t[k]
+    ws.append(["Total", geral["lancamentos"]] + [geral[c] / 100 for c in dinheiro_cols])
+    wb.save(destino)
+    return totais
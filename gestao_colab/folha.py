@@ -0,0 +1,111 @@
+"""
+Regras da folha de pagamento (lançamentos por colaborador e mês).
+"""
+from datetime import date
+
+from psycopg2.extras import execute_values
+
+from gestao_colab import particoes, resumos
+
+# colunas que a grade da Folha permite editar, na ordem do UPDATE em lote
+CAMPOS_EDITAVEIS = ["salario_base_cents", "valor_depositado_cents", "conta_deposito", "data_pagamento", "observacoes"]
+
+
+def primeiro_dia(d):
+    return date(d.year, d.month, 1)
+
+
+def meses_entre(inicio, fim):
+    """
+    Lista o primeiro dia de cada mês de `inicio` até `fim` (inclusive).
+    Ex: 2026-11-15, 2027-01-03 → [2026-11-01, 2026-12-01, 2027-01-01]
+    """
+    atual, fim = primeiro_dia(inicio), primeiro_dia(fim)
+    meses = []
+    while atual <= fim:
+        meses.append(atual)
+        atual = date(atual.year + atual.month // 12, atual.month % 12 + 1, 1)
+    return meses
+
+
+def gerar_lancamentos(pool, meses, unidade=None):
+    """
+    Gera, num único INSERT … SELECT, um lançamento por colaborador e mês.
+    Pares (colaborador, mês) que já existem são ignorados pela constraint
+    UNIQUE (colaborador_id, mes_referencia), então cliques simultâneos não
+    duplicam nada. A partição de cada mês é criada se ainda não existir;
+    mês arquivado dá ValueError. Retorna (inseridos, ignorados).
+    """
+    meses = [primeiro_dia(m) for m in meses]
+    if not meses:
+        return 0, 0
+    with pool.cursor() as cur:
+        particoes.garantir(cur, meses)
+        cur.execute("""
+            WITH alvo AS (
+                SELECT c.id, c.nome, c.cpf, c.unidade, m.mes,
+                       COALESCE(c.salario_cents, 0) AS salario_cents, c.conta_deposito
+                FROM colaboradores c
+                CROSS JOIN unnest(%(meses)s::date[]) AS m(mes)
+                WHERE %(unidade)s::text IS NULL OR c.unidade = %(unidade)s
+            ), ins AS (
+                INSERT INTO folha_pagamento (
+                    colaborador_id, colaborador_nome, cpf, unidade, mes_referencia,
+                    salario_base_cents, valor_depositado_cents, conta_deposito
+                )
+                SELECT id, nome, cpf, unidade, mes, salario_cents, NULL, conta_deposito
+                FROM alvo
+                ON CONFLICT (colaborador_id, mes_referencia) DO NOTHING
+                RETURNING 1
+            )
+            SELECT (SELECT count(*) FROM alvo), (SELECT count(*) FROM ins)
+        """, {"meses": meses, "unidade": unidade})
+        total, inseridos = cur.fetchone()
+        if inseridos:
+            resumos.atualizar(cur, None if unidade is None else [unidade], meses)
+    return inseridos, total - inseridos
+
+
+def diff_lancamentos(original, editado, colunas, chave="id"):
+    """
+    Linhas de `editado` em que alguma das `colunas` difere de `original`
+    (pareadas por `chave`). Nulo contra nulo não conta como mudança.
+    """
+    a = original.set_index(chave)[colunas]
+    b = editado.set_index(chave)[colunas].reindex(a.index)
+    mudou = ((a != b) & ~(a.isna() & b.isna())).any(axis=1)
+    return b[mudou].reset_index()
+
+
+def atualizar_lancamentos(pool, linhas, mes=None):
+    """
+    Aplica várias edições de lançamentos num único UPDATE … FROM (VALUES …),
+    numa transação, e recalcula o resumo mensal dos grupos tocados. `linhas`
+    é um DataFrame com `id` + CAMPOS_EDITAVEIS (valores em centavos).
+    Com `mes` (as linhas são todas desse mês, como na grade) o UPDATE só
+    abre a partição do mês, em vez de procurar os ids em todas.
+    Lançamentos que já estão numa remessa não são alterados.
+    Retorna o número de linhas atualizadas.
+    """
+    if linhas.empty:
+        return 0
+    valores = linhas[["id"] + CAMPOS_EDITAVEIS].astype(object)
+    valores = list(valores.where(valores.notna(), None).itertuples(index=False, name=None))
+    with pool.cursor() as cur:
+        # literal no SQL (não parâmetro de execute_values), para o planner podar as partições
+        do_mes = cur.mogrify(" AND f.mes_referencia = %s", (primeiro_dia(mes),)).decode() if mes else ""
+        afetados = execute_values(cur, """
+            UPDATE folha_pagamento AS f
+            SET salario_base_cents = v.salario_base_cents,
+                valor_depositado_cents = v.valor_depositado_cents,
+                conta_deposito = v.conta_deposito,
+                data_pagamento = v.data_pagamento,
+                observacoes = v.observacoes
+            FROM (VALUES %s) AS v(id, salario_base_cents, valor_depositado_cents, conta_deposito, data_pagamento, observacoes)
+            WHERE f.id = v.id AND f.remessa_id IS NULL""" + do_mes + """
+            RETURNING f.unidade, f.mes_referencia
+        """, valores, template="(%s::int, %s::int, %s::int, %s::text, %s::date, %s::text)",
+            page_size=len(valores), fetch=True)
+        if afetados:
+            resumos.atualizar(cur, {u for u, _ in afetados}, {m for _, m in afetados})
+    return len(afetados)
@@ -0,0 +1,200 @@
+"""
+Holerites (contracheques) em lote: um HTML por lançamento da folha de uma
+unidade/mês, todos num ZIP.
+
+As linhas vêm de um cursor nomeado (server-side) em blocos de `bloco`;
+cada bloco é renderizado no próprio processo ou, se pedido, por um
+processo do `executor` (criado uma vez por processo do app), e gravado no
+ZIP na ordem da consulta. Do mês inteiro só ficam em memória os metadados
+de cada arquivo (o diretório central do ZIP, ~0,5 KB por holerite).
+
+Renderizar é barato (~60 ms para 2000 holerites) perto da compressão, que
+fica neste processo de qualquer jeito: o executor é opcional
+(`novo_executor`) e só executa renderizar_bloco, que usa apenas a
+biblioteca padrão.
+"""
+import html
+import multiprocessing
+import re
+import sys
+import types
+import unicodedata
+import zipfile
+from collections import deque
+from contextlib import contextmanager
+
+# colunas lidas de folha_pagamento, na ordem das tuplas passadas aos processos
+COLUNAS = [
+    "id", "colaborador_id", "colaborador_nome", "cpf", "unidade", "mes_referencia",
+    "salario_base_cents", "horas_extras_cents", "bonus_cents", "descontos_cents",
+    "valor_depositado_cents", "conta_deposito", "data_pagamento", "observacoes",
+]
+ZIP_MIME = "application/zip"
+# folha de estilo única na raiz do ZIP, referenciada por todos os holerites
+ESTILO = "holerite.css"
+
+_ESTILO = """
+body{font-family:Arial,Helvetica,sans-serif;font-size:13px;color:#222;max-width:720px;margin:24px auto}
+h1{font-size:18px;margin:0 0 4px}
+.sub{color:#555;margin-bottom:16px}
+table{width:100%;border-collapse:collapse;margin-bottom:12px}
+th,td{border:1px solid #bbb;padding:5px 8px;text-align:left}
+td.v,th.v{text-align:right;white-space:nowrap}
+tfoot td{font-weight:bold;background:#f2f2f2}
+.obs{color:#555}
+@media print{body{margin:0}}
+"""
+
+
+def reais(cents):
+    """Centavos → "1.234,56" (None → "0,00")."""
+    cents = int(cents or 0)
+    sinal = "-" if cents < 0 else ""
+    inteiro, centavos = divmod(abs(cents), 100)
+    return f"{sinal}{inteiro:,}".replace(",", ".") + f",{centavos:02d}"
+
+
+def _cpf(cpf):
+    digitos = re.sub(r"\D", "", cpf or "")
+    if len(digitos) != 11:
+        return cpf or ""
+    return f"{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}"
+
+
+def _slug(texto):
+    texto = unicodedata.normalize("NFKD", texto or "").encode("ascii", "ignore").decode()
+    return re.sub(r"[^A-Za-z0-9]+", "_", texto).strip("_") or "sem_nome"
+
+
+def nome_arquivo(r):
+    """Caminho do holerite no ZIP: <unidade>/<AAAA-MM>_<nome>_<colaborador_id>.html"""
+    return f"{_slug(r['unidade'] or 'Sem Unidade')}/{r['mes_referencia']:%Y-%m}_{_slug(r['colaborador_nome'])}_{r['colaborador_id']}.html"
+
+
+def renderizar(r):
+    """HTML do holerite de um lançamento (dict com as COLUNAS)."""
+    e = lambda v: html.escape(str(v)) if v is not None else ""
+    proventos = [
+        ("Salário base", r["salario_base_cents"]),
+        ("Horas extras", r["horas_extras_cents"]),
+        ("Bônus", r["bonus_cents"]),
+    ]
+    total_proventos = sum(v or 0 for _, v in proventos)
+    descontos = r["descontos_cents"] or 0
+    linhas = "".join(
+        f"<tr><td>{d}</td><td class=v>{reais(v)}</td><td class=v></td></tr>" for d, v in proventos
+    ) + f"<tr><td>Descontos</td><td class=v></td><td class=v>{reais(descontos)}</td></tr>"
+    pagamento = f"{r['data_pagamento']:%d/%m/%Y}" if r["data_pagamento"] else "—"
+    obs = f"<p class=obs>Observações: {e(r['observacoes'])}</p>" if r["observacoes"] else ""
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8">
+<title>Holerite {r['mes_referencia']:%m/%Y} - {e(r['colaborador_nome'])}</title>
+<link rel="stylesheet" href="../{ESTILO}"></head><body>
+<h1>Holerite — {r['mes_referencia']:%m/%Y}</h1>
+<div class=sub>{e(r['unidade'] or 'Sem Unidade')}</div>
+<table>
+<tr><th>Colaborador</th><td>{e(r['colaborador_nome'])}</td><th>Matrícula</th><td>{r['colaborador_id']}</td></tr>
+<tr><th>CPF</th><td>{e(_cpf(r['cpf']))}</td><th>Conta de depósito</th><td>{e(r['conta_deposito'])}</td></tr>
+</table>
+<table>
+<thead><tr><th>Descrição</th><th class=v>Proventos (R$)</th><th class=v>Descontos (R$)</th></tr></thead>
+<tbody>{linhas}</tbody>
+<tfoot><tr><td>Totais</td><td class=v>{reais(total_proventos)}</td><td class=v>{reais(descontos)}</td></tr>
+<tr><td>Líquido</td><td class=v colspan=2>{reais(total_proventos - descontos)}</td></tr></tfoot>
+</table>
+<table>
+<tr><th>Valor depositado (R$)</th><td class=v>{reais(r['valor_depositado_cents']) if r['valor_depositado_cents'] is not None else '—'}</td>
+<th>Data do pagamento</th><td>{pagamento}</td></tr>
+</table>
+{obs}
+</body></html>
+"""
+
+
+def renderizar_bloco(linhas):
+    """[(nome no ZIP, HTML em bytes)] de um bloco de tuplas (na ordem de COLUNAS); roda nos processos do executor."""
+    registros = [dict(zip(COLUNAS, l)) for l in linhas]
+    return [(nome_arquivo(r), renderizar(r).encode("utf-8")) for r in registros]
+
+
+@contextmanager
+def _sem_main():
+    """
+    __main__ vazio enquanto os processos sobem: spawn/forkserver reimportam o
+    __main__ do pai em cada processo novo, e no Streamlit ele é o script do app.
+    """
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+
+def novo_executor(processos):
+    """
+    multiprocessing.Pool para gerar_zip, ou None (renderizar no próprio
+    processo) com 1 processo ou onde não há forkserver. Nunca fork: o app é
+    multithread, e o filho herdaria travas (logging, pool de conexões, LISTEN)
+    presas por outras threads. O forkserver é um processo novo, de uma
+    thread só, que carrega só este módulo; todos os processos sobem aqui
+    (o Pool não os cria sob demanda, como o ProcessPoolExecutor).
+    """
+    if processos <= 1 or "forkserver" not in multiprocessing.get_all_start_methods():
+        return None
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload([__name__])
+    with _sem_main():
+        return ctx.Pool(processos)
+
+
+def gerar_zip(pool, destino, mes_ref, unidade=None, executor=None, processos=1, bloco=200, progresso=None):
+    """
+    Grava em `destino` (caminho ou arquivo binário) o ZIP com os holerites
+    de `mes_ref` (e `unidade`, se informada). `executor` é o Pool de
+    novo_executor, com `processos` processos; `progresso(feitos, total)`
+    é chamado a cada bloco gravado. Retorna o número de holerites.
+    """
+    where, params = "mes_referencia = %s", [mes_ref]
+    if unidade is not None:
+        where += " AND unidade = %s"
+        params.append(unidade)
+    total = feitos = 0
+    em_andamento = deque()
+
+    def gravar(itens):
+        nonlocal feitos
+        for nome, conteudo in itens:
+            zf.writestr(nome, conteudo)
+        feitos += len(itens)
+        if progresso:
+            progresso(min(feitos, total), total)
+
+    # nível 1: os holerites são pequenos e parecidos, e quem comprime é este processo, não o executor
+    with zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf, pool.connection() as conn:
+        zf.writestr(ESTILO, _ESTILO.lstrip())
+        # contagem e leitura na mesma foto do banco: o total bate com as linhas lidas
+        with conn.cursor() as cur:
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+            cur.execute("SELECT count(*) FROM folha_pagamento WHERE " + where, params)
+            total = cur.fetchone()[0]
+        with conn.cursor(name="gerar_holerites") as cur:
+            cur.itersize = bloco
+            cur.execute(
+                "SELECT " + ", ".join(COLUNAS) + " FROM folha_pagamento WHERE " + where
+                + " ORDER BY unidade NULLS LAST, colaborador_nome, id", params,
+            )
+            while True:
+                linhas = cur.fetchmany(bloco)
+                if not linhas:
+                    break
+                if executor is None:
+                    gravar(renderizar_bloco(linhas))
+                    continue
+                em_andamento.append(executor.apply_async(renderizar_bloco, (linhas,)))
+                # limite de blocos em andamento: grava o mais antigo antes de ler mais
+                if len(em_andamento) >= 2 * processos:
+                    gravar(em_andamento.popleft().get())
+            while em_andamento:
+                gravar(em_andamento.popleft().get())
+    return feitos
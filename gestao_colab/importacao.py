@@ -0,0 +1,344 @@
+"""
+Importação em lote de colaboradores e lançamentos da folha (CSV/XLSX).
+
+Fluxo: `ler_planilha` → `validar_colaboradores`/`validar_folha` (uma
+passada vetorizada; devolve as linhas válidas já normalizadas e a lista de
+erros por linha) → `carregar_colaboradores`/`carregar_folha`, que mandam as
+linhas válidas por COPY FROM STDIN para uma tabela temporária e aplicam um
+único upsert na tabela final, numa transação.
+
+A chave de um colaborador na importação é o CPF (só dígitos).
+"""
+import io
+
+import numpy as np
+import pandas as pd
+
+from gestao_colab import dinheiro, particoes, resumos
+
+TELEFONE_RE = r"^\(\d{2}\)\s?\d{4,5}-\d{4}$"
+CEP_RE = r"^\d{5}-?\d{3}$"
+
+COLUNAS_COLABORADOR = [
+    "nome", "conta_deposito", "nascimento", "cpf", "rg_outro", "orgao_emissor",
+    "emissao", "admissao", "saida", "ativo", "funcao", "salario_cents",
+    "estado_civil", "escolaridade", "nacionalidade", "naturalidade",
+    "cep", "bairro", "endereco", "telefone", "unidade", "observacoes",
+]
+DATAS_COLABORADOR = ["nascimento", "emissao", "admissao", "saida"]
+
+COLUNAS_FOLHA = [
+    "cpf", "mes_referencia", "salario_base_cents", "valor_depositado_cents", "conta_deposito",
+    "data_pagamento", "observacoes", "horas_extras_cents", "bonus_cents", "descontos_cents",
+]
+# na planilha os valores vêm em reais: coluna da planilha → coluna em centavos
+DINHEIRO_FOLHA = {
+    "salario_base": "salario_base_cents",
+    "valor_depositado": "valor_depositado_cents",
+    "horas_extras": "horas_extras_cents",
+    "bonus": "bonus_cents",
+    "descontos": "descontos_cents",
+}
+
+
+def ler_planilha(arquivo, nome):
+    """Lê CSV (vírgula ou ponto e vírgula) ou XLSX com todas as colunas como texto."""
+    if nome.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(arquivo, dtype=str)
+    else:
+        df = pd.read_csv(arquivo, dtype=str, sep=None, engine="python", encoding="utf-8-sig")
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    return df
+
+
+# --------------------------
+# Validação (vetorizada)
+# --------------------------
+def _texto(df, col):
+    if col not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[col].fillna("").astype(str).str.strip()
+
+
+def _vazio(s):
+    return s.eq("")
+
+
+def cpf_valido(cpfs):
+    """
+    Confere formato e dígitos verificadores de uma coluna de CPFs.
+    Devolve (só dígitos, válido?). Ex: "529.982.247-25" → ("52998224725", True)
+    """
+    digitos = cpfs.str.replace(r"\D", "", regex=True)
+    onze = digitos.str.len().eq(11).to_numpy()
+    m = np.zeros((len(cpfs), 11), dtype=np.int64)
+    if onze.any():
+        bytes_ = digitos[onze].to_numpy(dtype=object).astype("S11")
+        m[onze] = bytes_.view(np.uint8).reshape(-1, 11) - ord("0")
+    dv1 = (m[:, :9] @ np.arange(10, 1, -1)) * 10 % 11 % 10
+    dv2 = (m[:, :10] @ np.arange(11, 1, -1)) * 10 % 11 % 10
+    repetido = (m == m[:, :1]).all(axis=1)
+    ok = onze & (m[:, 9] == dv1) & (m[:, 10] == dv2) & ~repetido
+    return digitos, pd.Series(ok, index=cpfs.index)
+
+
+def parse_datas(s):
+    """Datas em AAAA-MM-DD (ou ISO com hora, como vem do Excel) ou DD/MM/AAAA; vazio → NaT."""
+    iso = pd.to_datetime(s.where(s.ne("")), format="ISO8601", errors="coerce")
+    br = pd.to_datetime(s.where(s.ne("")), format="%d/%m/%Y", errors="coerce")
+    return iso.fillna(br)
+
+
+class _Erros:
+    def __init__(self):
+        self.partes = []
+
+    def add(self, mascara, df, coluna, erro):
+        if mascara.any():
+            self.partes.append(pd.DataFrame({
+                "linha": df.index[mascara.to_numpy()] + 2,  # +1 do cabeçalho, +1 por começar em 1
+                "coluna": coluna,
+                "valor": _texto(df, coluna)[mascara].to_numpy() if coluna in df.columns else "",
+                "erro": erro,
+            }))
+
+    def frame(self):
+        if not self.partes:
+            return pd.DataFrame(columns=["linha", "coluna", "valor", "erro"])
+        return pd.concat(self.partes, ignore_index=True).sort_values(["linha", "coluna"], kind="stable")
+
+
+def validar_colaboradores(df, unidades, funcoes=None):
+    """
+    Valida uma planilha de colaboradores. Devolve (válidos, erros): `válidos`
+    tem as colunas de COLUNAS_COLABORADOR normalizadas (CPF só dígitos,
+    datas como date, salário em centavos) e `erros` uma linha por problema.
+    """
+    erros = _Erros()
+    nome = _texto(df, "nome")
+    erros.add(_vazio(nome), df, "nome", "nome obrigatório")
+
+    cpf_digitos, cpf_ok = cpf_valido(_texto(df, "cpf"))
+    erros.add(~cpf_ok, df, "cpf", "CPF inválido")
+    duplicado = cpf_ok & cpf_digitos.duplicated(keep="first")
+    erros.add(duplicado, df, "cpf", "CPF repetido na planilha")
+
+    datas = {}
+    for col in DATAS_COLABORADOR:
+        texto = _texto(df, col)
+        datas[col] = parse_datas(texto)
+        erros.add(~_vazio(texto) & datas[col].isna(), df, col, "data inválida (use AAAA-MM-DD ou DD/MM/AAAA)")
+    erros.add(datas["saida"].notna() & datas["admissao"].notna() & (datas["saida"] < datas["admissao"]),
+              df, "saida", "saída antes da admissão")
+
+    cep = _texto(df, "cep")
+    erros.add(~_vazio(cep) & ~cep.str.match(CEP_RE), df, "cep", "CEP inválido (00000-000)")
+    telefone = _texto(df, "telefone")
+    erros.add(~_vazio(telefone) & ~telefone.str.match(TELEFONE_RE), df, "telefone", "telefone inválido ((00) 00000-0000)")
+    unidade = _texto(df, "unidade")
+    erros.add(~unidade.isin(unidades), df, "unidade", "unidade desconhecida")
+    funcao = _texto(df, "funcao")
+    if funcoes is not None:
+        erros.add(~_vazio(funcao) & ~funcao.isin(funcoes), df, "funcao", "função desconhecida")
+
+    col_sal = "salario_cents" if "salario_cents" in df.columns else "salario"
+    texto_sal = _texto(df, col_sal)
+    if col_sal == "salario_cents":
+        numero = pd.to_numeric(texto_sal, errors="coerce")
+        # centavos inteiros que cabem na coluna INTEGER; "12.5", "inf" etc. viram erro da linha
+        inteiro = numero.notna() & numero.mod(1).eq(0) & numero.abs().lt(2 ** 31)
+        salario = numero.where(inteiro).astype("Int64")
+    else:
+        salario = dinheiro.real_to_cents_series(texto_sal, invalido=pd.NA)
+    erros.add(salario.isna() & ~_vazio(texto_sal), df, col_sal, "salário inválido")
+    erros.add(salario.fillna(0) < 0, df, col_sal, "salário negativo")
+
+    ativo_txt = _texto(df, "ativo").str.lower()
+    # vazio fica nulo: na carga vira "ativo se não tem saída" (novos) ou mantém o atual
+    ativo = ativo_txt.isin(["1", "sim", "ativo", "true", "s"]).astype("Int64").where(~_vazio(ativo_txt))
+
+    erros_df = erros.frame()
+    ok = ~df.index.isin(erros_df["linha"] - 2)
+    validos = pd.DataFrame({c: _texto(df, c).replace("", None) for c in COLUNAS_COLABORADOR}, index=df.index)
+    validos["cpf"] = cpf_digitos
+    for col in DATAS_COLABORADOR:
+        validos[col] = datas[col].dt.date.astype(object).where(datas[col].notna(), None)
+    validos["salario_cents"] = salario
+    validos["ativo"] = ativo
+    return validos[ok], erros_df
+
+
+def validar_folha(df):
+    """
+    Valida uma planilha de lançamentos (um por CPF e mês). Valores em reais
+    nas colunas de DINHEIRO_FOLHA. Devolve (válidos, erros) como em validar_colaboradores.
+    """
+    erros = _Erros()
+    cpf_digitos, cpf_ok = cpf_valido(_texto(df, "cpf"))
+    erros.add(~cpf_ok, df, "cpf", "CPF inválido")
+
+    mes = parse_datas(_texto(df, "mes_referencia").str.replace(r"^(\d{4})-(\d{2})$", r"\1-\2-01", regex=True)
+                      .str.replace(r"^(\d{2})/(\d{4})$", r"01/\1/\2", regex=True))
+    erros.add(mes.isna(), df, "mes_referencia", "mês inválido (AAAA-MM)")
+    mes = mes.dt.to_period("M").dt.to_timestamp()
+    duplicado = cpf_ok & mes.notna() & pd.DataFrame({"c": cpf_digitos, "m": mes}).duplicated(keep="first")
+    erros.add(duplicado, df, "cpf", "CPF repetido no mesmo mês")
+
+    pagamento_txt = _texto(df, "data_pagamento")
+    pagamento = parse_datas(pagamento_txt)
+    erros.add(~_vazio(pagamento_txt) & pagamento.isna(), df, "data_pagamento", "data inválida")
+
+    valores = {}
+    for col, col_cents in DINHEIRO_FOLHA.items():
+        texto = _texto(df, col)
+        valores[col_cents] = dinheiro.real_to_cents_series(texto, invalido=pd.NA)
+        erros.add(valores[col_cents].isna() & ~_vazio(texto), df, col, "valor inválido")
+
+    erros_df = erros.frame()
+    ok = ~df.index.isin(erros_df["linha"] - 2)
+    validos = pd.DataFrame({
+        "cpf": cpf_digitos,
+        "mes_referencia": mes.dt.date,
+        "conta_deposito": _texto(df, "conta_deposito").replace("", None),
+        "data_pagamento": pagamento.dt.date.astype(object).where(pagamento.notna(), None),
+        "observacoes": _texto(df, "observacoes").replace("", None),
+        **valores,
+    }, index=df.index)
+    validos["linha"] = df.index + 2
+    return validos[ok], erros_df
+
+
+# --------------------------
+# Carga (COPY + upsert)
+# --------------------------
+def _copy(cur, tabela, df, colunas):
+    buf = io.StringIO()
+    df[colunas].to_csv(buf, index=False, header=False, na_rep="\\N")
+    buf.seek(0)
+    cur.copy_expert(
+        f"COPY {tabela} ({', '.join(colunas)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buf
+    )
+
+
+_CPF_DIGITOS = "regexp_replace(c.cpf, '\\D', '', 'g')"
+
+
+def carregar_colaboradores(pool, validos):
+    """
+    Carrega colaboradores validados: COPY para staging e um único comando
+    que atualiza quem já existe (mesmo CPF) e insere o resto. Retorna
+    (inseridos, atualizados).
+    """
+    if validos.empty:
+        return 0, 0
+    cols = COLUNAS_COLABORADOR
+    # célula vazia na planilha mantém o valor atual de quem já existe
+    set_cols = ", ".join(
+        f"{c} = COALESCE(s.{c}, c.{c})" for c in cols if c != "ativo"
+    ) + ", ativo = COALESCE(s.ativo, CASE WHEN s.saida IS NOT NULL THEN 0 ELSE c.ativo END)"
+    ins_cols = [
+        "COALESCE(s.ativo, CASE WHEN s.saida IS NULL THEN 1 ELSE 0 END)" if c == "ativo"
+        else "COALESCE(s.salario_cents, 0)" if c == "salario_cents"
+        else "s." + c
+        for c in cols
+    ]
+    with pool.cursor() as cur:
+        # impede que outra importação insira o mesmo CPF entre o UPDATE e o INSERT
+        cur.execute("LOCK TABLE colaboradores IN SHARE ROW EXCLUSIVE MODE")
+        cur.execute("CREATE TEMP TABLE stage_colaboradores (LIKE colaboradores INCLUDING DEFAULTS) ON COMMIT DROP")
+        cur.execute("ALTER TABLE stage_colaboradores DROP COLUMN id")
+        _copy(cur, "stage_colaboradores", validos, cols)
+        # unidades/meses que mudam de movimentação: versão anterior de quem será atualizado
+        cur.execute(f"""
+            SELECT c.unidade, c.admissao, c.saida FROM colaboradores c
+            JOIN stage_colaboradores s ON s.cpf = {_CPF_DIGITOS}
+        """)
+        antes = cur.fetchall()
+        cur.execute(f"""
+            WITH atualizados AS (
+                UPDATE colaboradores c SET {set_cols}
+                FROM stage_colaboradores s
+                WHERE s.cpf = {_CPF_DIGITOS}
+                RETURNING s.cpf
+            ), inseridos AS (
+                INSERT INTO colaboradores ({", ".join(cols)})
+                SELECT {", ".join(ins_cols)} FROM stage_colaboradores s
+                WHERE s.cpf NOT IN (SELECT cpf FROM atualizados)
+                RETURNING 1
+            )
+            SELECT (SELECT count(*) FROM inseridos), (SELECT count(DISTINCT cpf) FROM atualizados)
+        """)
+        inseridos, atualizados = cur.fetchone()
+        depois = validos[["unidade", "admissao", "saida"]].itertuples(index=False, name=None)
+        resumos.atualizar(cur, *resumos.movimento_colaborador(*antes, *depois))
+    return inseridos, atualizados
+
+
+def carregar_folha(pool, validos):
+    """
+    Carrega lançamentos validados: COPY para staging, junta com colaboradores
+    pelo CPF e faz um único INSERT … ON CONFLICT (colaborador_id,
+    mes_referencia) DO UPDATE, que não mexe em lançamento já incluído numa
+    remessa; a partição de cada mês é criada se faltar (mês arquivado dá
+    ValueError). Retorna (gravados, linhas da planilha sem colaborador com
+    aquele CPF).
+    """
+    if validos.empty:
+        return 0, []
+    cols = ["linha"] + COLUNAS_FOLHA
+    with pool.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE stage_folha (
+                linha INTEGER, cpf TEXT, mes_referencia DATE,
+                salario_base_cents INTEGER, valor_depositado_cents INTEGER, conta_deposito TEXT,
+                data_pagamento DATE, observacoes TEXT,
+                horas_extras_cents INTEGER, bonus_cents INTEGER, descontos_cents INTEGER
+            ) ON COMMIT DROP
+        """)
+        _copy(cur, "stage_folha", validos, cols)
+        cur.execute(f"""
+            CREATE TEMP TABLE stage_folha_colab ON COMMIT DROP AS
+            SELECT DISTINCT ON (s.linha) s.*, c.id AS colaborador_id, c.nome, c.cpf AS cpf_cadastro,
+                   c.unidade, c.salario_cents, c.conta_deposito AS conta_cadastro
+            FROM stage_folha s
+            JOIN colaboradores c ON s.cpf = {_CPF_DIGITOS}
+            ORDER BY s.linha, c.ativo DESC NULLS LAST, c.id
+        """)
+        cur.execute("""
+            SELECT linha FROM stage_folha s
+            WHERE NOT EXISTS (SELECT 1 FROM stage_folha_colab x WHERE x.linha = s.linha)
+            ORDER BY linha
+        """)
+        sem_colaborador = [r[0] for r in cur.fetchall()]
+        cur.execute("SELECT DISTINCT mes_referencia FROM stage_folha_colab")
+        particoes.garantir(cur, [m for m, in cur.fetchall()])
+        cur.execute("""
+            WITH gravados AS (
+                INSERT INTO folha_pagamento (
+                    colaborador_id, colaborador_nome, cpf, unidade, mes_referencia,
+                    salario_base_cents, valor_depositado_cents, conta_deposito, data_pagamento,
+                    observacoes, horas_extras_cents, bonus_cents, descontos_cents
+                )
+                SELECT colaborador_id, nome, cpf_cadastro, unidade, mes_referencia,
+                       COALESCE(salario_base_cents, salario_cents, 0), valor_depositado_cents,
+                       COALESCE(conta_deposito, conta_cadastro), data_pagamento,
+                       observacoes, horas_extras_cents, bonus_cents, descontos_cents
+                FROM stage_folha_colab
+                ON CONFLICT (colaborador_id, mes_referencia) DO UPDATE SET
+                    salario_base_cents = EXCLUDED.salario_base_cents,
+                    valor_depositado_cents = EXCLUDED.valor_depositado_cents,
+                    conta_deposito = EXCLUDED.conta_deposito,
+                    data_pagamento = EXCLUDED.data_pagamento,
+                    observacoes = EXCLUDED.observacoes,
+                    horas_extras_cents = EXCLUDED.horas_extras_cents,
+                    bonus_cents = EXCLUDED.bonus_cents,
+                    descontos_cents = EXCLUDED.descontos_cents
+                WHERE folha_pagamento.remessa_id IS NULL
+                RETURNING unidade, mes_referencia
+            )
+            SELECT unidade, mes_referencia FROM gravados
+        """)
+        gravados = cur.fetchall()
+        if gravados:
+            resumos.atualizar(cur, {u for u, _ in gravados}, {m for _, m in gravados})
+    return len(gravados), sem_colaborador
@@ -0,0 +1,163 @@
+"""
+Conferência, via EXPLAIN, de que as consultas das páginas usam os índices
+criados nas migrações.
+
+O planner prefere seq scan em tabelas pequenas (ambiente de teste), então a
+conferência roda com enable_seqscan = off: o que se verifica é que existe um
+índice utilizável para cada consulta, não o plano escolhido em produção.
+Em folha_pagamento (particionada) o plano usa o índice de cada partição,
+que conta como o índice da tabela-mãe de que ele faz parte. As consultas
+da folha usam o último mês com lançamentos (partição vazia não tem
+estatística que o planner leve ao índice); sem lançamentos, ficam de fora.
+
+Uso: DATABASE_URL=... python -m gestao_colab.indices
+"""
+import json
+import os
+import sys
+
+import psycopg2
+
+from gestao_colab import colaboradores
+
+# lugar do mês nos parâmetros das consultas da folha; trocado pelo último mês com lançamentos
+_MES = object()
+
+# filtros e colunas padrão da lista de colaboradores, para gerar o SQL como a página
+_FILTROS = colaboradores.filtros_sql(["Serrinha"], "Ativos")
+_COLUNAS_LISTA = ["id", "nome", "funcao", "unidade", "salario_reais", "ativo_texto"]
+
+# (descrição, SQL, parâmetros, índices esperados: todos têm de aparecer no plano)
+PAGE_QUERIES = [
+    (
+        "Lista de colaboradores: total (unidade + status)",
+        *colaboradores.contagem_sql(*_FILTROS),
+        {"colaboradores_unidade_ativo_idx"},
+    ),
+    (
+        "Lista de colaboradores: primeira página",
+        *colaboradores.pagina_sql(_COLUNAS_LISTA),
+        {"colaboradores_nome_id_idx"},
+    ),
+    (
+        "Lista de colaboradores: página seguinte (unidade + status, chave nome/id)",
+        *colaboradores.pagina_sql(_COLUNAS_LISTA, *_FILTROS, depois_de=("Maria", 10)),
+        {"colaboradores_nome_id_idx"},
+    ),
+    (
+        "Busca por nome (trigramas, sem acentos)",
+        *colaboradores.busca_sql("joao"),
+        {"colaboradores_busca_nome_idx"},
+    ),
+    (
+        "Busca por CPF ou conta (só dígitos)",
+        *colaboradores.busca_sql("123.456.789-09"),
+        {"colaboradores_cpf_digitos_idx", "colaboradores_conta_digitos_idx"},
+    ),
+    (
+        "Alertas de qualidade (contagens por bit)",
+        "SELECT count(*) FILTER (WHERE qualidade & 8 <> 0) FROM colaboradores WHERE unidade IN (%s) AND qualidade <> 0",
+        ("Serrinha",),
+        {"colaboradores_qualidade_idx"},
+    ),
+    (
+        "Folha do mês (todas as unidades)",
+        "SELECT * FROM folha_pagamento WHERE mes_referencia = %s ORDER BY colaborador_nome",
+        (_MES,),
+        {"folha_pagamento_mes_nome_idx"},
+    ),
+    (
+        "Folha do mês por unidade",
+        "SELECT * FROM folha_pagamento WHERE mes_referencia = %s AND unidade = %s ORDER BY colaborador_nome",
+        (_MES, "Serrinha"),
+        {"folha_pagamento_mes_unidade_nome_idx"},
+    ),
+    (
+        "Lançamento de um colaborador no mês",
+        "SELECT 1 FROM folha_pagamento WHERE colaborador_id = %s AND mes_referencia = %s",
+        (1, _MES),
+        {"folha_pagamento_colaborador_mes_key"},
+    ),
+]
+
+
+def _indices_do_plano(plano):
+    """Coleta recursivamente os nomes de índice usados num plano JSON."""
+    nomes = set()
+    if "Index Name" in plano:
+        nomes.add(plano["Index Name"])
+    for filho in plano.get("Plans", []):
+        nomes |= _indices_do_plano(filho)
+    return nomes
+
+
+def _com_ancestrais(cur, nomes):
+    """Os índices e, para índices de partição, os da tabela-mãe correspondentes."""
+    if not nomes:
+        return set()
+    cur.execute(
+        "SELECT DISTINCT a.relid::regclass::text FROM unnest(%s::text[]) AS n(nome), "
+        "pg_partition_ancestors(n.nome::regclass) AS a",
+        (sorted(nomes),),
+    )
+    return set(nomes) | {r[0] for r in cur.fetchall()}
+
+
+def check_indexes(pool, queries=None):
+    """
+    Roda EXPLAIN de cada consulta e retorna uma lista de dicts
+    {consulta, esperado, usados, ok}; ok se todos os esperados foram usados.
+    """
+    resultado = []
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT max(mes_referencia) FROM folha_pagamento")
+            mes = cur.fetchone()[0]
+            cur.execute("SET LOCAL enable_seqscan = off")
+            for descricao, sql, params, esperado in queries or PAGE_QUERIES:
+                folha = any(p is _MES for p in params)
+                if folha:
+                    if mes is None:
+                        continue  # folha vazia: nada a conferir
+                    params = tuple(mes if p is _MES else p for p in params)
+                # num mês cheio o planner da folha prefere bitmap scan pelo índice único (mes_referencia
+                # é a 2ª coluna dele); as consultas da folha conferem índices btree, sem bitmap
+                cur.execute("SET LOCAL enable_bitmapscan = " + ("off" if folha else "on"))
+                # consulta que nem roda (ex: sem a extensão pg_trgm) é falha dela, não da conferência
+                cur.execute("SAVEPOINT consulta")
+                try:
+                    cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+                except psycopg2.Error as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT consulta")
+                    resultado.append({"consulta": descricao, "esperado": sorted(esperado), "usados": [],
+                                      "ok": False, "erro": str(e).splitlines()[0]})
+                    continue
+                plano = cur.fetchone()[0]
+                if isinstance(plano, str):
+                    plano = json.loads(plano)
+                usados = _com_ancestrais(cur, _indices_do_plano(plano[0]["Plan"]))
+                resultado.append({
+                    "consulta": descricao,
+                    "esperado": sorted(esperado),
+                    "usados": sorted(usados),
+                    "ok": set(esperado) <= usados,
+                })
+        conn.rollback()
+    return resultado
+
+
+def main():
+    from gestao_colab import db
+
+    pool = db.Pool(os.environ["DATABASE_URL"], maxconn=1)
+    falhas = 0
+    for r in check_indexes(pool):
+        marca = "OK  " if r["ok"] else "FALHA"
+        print(f"{marca} {r['consulta']}: esperado {r['esperado']}, usados {r.get('erro') or r['usados'] or '-'}")
+        falhas += not r["ok"]
+    pool.close()
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""
+Instrumentação dos caminhos quentes: tempo de cada comando SQL (agrupado
+pela "impressão digital" do comando), de cada pd.read_sql_query e de cada
+seção das páginas.
+
+Um Metricas por processo (METRICAS). As conexões do pool usam CursorMedido
+(cursor_factory), então todo cursor.execute / copy_expert é medido sem
+mexer em quem chama. Os números saem no painel de admin do app, em linhas
+de log JSON (logger "gestao_colab.instrumentacao") e num arquivo texto no
+formato do Prometheus (coletor textfile do node_exporter, por exemplo).
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from psycopg2 import extensions
+
+log = logging.getLogger(__name__)
+
+# limites dos baldes dos histogramas, em segundos
+BALDES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# consultas acima disto vão para o log em INFO (as demais em DEBUG)
+LENTA_MS = float(os.environ.get("SLOW_QUERY_MS", 500))
+# teto de impressões digitais distintas guardadas (o resto cai em "(outras)")
+MAX_DIGITAIS = 500
+
+_LITERAIS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%\(\w+\)s|%s"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)"), "(?, …)"),
+    (re.compile(r"(\(\?, …\)\s*,\s*)+\(\?, …\)"), "(?, …), …"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def digital(sql):
+    """
+    Normaliza um comando para agrupar as execuções dele: tira literais e
+    parâmetros e junta listas. Ex: "... WHERE unidade IN (%s,%s) LIMIT 50"
+    → "... WHERE unidade IN (?, …) LIMIT ?"
+    """
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    elif not isinstance(sql, str):
+        sql = str(sql)  # psycopg2.sql.Composed
+    for padrao, troca in _LITERAIS:
+        sql = padrao.sub(troca, sql)
+    return sql.strip()
+
+
+class _Serie:
+    """Contagem, soma, máximo e histograma de durações."""
+
+    __slots__ = ("n", "segundos", "maximo", "linhas", "baldes")
+
+    def __init__(self):
+        self.n = 0
+        self.segundos = 0.0
+        self.maximo = 0.0
+        self.linhas = 0
+        self.baldes = [0] * len(BALDES)
+
+    def add(self, segundos, linhas=0):
+        self.n += 1
+        self.segundos += segundos
+        self.maximo = max(self.maximo, segundos)
+        self.linhas += linhas
+        for i, limite in enumerate(BALDES):
+            if segundos <= limite:
+                self.baldes[i] += 1
+                break
+
+
+class Metricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._consultas = {}   # (origem, digital) → _Serie
+        self._secoes = {}      # (pagina, secao) → _Serie
+        self._ultima_gravacao = 0.0
+
+    # --------------------------
+    # registro
+    # --------------------------
+    def registrar_consulta(self, sql, segundos, linhas=0, origem="cursor"):
+        fp = digital(sql)
+        with self._lock:
+            chave = (origem, fp)
+            serie = self._consultas.get(chave)
+            if serie is None:
+                if len(self._consultas) >= MAX_DIGITAIS:
+                    chave = (origem, "(outras)")
+                serie = self._consultas.setdefault(chave, _Serie())
+            serie.add(segundos, linhas)
+        ms = segundos * 1000
+        log.log(logging.INFO if ms >= LENTA_MS else logging.DEBUG, json.dumps({
+            "evento": "sql", "origem": origem, "id": _id(fp), "ms": round(ms, 2),
+            "linhas": linhas, "sql": fp[:300],
+        }, ensure_ascii=False))
+
+    def registrar_secao(self, pagina, secao, segundos):
+        with self._lock:
+            self._secoes.setdefault((pagina, secao), _Serie()).add(segundos)
+        log.debug(json.dumps({"evento": "secao", "pagina": pagina, "secao": secao,
+                              "ms": round(segundos * 1000, 2)}, ensure_ascii=False))
+
+    @contextmanager
+    def medir(self, sql, origem):
+        """Mede um bloco que executa `sql`; o bloco pode preencher r["linhas"]."""
+        r = {"linhas": 0}
+        t0 = time.perf_counter()
+        try:
+            yield r
+        finally:
+            self.registrar_consulta(sql, time.perf_counter() - t0, r["linhas"], origem)
+
+    def cronometro(self, pagina):
+        return Cronometro(self, pagina)
+
+    def limpar(self):
+        with self._lock:
+            self._consultas.clear()
+            self._secoes.clear()
+
+    # --------------------------
+    # leitura
+    # --------------------------
+    def consultas(self, limite=50):
+        """Consultas mais custosas (tempo total), como lista de dicts."""
+        with self._lock:
+            itens = [(k, s.n, s.segundos, s.maximo, s.linhas) for k, s in self._consultas.items()]
+        itens.sort(key=lambda x: x[2], reverse=True)
+        return [{
+            "origem": origem, "id": _id(fp), "execucoes": n,
+            "total_ms": round(seg * 1000, 1), "media_ms": round(seg * 1000 / n, 2),
+            "max_ms": round(maximo * 1000, 1), "linhas": linhas, "sql": fp,
+        } for (origem, fp), n, seg, maximo, linhas in itens[:limite]]
+
+    def secoes(self):
+        with self._lock:
+            itens = [(k, s.n, s.segundos, s.maximo) for k, s in self._secoes.items()]
+        return [{
+            "pagina": pagina, "secao": secao, "execucoes": n,
+            "media_ms": round(seg * 1000 / n, 2), "max_ms": round(maximo * 1000, 1),
+        } for (pagina, secao), n, seg, maximo in sorted(itens)]
+
+    def prometheus(self, medidores=None):
+        """
+        Texto no formato de exposição do Prometheus. `medidores` são gauges
+        extras {nome: valor} (ex: estado do pool), todos com prefixo gestao_.
+        """
+        linhas = []
+        with self._lock:
+            consultas = [(k, _copia(s)) for k, s in self._consultas.items()]
+            secoes = [(k, _copia(s)) for k, s in self._secoes.items()]
+        linhas += _histograma(
+            "gestao_sql_segundos", "Duração dos comandos SQL por impressão digital",
+            [({"origem": o, "id": _id(fp), "sql": fp[:200]}, s) for (o, fp), s in consultas],
+        )
+        linhas.append("# HELP gestao_sql_linhas_total Linhas devolvidas/afetadas")
+        linhas.append("# TYPE gestao_sql_linhas_total counter")
+        for (o, fp), s in consultas:
+            linhas.append(f'gestao_sql_linhas_total{_rotulos({"origem": o, "id": _id(fp)})} {s.linhas}')
+        linhas += _histograma(
+            "gestao_secao_segundos", "Duração das seções das páginas",
+            [({"pagina": p, "secao": sec}, s) for (p, sec), s in secoes],
+        )
+        for nome, valor in (medidores or {}).items():
+            if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                linhas.append(f"# TYPE gestao_{nome} gauge")
+                linhas.append(f"gestao_{nome} {valor}")
+        return "\n".join(linhas) + "\n"
+
+    def gravar_prometheus(self, caminho, medidores=None, intervalo=15.0):
+        """
+        Grava o texto do Prometheus em `caminho` (troca atômica), no máximo
+        uma vez a cada `intervalo` segundos. Devolve True se gravou.
+        """
+        agora = time.monotonic()
+        with self._lock:
+            if agora - self._ultima_gravacao < intervalo:
+                return False
+            self._ultima_gravacao = agora
+        tmp = f"{caminho}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus(medidores))
+        os.replace(tmp, caminho)
+        return True
+
+
+class Cronometro:
+    """
+    Mede seções consecutivas de uma página sem reindentar o script:
+    cada marcar("nome") registra o tempo desde a marca anterior.
+    """
+
+    def __init__(self, metricas, pagina):
+        self.metricas = metricas
+        self.pagina = pagina
+        self._t = time.perf_counter()
+
+    def marcar(self, secao):
+        agora = time.perf_counter()
+        self.metricas.registrar_secao(self.pagina, secao, agora - self._t)
+        self._t = agora
+
+    def zerar(self):
+        """Recomeça a contagem sem registrar nada (início de um st.fragment, que pode rodar sozinho)."""
+        self._t = time.perf_counter()
+
+
+def _id(fp):
+    return hashlib.md5(fp.encode("utf-8")).hexdigest()[:10]
+
+
+def _copia(s):
+    c = _Serie()
+    c.n, c.segundos, c.maximo, c.linhas, c.baldes = s.n, s.segundos, s.maximo, s.linhas, list(s.baldes)
+    return c
+
+
+def _rotulos(d):
+    def esc(v):
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in d.items()) + "}"
+
+
+def _histograma(nome, ajuda, series):
+    linhas = [f"# HELP {nome} {ajuda}", f"# TYPE {nome} histogram"]
+    for rotulos, s in series:
+        acumulado = 0
+        for limite, n in zip(BALDES, s.baldes):
+            acumulado += n
+            linhas.append(f"{nome}_bucket{_rotulos({**rotulos, 'le': limite})} {acumulado}")
+        linhas.append(f"{nome}_bucket{_rotulos({**rotulos, 'le': '+Inf'})} {s.n}")
+        linhas.append(f"{nome}_sum{_rotulos(rotulos)} {s.segundos:.6f}")
+        linhas.append(f"{nome}_count{_rotulos(rotulos)} {s.n}")
+    return linhas
+
+
+METRICAS = Metricas()
+
+
+class CursorMedido(extensions.cursor):
+    """Cursor do psycopg2 que registra cada execute/executemany/copy_expert em METRICAS."""
+
+    def execute(self, query, vars=None):
+        with METRICAS.medir(query, "cursor") as r:
+            try:
+                return super().execute(query, vars)
+            finally:
+                r["linhas"] = max(self.rowcount, 0)
+
+    def executemany(self, query, vars_list):
+        with METRICAS.medir(query, "cursor") as r:
+            try:
+                return super().executemany(query, vars_list)
+            finally:
+                r["linhas"] = max(self.rowcount, 0)
+
+    def copy_expert(self, sql, file, size=8192):
+        with METRICAS.medir(sql, "cursor") as r:
+            try:
+                return super().copy_expert(sql, file, size)
+            finally:
+                r["linhas"] = max(self.rowcount, 0)
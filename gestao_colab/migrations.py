@@ -0,0 +1,401 @@
+"""
+Migrações de esquema versionadas.
+
+Cada migração é uma função numerada que recebe um cursor e roda seu DDL.
+A versão aplicada fica na tabela schema_version; `migrate` aplica, em ordem,
+só as que faltam. Novas tabelas, índices e constraints entram aqui como uma
+nova função, sem mexer no código das páginas.
+"""
+
+# chave do pg_advisory_lock: evita que dois processos migrem ao mesmo tempo
+LOCK_KEY = 7_310_001
+
+MIGRATIONS = []
+
+
+def migration(version, descricao):
+    def register(fn):
+        MIGRATIONS.append((version, descricao, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+
+def current_version(cur):
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cur.fetchone()[0]
+
+
+def migrate(pool):
+    """
+    Aplica as migrações pendentes, cada uma na sua própria transação.
+    Retorna a lista de (versão, descrição) aplicadas nesta chamada.
+    """
+    aplicadas = []
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s)", (LOCK_KEY,))
+            try:
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
+                        descricao TEXT,
+                        aplicada_em TIMESTAMPTZ NOT NULL DEFAULT now()
+                    )
+                """)
+                conn.commit()
+                atual = current_version(cur)
+                for version, descricao, fn in MIGRATIONS:
+                    if version <= atual:
+                        continue
+                    fn(cur)
+                    cur.execute(
+                        "INSERT INTO schema_version (version, descricao) VALUES (%s, %s)",
+                        (version, descricao),
+                    )
+                    conn.commit()
+                    aplicadas.append((version, descricao))
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (LOCK_KEY,))
+    return aplicadas
+
+
+# =========================================================
+# Migrações (em ordem; nunca altere uma já publicada)
+# =========================================================
+
+@migration(1, "tabelas colaboradores e folha_pagamento")
+def _m001_tabelas_iniciais(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS colaboradores (
+        id SERIAL PRIMARY KEY,
+        nome TEXT,
+        conta_deposito TEXT,
+        nascimento DATE,
+        cpf TEXT,
+        rg_outro TEXT,
+        orgao_emissor TEXT,
+        emissao DATE,
+        admissao DATE,
+        saida DATE,
+        ativo INTEGER,
+        funcao TEXT,
+        salario_cents INTEGER,
+        estado_civil TEXT,
+        escolaridade TEXT,
+        nacionalidade TEXT,
+        naturalidade TEXT,
+        cep TEXT,
+        bairro TEXT,
+        endereco TEXT,
+        telefone TEXT,
+        unidade TEXT,
+        observacoes TEXT
+    )
+    """)
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS folha_pagamento (
+        id SERIAL PRIMARY KEY,
+        colaborador_id INTEGER,
+        colaborador_nome TEXT,
+        cpf TEXT,
+        unidade TEXT,
+        mes_referencia DATE,
+        salario_base_cents INTEGER,
+        valor_depositado_cents INTEGER,
+        conta_deposito TEXT,
+        data_pagamento DATE,
+        observacoes TEXT,
+        horas_extras_cents INTEGER,
+        bonus_cents INTEGER,
+        descontos_cents INTEGER
+    )""")
+
+
+@migration(2, "chave única (colaborador_id, mes_referencia) em folha_pagamento")
+def _m002_folha_chave_unica(cur):
+    # lançamentos duplicados (cliques simultâneos no gerador antigo): fica o mais antigo
+    cur.execute("""
+        DELETE FROM folha_pagamento f
+        USING folha_pagamento g
+        WHERE f.colaborador_id = g.colaborador_id
+          AND f.mes_referencia = g.mes_referencia
+          AND f.id > g.id
+    """)
+    cur.execute("""
+        ALTER TABLE folha_pagamento
+        ADD CONSTRAINT folha_pagamento_colaborador_mes_key UNIQUE (colaborador_id, mes_referencia)
+    """)
+
+
+@migration(3, "índices dos filtros das páginas")
+def _m003_indices(cur):
+    # Lista de colaboradores: filtro por unidade/status; seletores: ORDER BY nome
+    cur.execute("CREATE INDEX IF NOT EXISTS colaboradores_unidade_ativo_idx ON colaboradores (unidade, ativo)")
+    cur.execute("CREATE INDEX IF NOT EXISTS colaboradores_nome_idx ON colaboradores (nome)")
+    # Folha: mês (+ unidade) já na ordem de exibição
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS folha_pagamento_mes_unidade_nome_idx
+        ON folha_pagamento (mes_referencia, unidade, colaborador_nome)
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS folha_pagamento_mes_nome_idx
+        ON folha_pagamento (mes_referencia, colaborador_nome)
+    """)
+    # colaborador_id já é coberto pela chave única (colaborador_id, mes_referencia)
+
+
+
+_NOTIFY_FUNCTION = """
+CREATE OR REPLACE FUNCTION {nome}() RETURNS trigger AS $$
+DECLARE
+    payload jsonb;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT jsonb_build_object('n', count(*), {campos}) INTO payload FROM novas;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT jsonb_build_object('n', count(*), {campos}) INTO payload FROM antigas;
+    ELSE
+        SELECT jsonb_build_object('n', count(*), {campos}) INTO payload
+        FROM (SELECT * FROM novas UNION ALL SELECT * FROM antigas) AS linhas;
+    END IF;
+    IF (payload->>'n')::int = 0 THEN
+        RETURN NULL;
+    END IF;
+    payload := payload - 'n' || jsonb_build_object('tabela', TG_TABLE_NAME, 'op', TG_OP);
+    IF octet_length(payload::text) > 7500 THEN
+        payload := payload - 'ids';
+    END IF;
+    IF octet_length(payload::text) > 7500 THEN
+        payload := jsonb_build_object('tabela', TG_TABLE_NAME, 'op', TG_OP);
+    END IF;
+    PERFORM pg_notify('gestao_cache', payload::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def _notify_triggers(cur, tabela, funcao):
+    for op, referencing in (
+        ("INSERT", "NEW TABLE AS novas"),
+        ("UPDATE", "OLD TABLE AS antigas NEW TABLE AS novas"),
+        ("DELETE", "OLD TABLE AS antigas"),
+    ):
+        cur.execute(f"""
+            CREATE TRIGGER {tabela}_notify_{op.lower()}
+            AFTER {op} ON {tabela}
+            REFERENCING {referencing}
+            FOR EACH STATEMENT EXECUTE PROCEDURE {funcao}()
+        """)
+
+
+@migration(4, "NOTIFY gestao_cache nas escritas de colaboradores e folha_pagamento")
+def _m004_notify_triggers(cur):
+    # Um aviso por comando, com ids/unidades/meses afetados, para que os outros
+    # processos invalidem só o que mudou (ver gestao_colab/notify.py). Se o
+    # payload passar do limite do NOTIFY (8000 bytes), vai sem ids — e, no
+    # limite, só com a tabela — o que invalida mais, nunca menos.
+    cur.execute(_NOTIFY_FUNCTION.format(
+        nome="colaboradores_notify",
+        campos="'ids', jsonb_agg(DISTINCT id), 'unidades', jsonb_agg(DISTINCT unidade)",
+    ))
+    cur.execute(_NOTIFY_FUNCTION.format(
+        nome="folha_pagamento_notify",
+        campos="'ids', jsonb_agg(DISTINCT id), 'unidades', jsonb_agg(DISTINCT unidade), "
+               "'meses', jsonb_agg(DISTINCT mes_referencia)",
+    ))
+    _notify_triggers(cur, "colaboradores", "colaboradores_notify")
+    _notify_triggers(cur, "folha_pagamento", "folha_pagamento_notify")
+
+
+@migration(5, "índice da paginação por (nome, id) em colaboradores")
+def _m005_indice_paginacao(cur):
+    cur.execute("CREATE INDEX IF NOT EXISTS colaboradores_nome_id_idx ON colaboradores ((COALESCE(nome, '')), id)")
+
+
+@migration(6, "tabela resumo_mensal (folha e movimentação por unidade/mês)")
+def _m006_resumo_mensal(cur):
+    from gestao_colab import resumos
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS resumo_mensal (
+            unidade TEXT NOT NULL,
+            mes_referencia DATE NOT NULL,
+            lancamentos INTEGER NOT NULL DEFAULT 0,
+            headcount INTEGER NOT NULL DEFAULT 0,
+            salario_base_cents BIGINT NOT NULL DEFAULT 0,
+            depositado_cents BIGINT NOT NULL DEFAULT 0,
+            horas_extras_cents BIGINT NOT NULL DEFAULT 0,
+            bonus_cents BIGINT NOT NULL DEFAULT 0,
+            descontos_cents BIGINT NOT NULL DEFAULT 0,
+            admissoes INTEGER NOT NULL DEFAULT 0,
+            saidas INTEGER NOT NULL DEFAULT 0,
+            atualizado_em TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (unidade, mes_referencia)
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS resumo_mensal_mes_idx ON resumo_mensal (mes_referencia)")
+    # carga inicial com todo o histórico
+    resumos.atualizar(cur)
+
+
+@migration(7, "índice do CPF só com dígitos (chave da importação em lote)")
+def _m007_indice_cpf(cur):
+    cur.execute(r"""
+        CREATE INDEX IF NOT EXISTS colaboradores_cpf_digitos_idx
+        ON colaboradores ((regexp_replace(cpf, '\D', '', 'g')))
+    """)
+
+
+# condição de cada bit de colaboradores.qualidade, na ordem de relatorios.ALERTAS
+_QUALIDADE = [
+    "nascimento IS NULL OR admissao IS NULL",
+    "COALESCE(salario_cents, 0) = 0",
+    "COALESCE(trim(cpf), '') = '' OR COALESCE(trim(rg_outro), '') = '' OR emissao IS NULL",
+    r"COALESCE(telefone, '') !~ '^\(\d{2}\)\s?\d{4,5}-\d{4}$'",
+    "ativo = 0 AND saida IS NULL",
+    "COALESCE(trim(conta_deposito), '') = ''",
+    "COALESCE(trim(estado_civil), '') = '' OR COALESCE(trim(escolaridade), '') = '' OR COALESCE(trim(naturalidade), '') = ''",
+    "COALESCE(trim(cep), '') = '' OR COALESCE(trim(bairro), '') = '' OR COALESCE(trim(endereco), '') = ''",
+]
+
+
+@migration(8, "coluna qualidade (bits dos alertas) calculada na escrita, com índice")
+def _m008_qualidade(cur):
+    # coluna gerada: o banco recalcula em todo INSERT/UPDATE, seja do app, da importação ou de fora
+    bits = " | ".join(f"(CASE WHEN {cond} THEN {1 << i} ELSE 0 END)" for i, cond in enumerate(_QUALIDADE))
+    cur.execute(f"""
+        ALTER TABLE colaboradores ADD COLUMN IF NOT EXISTS qualidade INTEGER
+        GENERATED ALWAYS AS ({bits}) STORED
+    """)
+    # só os colaboradores com algum alerta entram no índice
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS colaboradores_qualidade_idx
+        ON colaboradores (qualidade, unidade, ativo) WHERE qualidade <> 0
+    """)
+    # estatísticas da coluna nova, para o planejador saber que são poucos
+    cur.execute("ANALYZE colaboradores")
+
+
+# letras acentuadas → sem acento, para a busca por nome (translate, sem depender da extensão unaccent)
+_ACENTOS = "ÁÀÂÃÄÉÈÊËÍÌÎÏÓÒÔÕÖÚÙÛÜÇÑáàâãäéèêëíìîïóòôõöúùûüçñ"
+_SEM_ACENTOS = "AAAAAEEEEIIIIOOOOOUUUUCNaaaaaeeeeiiiiooooouuuucn"
+
+
+@migration(9, "busca de colaboradores: trigramas do nome sem acentos (pg_trgm), CPF e conta")
+def _m009_busca(cur):
+    # pg_trgm vem no contrib do Postgres (disponível nos serviços gerenciados);
+    # criar a extensão pode exigir permissão de dono do banco
+    cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # IMMUTABLE para poder ser usada num índice de expressão
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION busca_normalizada(texto TEXT) RETURNS TEXT AS $$
+            SELECT lower(translate(texto, %s, %s))
+        $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    """, (_ACENTOS, _SEM_ACENTOS))
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS colaboradores_busca_nome_idx
+        ON colaboradores USING gin (busca_normalizada(nome) gin_trgm_ops)
+    """)
+    cur.execute(r"""
+        CREATE INDEX IF NOT EXISTS colaboradores_conta_digitos_idx
+        ON colaboradores ((regexp_replace(conta_deposito, '\D', '', 'g')))
+    """)
+
+
+@migration(10, "coluna versao (txid da última escrita) em colaboradores, para o snapshot incremental")
+def _m010_versao(cur):
+    # linhas já existentes ficam com 0: o primeiro snapshot lê a tabela inteira de qualquer forma
+    cur.execute("ALTER TABLE colaboradores ADD COLUMN IF NOT EXISTS versao BIGINT NOT NULL DEFAULT 0")
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION colaboradores_versao() RETURNS trigger AS $$
+        BEGIN
+            NEW.versao := txid_current();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    cur.execute("""
+        CREATE TRIGGER colaboradores_versao
+        BEFORE INSERT OR UPDATE ON colaboradores
+        FOR EACH ROW EXECUTE PROCEDURE colaboradores_versao()
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS colaboradores_versao_idx ON colaboradores (versao)")
+
+
+@migration(11, "folha_pagamento particionada por mês (mes_referencia), com arquivo dos meses fechados")
+def _m011_folha_particionada(cur):
+    from gestao_colab import particoes
+
+    # a chave da partição não pode ser nula: lançamento sem mês não tem partição
+    cur.execute("SELECT count(*) FROM folha_pagamento WHERE mes_referencia IS NULL")
+    sem_mes = cur.fetchone()[0]
+    if sem_mes:
+        raise RuntimeError(
+            f"{sem_mes} lançamento(s) em folha_pagamento sem mes_referencia: "
+            "corrija ou apague antes de migrar"
+        )
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS folha_arquivo (
+            mes_referencia DATE PRIMARY KEY,
+            tabela TEXT NOT NULL,
+            arquivada_em TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    cur.execute(f"CREATE SCHEMA IF NOT EXISTS {particoes.ESQUEMA_ARQUIVO}")
+
+    # tabela nova com as mesmas colunas (e o DEFAULT do id, que continua usando a mesma sequência)
+    cur.execute("ALTER TABLE folha_pagamento RENAME TO folha_pagamento_antiga")
+    cur.execute("""
+        CREATE TABLE folha_pagamento (LIKE folha_pagamento_antiga INCLUDING DEFAULTS)
+        PARTITION BY RANGE (mes_referencia)
+    """)
+    cur.execute("ALTER TABLE folha_pagamento ALTER COLUMN mes_referencia SET NOT NULL")
+    cur.execute("SELECT DISTINCT mes_referencia FROM folha_pagamento_antiga")
+    for mes in sorted({particoes.primeiro_dia(m) for m, in cur.fetchall()}):
+        particoes.criar(cur, mes)
+    cur.execute("""
+        INSERT INTO folha_pagamento SELECT * FROM folha_pagamento_antiga
+    """)
+    cur.execute("ALTER SEQUENCE folha_pagamento_id_seq OWNED BY folha_pagamento.id")
+    cur.execute("DROP TABLE folha_pagamento_antiga")
+
+    # chaves e índices depois da carga; em tabela particionada toda chave inclui mes_referencia
+    cur.execute("ALTER TABLE folha_pagamento ADD PRIMARY KEY (id, mes_referencia)")
+    cur.execute("""
+        ALTER TABLE folha_pagamento
+        ADD CONSTRAINT folha_pagamento_colaborador_mes_key UNIQUE (colaborador_id, mes_referencia)
+    """)
+    cur.execute("""
+        CREATE INDEX folha_pagamento_mes_unidade_nome_idx
+        ON folha_pagamento (mes_referencia, unidade, colaborador_nome)
+    """)
+    cur.execute("CREATE INDEX folha_pagamento_mes_nome_idx ON folha_pagamento (mes_referencia, colaborador_nome)")
+    # triggers de instrução com tabelas de transição valem para a tabela-mãe inteira
+    _notify_triggers(cur, "folha_pagamento", "folha_pagamento_notify")
+    cur.execute("ANALYZE folha_pagamento")
+
+
+@migration(12, "remessas bancárias (tabela remessas e folha_pagamento.remessa_id)")
+def _m012_remessas(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS remessas (
+            id SERIAL PRIMARY KEY,
+            mes_referencia DATE NOT NULL,
+            unidade TEXT,
+            formato TEXT NOT NULL,
+            lancamentos INTEGER NOT NULL DEFAULT 0,
+            total_cents BIGINT NOT NULL DEFAULT 0,
+            criada_em TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    cur.execute("ALTER TABLE folha_pagamento ADD COLUMN IF NOT EXISTS remessa_id INTEGER REFERENCES remessas (id)")
+    # partições arquivadas precisam das mesmas colunas para poderem ser reanexadas
+    cur.execute("SELECT tabela FROM folha_arquivo")
+    for tabela, in cur.fetchall():
+        cur.execute(f"ALTER TABLE {tabela} ADD COLUMN IF NOT EXISTS remessa_id INTEGER")
@@ -0,0 +1,92 @@
+"""
+Invalidação do cache entre processos via LISTEN/NOTIFY.
+
+As triggers da migração 4 publicam no canal `gestao_cache` um JSON com a
+tabela e os ids/unidades/meses afetados por cada comando. Cada processo do
+app mantém uma thread ouvindo o canal e descarta do seu QueryCache só as
+entradas atingidas.
+"""
+import json
+import logging
+import select
+import threading
+from datetime import date
+
+import psycopg2
+from psycopg2 import extensions
+
+CHANNEL = "gestao_cache"
+
+log = logging.getLogger(__name__)
+
+
+def apply_notification(query_cache, payload):
+    """Interpreta um payload do canal e invalida o escopo correspondente."""
+    msg = json.loads(payload)
+    meses = msg.get("meses")
+    if meses is not None:
+        meses = [date.fromisoformat(m) for m in meses if m]
+    return query_cache.invalidate(
+        msg["tabela"],
+        ids=msg.get("ids"),
+        unidades=msg.get("unidades"),
+        meses=meses,
+    )
+
+
+class Listener(threading.Thread):
+    """
+    Thread daemon com uma conexão própria (fora do pool) em LISTEN.
+    Se a conexão cair, reconecta com espera crescente e limpa o cache inteiro,
+    já que avisos podem ter sido perdidos nesse intervalo.
+    """
+
+    def __init__(self, dsn, query_cache, poll_timeout=5.0, max_backoff=60.0):
+        super().__init__(name="gestao-cache-listener", daemon=True)
+        self.dsn = dsn
+        self.query_cache = query_cache
+        self.poll_timeout = poll_timeout
+        self.max_backoff = max_backoff
+        self.received = 0
+        self.reconnects = 0
+        self._parar = threading.Event()
+
+    def stop(self):
+        self._parar.set()
+
+    def run(self):
+        backoff = 1.0
+        while not self._parar.is_set():
+            try:
+                self._listen()
+                backoff = 1.0
+            except psycopg2.Error as e:
+                log.warning("listener do cache desconectado: %s", e)
+                self.reconnects += 1
+                self.query_cache.clear()
+                self._parar.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def _listen(self):
+        conn = psycopg2.connect(self.dsn)
+        try:
+            conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {CHANNEL}")
+            while not self._parar.is_set():
+                if select.select([conn], [], [], self.poll_timeout) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    n = conn.notifies.pop(0)
+                    self.received += 1
+                    try:
+                        apply_notification(self.query_cache, n.payload)
+                    except (ValueError, KeyError):
+                        log.exception("payload inválido em %s: %r", CHANNEL, n.payload)
+                        self.query_cache.clear()
+        finally:
+            conn.close()
+
+    def stats(self):
+        return {"vivo": self.is_alive(), "avisos": self.received, "reconexoes": self.reconnects}
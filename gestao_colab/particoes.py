@@ -0,0 +1,152 @@
+"""
+Partições mensais de folha_pagamento (particionada por mes_referencia
+desde a migração 11).
+
+Cada mês é uma tabela folha_pagamento_AAAA_MM. O app cria as partições
+dos próximos meses no arranque e, nas escritas (geração, importação),
+as dos meses que ainda não existirem. Meses fechados podem ser
+arquivados: a partição é desanexada e vai para o esquema `arquivo` (os
+dados ficam no banco, fora das consultas da folha; resumo_mensal guarda
+os totais). `reanexar` desfaz.
+
+Uso pela linha de comando: python -m gestao_colab particoes [--arquivar-ate AAAA-MM] [--reanexar AAAA-MM]
+"""
+import json
+from datetime import date
+
+from gestao_colab import notify
+
+TABELA = "folha_pagamento"
+ESQUEMA_ARQUIVO = "arquivo"
+# partições criadas à frente do mês atual
+MESES_A_FRENTE = 3
+# chave do pg_advisory_xact_lock: dois processos não criam a mesma partição ao mesmo tempo
+LOCK_KEY = 7_310_002
+
+
+def primeiro_dia(d):
+    return d.replace(day=1)
+
+
+def nome(mes):
+    return f"{TABELA}_{mes:%Y_%m}"
+
+
+def proximo_mes(mes):
+    return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+
+def criar(cur, mes):
+    """Cria a partição de `mes` (primeiro dia) se ainda não existir."""
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {nome(mes)} PARTITION OF {TABELA}
+        FOR VALUES FROM (%s) TO (%s)
+    """, (mes, proximo_mes(mes)))
+
+
+def arquivados(cur, meses=None):
+    """Meses arquivados (entre `meses`, se informado)."""
+    cur.execute(
+        "SELECT mes_referencia FROM folha_arquivo WHERE %s::date[] IS NULL OR mes_referencia = ANY(%s::date[])",
+        (meses, meses),
+    )
+    return sorted(m for m, in cur.fetchall())
+
+
+def garantir(cur, meses):
+    """
+    Garante que existe partição para cada um dos `meses`, na transação de
+    quem vai escrever. Mês arquivado dá ValueError: gravar nele criaria
+    uma partição nova ao lado dos dados arquivados.
+    """
+    meses = sorted({primeiro_dia(m) for m in meses if m is not None})
+    if not meses:
+        return
+    fechados = arquivados(cur, meses)
+    if fechados:
+        raise ValueError("mês arquivado: " + ", ".join(f"{m:%Y-%m}" for m in fechados)
+                         + " (reanexe com `python -m gestao_colab particoes --reanexar AAAA-MM`)")
+    cur.execute("SELECT m FROM unnest(%s::date[]) AS m WHERE to_regclass(%s || to_char(m, 'YYYY_MM')) IS NULL",
+                (meses, TABELA + "_"))
+    faltam = [m for m, in cur.fetchall()]
+    if faltam:
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (LOCK_KEY,))
+        for mes in faltam:
+            criar(cur, mes)
+
+
+def criar_a_frente(pool, meses=MESES_A_FRENTE, hoje=None):
+    """Partições do mês atual e dos `meses` seguintes (o app chama no arranque)."""
+    atual = primeiro_dia(hoje or date.today())
+    alvo = [atual]
+    for _ in range(meses):
+        alvo.append(proximo_mes(alvo[-1]))
+    with pool.cursor() as cur:
+        garantir(cur, alvo)
+    return alvo
+
+
+def listar(pool):
+    """Partições anexadas e arquivadas: dicts {mes, tabela, arquivada, linhas (estimativa), bytes}."""
+    with pool.cursor() as cur:
+        return _listar(cur)
+
+
+def _listar(cur):
+    cur.execute("""
+        SELECT to_date(right(c.relname, 7), 'YYYY_MM') AS mes, n.nspname || '.' || c.relname AS tabela,
+               n.nspname = %s AS arquivada, greatest(c.reltuples, 0)::bigint AS linhas,
+               pg_total_relation_size(c.oid) AS bytes
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relkind = 'r' AND c.relname ~ %s
+          AND (c.relispartition OR n.nspname = %s)
+        ORDER BY mes
+    """, (ESQUEMA_ARQUIVO, f"^{TABELA}_[0-9]{{4}}_[0-9]{{2}}$", ESQUEMA_ARQUIVO))
+    colunas = [d[0] for d in cur.description]
+    return [dict(zip(colunas, linha)) for linha in cur.fetchall()]
+
+
+def arquivar(pool, ate, hoje=None):
+    """
+    Desanexa as partições dos meses até `ate` (inclusive) e as move para o
+    esquema `arquivo`. Só meses fechados: o mês atual e os seguintes nunca
+    são arquivados. Retorna os meses arquivados.
+    """
+    ate = primeiro_dia(ate)
+    if ate >= primeiro_dia(hoje or date.today()):
+        raise ValueError(f"{ate:%Y-%m} não está fechado: só meses anteriores ao atual podem ser arquivados")
+    feitos = []
+    with pool.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA IF NOT EXISTS {ESQUEMA_ARQUIVO}")
+        for p in _listar(cur):
+            if p["arquivada"] or p["mes"] > ate:
+                continue
+            mes = p["mes"]
+            cur.execute(f"ALTER TABLE {TABELA} DETACH PARTITION {nome(mes)}")
+            cur.execute(f"ALTER TABLE {nome(mes)} SET SCHEMA {ESQUEMA_ARQUIVO}")
+            cur.execute("INSERT INTO folha_arquivo (mes_referencia, tabela) VALUES (%s, %s)",
+                        (mes, f"{ESQUEMA_ARQUIVO}.{nome(mes)}"))
+            feitos.append(mes)
+        _avisar(cur, feitos)
+    return feitos
+
+
+def reanexar(pool, mes):
+    """Traz de volta a partição arquivada de `mes`."""
+    mes = primeiro_dia(mes)
+    with pool.cursor() as cur:
+        if not arquivados(cur, [mes]):
+            raise ValueError(f"{mes:%Y-%m} não está arquivado")
+        cur.execute(f"ALTER TABLE {ESQUEMA_ARQUIVO}.{nome(mes)} SET SCHEMA public")
+        cur.execute(f"ALTER TABLE {TABELA} ATTACH PARTITION {nome(mes)} FOR VALUES FROM (%s) TO (%s)",
+                    (mes, proximo_mes(mes)))
+        cur.execute("DELETE FROM folha_arquivo WHERE mes_referencia = %s", (mes,))
+        _avisar(cur, [mes])
+
+
+def _avisar(cur, meses):
+    # DETACH/ATTACH não disparam as triggers de NOTIFY: avisa os caches dos meses que mudaram
+    if meses:
+        cur.execute("SELECT pg_notify(%s, %s)", (notify.CHANNEL, json.dumps(
+            {"tabela": TABELA, "op": "PARTICAO", "meses": [m.isoformat() for m in meses]})))
@@ -0,0 +1,118 @@
+"""
+Consultas agregadas dos relatórios (comando `report` e benchmarks).
+
+Cada função devolve (sql, params) de uma consulta que já chega resumida
+(uma linha por unidade, top 10, etc.), para que o custo do relatório não
+dependa do número de colaboradores. `where`/`params` são os filtros da
+página, montados por colaboradores.filtros_sql. A página do app calcula
+os mesmos relatórios sobre a cópia colunar (gestao_colab.analise).
+"""
+
+
+def _where(where, *extras):
+    clauses = [c for c in (where,) + extras if c]
+    return (" WHERE " + " AND ".join(clauses)) if clauses else ""
+
+
+def unidades_sql():
+    return "SELECT DISTINCT unidade FROM colaboradores WHERE unidade IS NOT NULL ORDER BY unidade", []
+
+
+def total_sql(where="", params=()):
+    return "SELECT count(*) AS total FROM colaboradores" + _where(where), list(params)
+
+
+def tempo_medio_sql(where="", params=()):
+    """Média de dias de casa por unidade (só quem tem admissão)."""
+    q = (
+        "SELECT unidade, avg(current_date - admissao)::float AS tenure_days FROM colaboradores"
+        + _where(where, "admissao IS NOT NULL")
+        + " GROUP BY unidade ORDER BY unidade"
+    )
+    return q, list(params)
+
+
+def mais_antigos_sql(where="", params=(), limite=10):
+    q = (
+        "SELECT id, nome, unidade, current_date - admissao AS tenure_days, admissao AS admissao_parsed"
+        " FROM colaboradores"
+        + _where(where, "admissao IS NOT NULL")
+        + " ORDER BY admissao, id LIMIT %s"
+    )
+    return q, list(params) + [limite]
+
+
+def novatos_sql(where="", params=(), dias=90):
+    q = (
+        "SELECT id, nome, unidade, current_date - admissao AS tenure_days, admissao AS admissao_parsed"
+        " FROM colaboradores"
+        + _where(where, "admissao > current_date - %s")
+        + " ORDER BY admissao DESC, id"
+    )
+    return q, list(params) + [dias]
+
+
+def folha_por_unidade_sql(where="", params=()):
+    q = (
+        "SELECT unidade, (COALESCE(sum(salario_cents), 0) / 100.0)::float AS folha_total FROM colaboradores"
+        + _where(where)
+        + " GROUP BY unidade ORDER BY folha_total DESC"
+    )
+    return q, list(params)
+
+
+def comparativo_sql(where="", params=()):
+    """Total, ativos, média salarial, folha, saídas nos últimos 12 meses e turnover por unidade."""
+    q = (
+        'SELECT unidade, "Total", "Ativos", "Media_Salarial", "Folha", saidas_12m,'
+        '       CASE WHEN "Total" > 0 THEN round(saidas_12m::numeric / "Total", 3) ELSE 0 END::float AS "Turnover"'
+        " FROM ("
+        "   SELECT COALESCE(unidade, '(Sem Unidade)') AS unidade,"
+        '          count(*) AS "Total",'
+        '          count(*) FILTER (WHERE ativo = 1) AS "Ativos",'
+        '          round(avg(COALESCE(salario_cents, 0)) / 100.0, 2)::float AS "Media_Salarial",'
+        '          (COALESCE(sum(salario_cents), 0) / 100.0)::float AS "Folha",'
+        "          count(*) FILTER (WHERE saida >= current_date - 365) AS saidas_12m"
+        "   FROM colaboradores"
+        + _where(where)
+        + "   GROUP BY 1"
+        " ) AS s ORDER BY unidade"
+    )
+    return q, list(params)
+
+
+# (título, colunas extras exibidas). O alerta i é o bit 1 << i de colaboradores.qualidade,
+# coluna que o banco calcula a cada escrita (migração 8) e que tem índice parcial (qualidade <> 0).
+_ALERTAS = [
+    ("Nascimento/Admissão sem data", ["nascimento", "admissao"]),
+    ("Salário zerado", ["salario_reais"]),
+    ("Faltando CPF/RG/Emissão", ["cpf", "rg_outro", "emissao"]),
+    ("Telefone inválido", ["telefone"]),
+    ("Inativo sem data de saída", ["saida"]),
+    ("Conta de depósito vazia", ["conta_deposito"]),
+    ("Faltando dados sociais", ["estado_civil", "escolaridade", "naturalidade"]),
+    ("Endereço incompleto", ["cep", "bairro", "endereco"]),
+]
+# (título, condição SQL, colunas extras exibidas)
+ALERTAS = [(titulo, f"qualidade & {1 << i} <> 0", extras) for i, (titulo, extras) in enumerate(_ALERTAS)]
+
+
+def alerta_contagens_sql(where="", params=()):
+    """Uma linha com a contagem de cada alerta (colunas a0, a1, …), lida só do índice de qualidade."""
+    contagens = ", ".join(f"count(*) FILTER (WHERE {cond}) AS a{i}" for i, (_, cond, _) in enumerate(ALERTAS))
+    return f"SELECT {contagens} FROM colaboradores" + _where(where, "qualidade <> 0"), list(params)
+
+
+# colunas extras dos alertas que não existem na tabela: nome → expressão SQL
+COLUNAS_CALCULADAS = {"salario_reais": "salario_cents / 100.0 AS salario_reais"}
+
+
+def alerta_linhas_sql(i, where="", params=(), limite=200):
+    _, cond, extras = ALERTAS[i]
+    cols = ", ".join(["id", "nome", "unidade"] + [COLUNAS_CALCULADAS.get(c, c) for c in extras])
+    q = f"SELECT {cols} FROM colaboradores" + _where(where, "qualidade <> 0", cond) + " ORDER BY nome, id LIMIT %s"
+    return q, list(params) + [limite]
+
+
+def exportacao_sql(where="", params=()):
+    return "SELECT * FROM colaboradores" + _where(where) + " ORDER BY nome, id", list(params)
@@ -0,0 +1,252 @@
+"""
+Arquivo de remessa dos depósitos da folha de um mês: CNAB 240 (crédito em
+conta, layout FEBRABAN de pagamento de salários) ou lote PIX em CSV (chave
+CPF).
+
+Entram os lançamentos aprovados: valor_depositado_cents > 0 e ainda sem
+remessa (remessa_id nulo). As linhas vêm de um cursor nomeado, em blocos
+de `bloco`, com FOR UPDATE: duas remessas simultâneas do mesmo mês não
+pegam o mesmo lançamento. Cada bloco tem CPF/conta validados numa passada
+vetorizada; os válidos vão direto para `destino` e os inválidos ficam de
+fora, listados no retorno. No fim, um único UPDATE grava o id da remessa
+(tabela remessas, migração 12) nos lançamentos do arquivo, na mesma
+transação da leitura.
+"""
+import os
+import unicodedata
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from gestao_colab import importacao
+
+FORMATOS = {"pix": "Lote PIX (CSV, chave CPF)", "cnab240": "CNAB 240 (crédito em conta)"}
+EXTENSOES = {"pix": "csv", "cnab240": "rem"}
+COLUNAS = ["id", "colaborador_nome", "cpf", "conta_deposito", "valor_depositado_cents", "data_pagamento"]
+# "agência conta-dv", ex: "6690 617053-3" ou "0001/12345-X"
+CONTA_RE = r"^\s*(\d{1,5})[\s/.\-]+(\d{1,12})-?([0-9Xx])\s*$"
+
+# dados da empresa pagadora (cabeçalhos do CNAB), das variáveis de ambiente REMESSA_*
+_EMPRESA = ["banco", "cnpj", "convenio", "agencia", "conta", "nome"]
+
+
+def empresa_do_ambiente():
+    """{banco, cnpj, convenio, agencia, conta, nome} de REMESSA_BANCO, REMESSA_CNPJ, …"""
+    return {campo: os.environ.get(f"REMESSA_{campo.upper()}", "") for campo in _EMPRESA}
+
+
+# --------------------------
+# Validação (vetorizada)
+# --------------------------
+def validar(df, formato):
+    """
+    (cpf só dígitos, agência, conta, dv, motivo) para um bloco de linhas;
+    `motivo` é "" nas válidas. PIX só precisa do CPF; CNAB também da conta.
+    """
+    cpfs, cpf_ok = importacao.cpf_valido(df["cpf"].fillna("").astype(str))
+    conta = df["conta_deposito"].fillna("").astype(str).str.extract(CONTA_RE)
+    motivo = np.where(cpf_ok.to_numpy(), "", "CPF inválido").astype(object)
+    if formato == "cnab240":
+        sem_conta = conta[0].isna().to_numpy()
+        motivo = np.where(sem_conta & (motivo == ""), "conta de depósito inválida (use agência conta-dv)", motivo)
+    return cpfs, conta[0], conta[1], conta[2].str.upper(), pd.Series(motivo, index=df.index)
+
+
+# --------------------------
+# CNAB 240
+# --------------------------
+def _a(valor, n):
+    """Campo alfanumérico: maiúsculas sem acento, alinhado à esquerda, com brancos."""
+    texto = unicodedata.normalize("NFKD", str(valor or "")).encode("ascii", "ignore").decode().upper()
+    return texto[:n].ljust(n)
+
+
+def _n(valor, n):
+    """Campo numérico: só dígitos, zeros à esquerda."""
+    digitos = "".join(c for c in str(valor or "") if c.isdigit())
+    return digitos[-n:].rjust(n, "0")
+
+
+def _datas(df, data_padrao, formato):
+    """data_pagamento de cada linha formatada (sem data → data_padrao)."""
+    return pd.to_datetime(df["data_pagamento"].fillna(data_padrao)).dt.strftime(formato)
+
+
+def _registro(*campos):
+    linha = "".join(campos)
+    if len(linha) != 240:
+        # tipo do registro: posição 8 (0 header, 1 header de lote, 3 detalhe, 5 trailer de lote, 9 trailer)
+        raise ValueError(f"CNAB 240: registro tipo {linha[7:8]!r} com {len(linha)} posições (esperado 240)")
+    return linha + "\r\n"
+
+
+class _Cnab240:
+    """Um lote de crédito em conta (serviço 30 - salários, câmara 000: favorecido no mesmo banco)."""
+
+    def __init__(self, destino, empresa, remessa, agora):
+        self.destino = destino
+        self.e = empresa
+        self.remessa = remessa
+        self.agora = agora
+        self.detalhes = 0
+        self.total_cents = 0
+
+    def _escrever(self, texto):
+        self.destino.write(texto.encode("ascii"))
+
+    def _conta_empresa(self):
+        # CNPJ, convênio, agência + DV (branco), conta + DV, DV agência/conta (branco)
+        conta = _n(self.e["conta"], 13)
+        return _n(self.e["cnpj"], 14) + _a(self.e["convenio"], 20) + _n(self.e["agencia"], 5) + " " + conta + " "
+
+    def inicio(self):
+        e, agora = self.e, self.agora
+        self._escrever(_registro(
+            _n(e["banco"], 3), "0000", "0", " " * 9, "2", self._conta_empresa(), _a(e["nome"], 30), " " * 30,
+            " " * 10, "1", agora.strftime("%d%m%Y"), agora.strftime("%H%M%S"), _n(self.remessa, 6), "089",
+            "00000", " " * 20, " " * 20, " " * 29,
+        ))
+        self._escrever(_registro(
+            _n(e["banco"], 3), "0001", "1", "C", "30", "01", "045", " ", "2", self._conta_empresa(), _a(e["nome"], 30),
+            " " * 40, " " * 30, "0" * 5, " " * 15, " " * 20, "0" * 5, "0" * 3, "  ", "  ", " " * 6, " " * 10,
+        ))
+
+    def linhas(self, df, data_padrao):
+        banco = _n(self.e["banco"], 3)
+        datas = _datas(df, data_padrao, "%d%m%Y")
+        for r, data in zip(df.itertuples(index=False), datas):
+            self.detalhes += 1
+            self.total_cents += r.valor_depositado_cents
+            valor = _n(r.valor_depositado_cents, 15)
+            self._escrever(_registro(
+                banco, "0001", "3", _n(2 * self.detalhes - 1, 5), "A", "0", "00", "000", banco,
+                _n(r.agencia, 5), " ", _n(r.conta, 12), _a(r.dv, 1), " ", _a(r.colaborador_nome, 30),
+                _a(r.id, 20), data, "BRL", "0" * 15, valor, " " * 20, "0" * 8, "0" * 15, " " * 40,
+                "  ", " " * 5, "  ", " " * 3, "0", " " * 10,
+            ))
+            self._escrever(_registro(
+                banco, "0001", "3", _n(2 * self.detalhes, 5), "B", " " * 3, "1", _n(r.cpf_digitos, 14),
+                " " * 30, "0" * 5, " " * 15, " " * 15, " " * 20, "0" * 5, "0" * 3, "  ", data, valor,
+                "0" * 15 * 4, " " * 15, "0", " " * 6, " " * 8,
+            ))
+
+    def fim(self):
+        banco = _n(self.e["banco"], 3)
+        registros_lote = 2 * self.detalhes + 2
+        self._escrever(_registro(
+            banco, "0001", "5", " " * 9, _n(registros_lote, 6), _n(self.total_cents, 18), "0" * 18, "0" * 6,
+            " " * 165, " " * 10,
+        ))
+        self._escrever(_registro(
+            banco, "9999", "9", " " * 9, _n(1, 6), _n(registros_lote + 2, 6), "0" * 6, " " * 205,
+        ))
+
+
+class _Pix:
+    """CSV com um pagamento por linha (chave PIX = CPF)."""
+
+    CABECALHO = "identificador;nome;tipo_chave;chave;valor;data_pagamento\r\n"
+
+    def __init__(self, destino, remessa):
+        self.destino = destino
+        self.remessa = remessa
+
+    def inicio(self):
+        self.destino.write(self.CABECALHO.encode("utf-8"))
+
+    def linhas(self, df, data_padrao):
+        datas = _datas(df, data_padrao, "%Y-%m-%d")
+        valor = df["valor_depositado_cents"]
+        texto = pd.DataFrame({
+            "identificador": f"R{self.remessa}-" + df["id"].astype(str),
+            "nome": df["colaborador_nome"].fillna("").str.replace(";", ",", regex=False),
+            "tipo_chave": "CPF",
+            "chave": df["cpf_digitos"],
+            "valor": (valor // 100).astype(str) + "." + (valor % 100).astype(str).str.zfill(2),
+            "data_pagamento": datas,
+        }).to_csv(sep=";", header=False, index=False, lineterminator="\r\n")
+        self.destino.write(texto.encode("utf-8"))
+
+    def fim(self):
+        pass
+
+
+# --------------------------
+# Geração
+# --------------------------
+def gerar(pool, destino, mes_ref, formato="pix", unidade=None, empresa=None, data_pagamento=None, bloco=2000):
+    """
+    Grava em `destino` (arquivo binário) a remessa dos lançamentos aprovados
+    de `mes_ref` (e `unidade`) e marca esses lançamentos com o id da remessa.
+    Sem nenhum lançamento válido nada é escrito em `destino`.
+    `data_pagamento` vale para lançamentos sem data (padrão: hoje). Retorna
+    {"remessa": id ou None se nada entrou, "lancamentos", "total_cents",
+    "invalidos": DataFrame (id, colaborador_nome, motivo)}.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"formato desconhecido: {formato!r} (use {', '.join(FORMATOS)})")
+    empresa = empresa or empresa_do_ambiente()
+    if formato == "cnab240" and (not _n(empresa["banco"], 3).strip("0") or len(_n(empresa["cnpj"], 20).lstrip("0")) < 9):
+        raise ValueError("CNAB 240: defina banco e CNPJ da empresa (REMESSA_BANCO, REMESSA_CNPJ)")
+    data_padrao = data_pagamento or date.today()
+    where, params = "mes_referencia = %s AND valor_depositado_cents > 0 AND remessa_id IS NULL", [mes_ref]
+    if unidade is not None:
+        where += " AND unidade = %s"
+        params.append(unidade)
+
+    ids, invalidos, total_cents = [], [], 0
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO remessas (mes_referencia, unidade, formato) VALUES (%s, %s, %s) RETURNING id",
+                (mes_ref, unidade, formato),
+            )
+            remessa = cur.fetchone()[0]
+        if formato == "cnab240":
+            arquivo = _Cnab240(destino, empresa, remessa, datetime.now())
+        else:
+            arquivo = _Pix(destino, remessa)
+        # header só com o primeiro lançamento válido: se nada entrar, `destino` fica vazio
+        iniciado = False
+        with conn.cursor(name="gerar_remessa") as cur:
+            cur.itersize = bloco
+            cur.execute(
+                "SELECT " + ", ".join(COLUNAS) + " FROM folha_pagamento WHERE " + where
+                + " ORDER BY colaborador_nome, id FOR UPDATE", params,
+            )
+            while True:
+                linhas = cur.fetchmany(bloco)
+                if not linhas:
+                    break
+                df = pd.DataFrame(linhas, columns=COLUNAS)
+                cpfs, agencia, conta, dv, motivo = validar(df, formato)
+                ok = motivo.eq("")
+                if not ok.all():
+                    invalidos.append(df.loc[~ok, ["id", "colaborador_nome"]].assign(motivo=motivo[~ok]))
+                validos = df[ok].assign(cpf_digitos=cpfs[ok], agencia=agencia[ok], conta=conta[ok], dv=dv[ok])
+                if validos.empty:
+                    continue
+                if not iniciado:
+                    arquivo.inicio()
+                    iniciado = True
+                arquivo.linhas(validos, data_padrao)
+                ids.append(validos["id"].to_numpy())
+                total_cents += int(validos["valor_depositado_cents"].sum())
+        if iniciado:
+            arquivo.fim()
+        ids = np.concatenate(ids).tolist() if ids else []
+        with conn.cursor() as cur:
+            if ids:
+                cur.execute(
+                    "UPDATE folha_pagamento SET remessa_id = %s WHERE mes_referencia = %s AND id = ANY(%s)",
+                    (remessa, mes_ref, ids),
+                )
+                cur.execute("UPDATE remessas SET lancamentos = %s, total_cents = %s WHERE id = %s",
+                            (len(ids), total_cents, remessa))
+            else:
+                conn.rollback()
+                remessa = None
+    invalidos = (pd.concat(invalidos, ignore_index=True) if invalidos
+                 else pd.DataFrame(columns=["id", "colaborador_nome", "motivo"]))
+    return {"remessa": remessa, "lancamentos": len(ids), "total_cents": total_cents, "invalidos": invalidos}
@@ -0,0 +1,128 @@
+"""
+Resumo mensal por unidade (tabela resumo_mensal).
+
+Guarda, para cada (unidade, mes_referencia), os totais da folha e a
+movimentação de pessoal. É mantido de forma incremental: cada escrita chama
+`atualizar` só com as unidades/meses que tocou, dentro da mesma transação,
+e apenas esses grupos são recalculados. Meses com a partição da folha
+arquivada (gestao_colab.particoes) ficam como estão: os lançamentos deles
+não estão mais em folha_pagamento.
+"""
+
+SEM_UNIDADE = "(Sem Unidade)"
+
+# grupos que ficaram sem dados somem; os demais são regravados pelo INSERT abaixo
+_APAGAR = """
+DELETE FROM resumo_mensal
+WHERE (%(unidades)s::text[] IS NULL OR unidade = ANY(%(unidades)s::text[]))
+  AND (%(meses)s::date[] IS NULL OR mes_referencia = ANY(%(meses)s::date[]))
+  AND mes_referencia <> ALL(%(arquivados)s::date[])
+"""
+
+_RECALCULO = """
+WITH alvo_folha AS (
+    SELECT COALESCE(unidade, %(sem)s) AS unidade, mes_referencia,
+           count(*) AS lancamentos,
+           count(DISTINCT colaborador_id) AS headcount,
+           COALESCE(sum(salario_base_cents), 0) AS salario_base_cents,
+           COALESCE(sum(valor_depositado_cents), 0) AS depositado_cents,
+           COALESCE(sum(horas_extras_cents), 0) AS horas_extras_cents,
+           COALESCE(sum(bonus_cents), 0) AS bonus_cents,
+           COALESCE(sum(descontos_cents), 0) AS descontos_cents
+    FROM folha_pagamento
+    WHERE (%(unidades)s::text[] IS NULL OR COALESCE(unidade, %(sem)s) = ANY(%(unidades)s::text[]))
+      AND (%(meses)s::date[] IS NULL OR mes_referencia = ANY(%(meses)s::date[]))
+    GROUP BY 1, 2
+), movimentos AS (
+    SELECT COALESCE(unidade, %(sem)s) AS unidade, date_trunc('month', admissao)::date AS mes, 1 AS adm, 0 AS sai
+    FROM colaboradores WHERE admissao IS NOT NULL
+    UNION ALL
+    SELECT COALESCE(unidade, %(sem)s), date_trunc('month', saida)::date, 0, 1
+    FROM colaboradores WHERE saida IS NOT NULL
+), alvo_mov AS (
+    SELECT unidade, mes AS mes_referencia, sum(adm) AS admissoes, sum(sai) AS saidas
+    FROM movimentos
+    WHERE (%(unidades)s::text[] IS NULL OR unidade = ANY(%(unidades)s::text[]))
+      AND (%(meses)s::date[] IS NULL OR mes = ANY(%(meses)s::date[]))
+      AND mes <> ALL(%(arquivados)s::date[])
+    GROUP BY 1, 2
+)
+INSERT INTO resumo_mensal (
+    unidade, mes_referencia, lancamentos, headcount, salario_base_cents, depositado_cents,
+    horas_extras_cents, bonus_cents, descontos_cents, admissoes, saidas, atualizado_em
+)
+SELECT COALESCE(f.unidade, m.unidade), COALESCE(f.mes_referencia, m.mes_referencia),
+       COALESCE(f.lancamentos, 0), COALESCE(f.headcount, 0),
+       COALESCE(f.salario_base_cents, 0), COALESCE(f.depositado_cents, 0),
+       COALESCE(f.horas_extras_cents, 0), COALESCE(f.bonus_cents, 0), COALESCE(f.descontos_cents, 0),
+       COALESCE(m.admissoes, 0), COALESCE(m.saidas, 0), now()
+FROM alvo_folha f
+FULL OUTER JOIN alvo_mov m ON m.unidade = f.unidade AND m.mes_referencia = f.mes_referencia
+ON CONFLICT (unidade, mes_referencia) DO UPDATE SET
+    lancamentos = EXCLUDED.lancamentos,
+    headcount = EXCLUDED.headcount,
+    salario_base_cents = EXCLUDED.salario_base_cents,
+    depositado_cents = EXCLUDED.depositado_cents,
+    horas_extras_cents = EXCLUDED.horas_extras_cents,
+    bonus_cents = EXCLUDED.bonus_cents,
+    descontos_cents = EXCLUDED.descontos_cents,
+    admissoes = EXCLUDED.admissoes,
+    saidas = EXCLUDED.saidas,
+    atualizado_em = EXCLUDED.atualizado_em
+"""
+
+
+def mes_de(d):
+    return None if d is None else d.replace(day=1)
+
+
+def _arquivados(cur):
+    # folha_arquivo só existe a partir da migração 11 (a 6 já chama atualizar)
+    cur.execute("SELECT to_regclass('folha_arquivo') IS NOT NULL")
+    if not cur.fetchone()[0]:
+        return []
+    cur.execute("SELECT mes_referencia FROM folha_arquivo")
+    return [m for m, in cur.fetchall()]
+
+
+def atualizar(cur, unidades=None, meses=None):
+    """
+    Recalcula os grupos (unidade × mês) indicados; None = todos. Unidade
+    nula é guardada como SEM_UNIDADE. Deve rodar na mesma transação da escrita.
+    """
+    if unidades is not None:
+        unidades = sorted({u if u is not None else SEM_UNIDADE for u in unidades})
+    if meses is not None:
+        meses = sorted({mes_de(m) for m in meses if m is not None})
+        if not meses:
+            return
+    params = {"unidades": unidades, "meses": meses, "sem": SEM_UNIDADE, "arquivados": _arquivados(cur)}
+    cur.execute(_APAGAR, params)
+    cur.execute(_RECALCULO, params)
+
+
+def movimento_colaborador(*linhas):
+    """
+    Unidades e meses afetados pela mudança de um colaborador, a partir das
+    versões (unidade, admissao, saida) antes/depois. Ex: para passar para
+    `atualizar(cur, *movimento_colaborador(antes, depois))`.
+    """
+    unidades, meses = set(), set()
+    for unidade, admissao, saida in linhas:
+        unidades.add(unidade)
+        meses.update(m for m in (mes_de(admissao), mes_de(saida)) if m is not None)
+    return unidades, meses
+
+
+def tendencia_sql(unidades=None, desde=None):
+    """Série mensal por unidade, lida só de resumo_mensal."""
+    q = (
+        "SELECT unidade, mes_referencia, lancamentos, headcount,"
+        " salario_base_cents / 100.0 AS salario_base, depositado_cents / 100.0 AS depositado,"
+        " horas_extras_cents / 100.0 AS horas_extras, bonus_cents / 100.0 AS bonus,"
+        " descontos_cents / 100.0 AS descontos, admissoes, saidas"
+        " FROM resumo_mensal WHERE (%s::text[] IS NULL OR unidade = ANY(%s::text[]))"
+        " AND (%s::date IS NULL OR mes_referencia >= %s) ORDER BY mes_referencia, unidade"
+    )
+    unidades = list(unidades) if unidades else None
+    return q, [unidades, unidades, desde, desde]
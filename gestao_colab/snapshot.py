@@ -0,0 +1,262 @@
+"""
+Cópia colunar (Arrow) das colunas de colaboradores usadas nas análises da
+página Relatórios.
+
+Em vez de materializar a tabela inteira via pd.read_sql_query (tupla a
+tupla) a cada leitura, o processo guarda um pyarrow.Table com as colunas
+tipadas (unidade como dicionário, centavos em int32) e o atualiza de
+forma incremental: só as linhas
+escritas desde a última atualização (coluna versao, migração 10) vêm do
+banco, via COPY em CSV lido pelo leitor do Arrow. A cópia também vai para
+um arquivo Arrow IPC em disco, aberto com memory map no próximo processo
+(sem decodificar nada), que então só busca o que mudou desde então.
+
+Só entram as colunas das análises (nada de CPF, RG, endereço, telefone,
+observações): as linhas dos alertas e a exportação CSV leem o banco. O
+arquivo é gravado com permissão 0600, num diretório só do usuário.
+
+Uso: Snapshot(pool).tabela() devolve a tabela atualizada (no máximo a
+cada `intervalo` segundos); filtrar/para_pandas fazem o resto.
+"""
+import hashlib
+import io
+import logging
+import os
+import stat
+import tempfile
+import threading
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.ipc as ipc
+
+log = logging.getLogger(__name__)
+
+# muda quando o SCHEMA muda: arquivo de outro formato é descartado
+FORMATO = "2"
+
+_DICIONARIO = pa.dictionary(pa.int32(), pa.string())
+
+# colunas das análises (analise.COLUNAS_ANALISE)
+SCHEMA = pa.schema([
+    ("id", pa.int32()),
+    ("nome", pa.string()),
+    ("admissao", pa.date32()),
+    ("saida", pa.date32()),
+    ("ativo", pa.int8()),
+    ("salario_cents", pa.int32()),
+    ("unidade", _DICIONARIO),
+    ("qualidade", pa.int32()),
+])
+
+# salário nulo vira 0, como nos relatórios (COALESCE) e na exportação
+_SELECT = "SELECT " + ", ".join(
+    "COALESCE(salario_cents, 0) AS salario_cents" if c == "salario_cents" else c for c in SCHEMA.names
+) + " FROM colaboradores"
+
+
+def _copiar(cur, sql, schema):
+    """Resultado de `sql` como pyarrow.Table, via COPY … TO STDOUT em CSV."""
+    buf = io.BytesIO()
+    cur.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER)", buf)
+    buf.seek(0)
+    return pa_csv.read_csv(buf, convert_options=pa_csv.ConvertOptions(
+        column_types=schema,
+        # NULL sai como campo vazio sem aspas; texto vazio sai como ""
+        strings_can_be_null=True,
+        quoted_strings_can_be_null=False,
+    ))
+
+
+def caminho_padrao(dsn):
+    """
+    Arquivo da cópia, um por banco, no diretório SNAPSHOT_DIR ou, sem ele,
+    num diretório 0700 do usuário dentro do temporário. None (cópia só em
+    memória) se esse diretório existir com outro dono ou aberto a outros.
+    """
+    arquivo = f"gestao_colaboradores_{hashlib.md5(dsn.encode()).hexdigest()[:10]}.arrow"
+    pasta = os.environ.get("SNAPSHOT_DIR")
+    if pasta:
+        return os.path.join(pasta, arquivo)
+    # no Windows (sem getuid) o temporário já é por usuário
+    uid = os.getuid() if hasattr(os, "getuid") else None
+    pasta = os.path.join(tempfile.gettempdir(), "gestao_snapshot" if uid is None else f"gestao_snapshot_{uid}")
+    try:
+        os.mkdir(pasta, 0o700)
+    except FileExistsError:
+        pass
+    except OSError as e:
+        log.warning("snapshot só em memória: não foi possível criar %s: %s", pasta, e)
+        return None
+    info = os.lstat(pasta)
+    if not stat.S_ISDIR(info.st_mode) or (uid is not None and (info.st_uid != uid or info.st_mode & 0o077)):
+        log.warning("snapshot só em memória: %s não é um diretório privado deste usuário", pasta)
+        return None
+    # versões anteriores gravavam a tabela inteira direto no temporário, legível por todos
+    try:
+        os.remove(os.path.join(tempfile.gettempdir(), arquivo))
+    except OSError:
+        pass
+    return os.path.join(pasta, arquivo)
+
+
+class Snapshot:
+    """
+    Cópia colunar de colaboradores, por processo e compartilhada entre sessões.
+
+    `marca` é o xmin do snapshot do banco na última leitura: toda transação
+    com txid menor já tinha terminado, então as linhas com versao >= marca
+    cobrem tudo o que pode ter mudado depois, inclusive transações que
+    ainda estavam abertas naquele momento.
+    """
+
+    def __init__(self, pool, caminho=None, intervalo=5.0):
+        self.pool = pool
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._tabela = None
+        self._marca = None
+        self._atualizado = 0.0
+        self.atualizacoes = 0
+        self.completas = 0
+        self.linhas_lidas = 0
+        self.ultima_ms = None
+        if caminho:
+            self._abrir()
+
+    def tabela(self):
+        """A tabela, atualizada se a última atualização tiver mais de `intervalo` segundos."""
+        with self._lock:
+            if self._tabela is None or time.monotonic() - self._atualizado >= self.intervalo:
+                self._atualizar()
+            return self._tabela
+
+    def atualizar(self, completa=False):
+        """Atualiza agora (completa=True relê a tabela inteira)."""
+        with self._lock:
+            if completa:
+                self._tabela = None
+            self._atualizar()
+            return self._tabela
+
+    def stats(self):
+        with self._lock:
+            return {
+                "linhas": None if self._tabela is None else self._tabela.num_rows,
+                "bytes": None if self._tabela is None else self._tabela.nbytes,
+                "marca": self._marca,
+                "atualizacoes": self.atualizacoes,
+                "completas": self.completas,
+                "linhas_lidas": self.linhas_lidas,
+                "ultima_ms": self.ultima_ms,
+                "idade_s": None if not self._atualizado else round(time.monotonic() - self._atualizado, 1),
+            }
+
+    # --------------------------
+    # interno (com o lock)
+    # --------------------------
+    def _atualizar(self):
+        t0 = time.perf_counter()
+        with self.pool.cursor() as cur:
+            # um snapshot só para a marca, as linhas novas e a contagem
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+            cur.execute("SELECT txid_snapshot_xmin(txid_current_snapshot()), (SELECT count(*) FROM colaboradores)")
+            marca, total = cur.fetchone()
+            if self._tabela is None or self._marca is None or marca < self._marca:
+                # marca menor que a guardada: banco restaurado ou trocado
+                tabela = _copiar(cur, _SELECT, SCHEMA)
+                lidas = tabela.num_rows
+                self.completas += 1
+            else:
+                novas = _copiar(cur, f"{_SELECT} WHERE versao >= {int(self._marca)}", SCHEMA)
+                lidas = novas.num_rows
+                tabela = self._tabela
+                if novas.num_rows:
+                    tabela = tabela.filter(pc.invert(pc.is_in(tabela["id"], value_set=novas["id"])))
+                if tabela.num_rows + novas.num_rows != total:
+                    # houve exclusões: fica só quem ainda existe
+                    ids = _copiar(cur, "SELECT id FROM colaboradores", pa.schema([("id", pa.int32())]))["id"]
+                    tabela = tabela.filter(pc.is_in(tabela["id"], value_set=ids))
+                if novas.num_rows:
+                    tabela = pa.concat_tables([tabela, novas])
+            mudou = tabela is not self._tabela
+        if mudou:
+            # um pedaço por coluna e dicionários únicos: filtros e to_pandas sem concatenar de novo
+            tabela = tabela.unify_dictionaries().combine_chunks()
+        self._tabela = tabela
+        self._marca = marca
+        self._atualizado = time.monotonic()
+        self.atualizacoes += 1
+        self.linhas_lidas += lidas
+        self.ultima_ms = round((time.perf_counter() - t0) * 1000, 1)
+        if mudou and self.caminho:
+            self._gravar()
+        log.debug("snapshot de colaboradores: %d linhas lidas, %d no total, %.0f ms", lidas, tabela.num_rows, self.ultima_ms)
+
+    def _abrir(self):
+        """Carrega a cópia gravada por um processo anterior (memory map, sem cópia)."""
+        try:
+            tabela = ipc.open_file(pa.memory_map(self.caminho, "r")).read_all()
+        except (OSError, pa.ArrowInvalid):
+            return
+        meta = tabela.schema.metadata or {}
+        if meta.get(b"formato") != FORMATO.encode() or tabela.schema.remove_metadata() != SCHEMA:
+            return
+        self._tabela = tabela.replace_schema_metadata(None)
+        self._marca = int(meta[b"marca"])
+
+    def _gravar(self):
+        tabela = self._tabela.replace_schema_metadata({"formato": FORMATO, "marca": str(self._marca)})
+        tmp = f"{self.caminho}.{os.getpid()}.tmp"
+        try:
+            # 0600 desde a criação, qualquer que seja o umask do processo
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            if hasattr(os, "fchmod"):
+                os.fchmod(fd, 0o600)
+            with open(fd, "wb") as f, ipc.new_file(f, tabela.schema) as escritor:
+                escritor.write_table(tabela)
+            os.replace(tmp, self.caminho)
+        except OSError as e:
+            log.warning("não foi possível gravar o snapshot em %s: %s", self.caminho, e)
+
+
+def filtrar(tabela, unidades=None, status="Todos"):
+    """Mesmos filtros de colaboradores.filtros_sql, aplicados à tabela Arrow."""
+    condicoes = []
+    if unidades:
+        condicoes.append(_no_dicionario(tabela["unidade"], pa.array(list(unidades), pa.string())))
+    if status in ("Ativos", "Inativos"):
+        condicoes.append(pc.equal(tabela["ativo"], 1 if status == "Ativos" else 0))
+    if not condicoes:
+        return tabela
+    mascara = condicoes[0]
+    for cond in condicoes[1:]:
+        mascara = pc.and_(mascara, cond)
+    return tabela.filter(mascara)
+
+
+def _no_dicionario(coluna, valores):
+    """is_in de uma coluna dicionário testando só o dicionário (poucos valores), não cada linha."""
+    return pa.chunked_array([
+        pc.fill_null(pc.take(pc.is_in(pedaco.dictionary, value_set=valores), pedaco.indices), False)
+        for pedaco in coluna.chunks
+    ], pa.bool_())
+
+
+def unidades(tabela):
+    """Unidades distintas (sem nulo), em ordem."""
+    return sorted(pc.unique(tabela["unidade"]).drop_null().to_pylist())
+
+
+def para_pandas(tabela, colunas=None, datas_como_objeto=False):
+    """
+    DataFrame com `colunas` (todas se None). Dicionários viram category e
+    colunas numéricas sem nulos são convertidas sem cópia; datas viram
+    datetime64, a não ser com datas_como_objeto=True (date, como no banco).
+    """
+    if colunas is not None:
+        tabela = tabela.select(colunas)
+    return tabela.to_pandas(split_blocks=True, date_as_object=datas_como_objeto)
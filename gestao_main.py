@@ -1,105 +1,105 @@
+import time
+_inicio_script = time.perf_counter()
+
+from gestao_colab import arranque  # primeiro: marca o início do processo
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import re
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
 import os
-import psycopg2
-import io
+import tempfile
 
-# pega do secrets
-DATABASE_URL = st.secrets["ConnectDB"]
+from gestao_colab import cache, colaboradores, db, dinheiro, folha, instrumentacao, migrations, notify, particoes, relatorios, resumos
 
-# conectar
-conn = psycopg2.connect(DATABASE_URL)
-cursor = conn.cursor()
+# plotly (Relatórios), openpyxl (exportação), importacao e indices são
+# importados só na página que usa, via medidas.importar
+_imports_ms = (time.perf_counter() - _inicio_script) * 1000
 
-# remover aspas se tiver
-DATABASE_URL = DATABASE_URL.strip().strip('"').strip("'")
+# pega do secrets (remover aspas se tiver)
+DATABASE_URL = st.secrets["ConnectDB"].strip().strip('"').strip("'")
 
-st.success("Conectado ao PostgreSQL via Tailscale!")
 
-# --- Criar tabela (caso não exista) ---
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS colaboradores (
-    id SERIAL PRIMARY KEY,
-    nome TEXT,
-    conta_deposito TEXT,
-    nascimento DATE,
-    cpf TEXT,
-    rg_outro TEXT,
-    orgao_emissor TEXT,
-    emissao DATE,
-    admissao DATE,
-    saida DATE,
-    ativo INTEGER,
-    funcao TEXT,
-    salario_cents INTEGER,
-    estado_civil TEXT,
-    escolaridade TEXT,
-    nacionalidade TEXT,
-    naturalidade TEXT,
-    cep TEXT,
-    bairro TEXT,
-    endereco TEXT,
-    telefone TEXT,
-    unidade TEXT,
-    observacoes TEXT
-)
-""")
-conn.commit()
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS folha_pagamento (
-    id SERIAL PRIMARY KEY,
-    colaborador_id INTEGER,
-    colaborador_nome TEXT,
-    cpf TEXT,
-    unidade TEXT,
-    mes_referencia DATE,
-    salario_base_cents INTEGER,
-    valor_depositado_cents INTEGER,
-    conta_deposito TEXT,
-    data_pagamento DATE,
-    observacoes TEXT,
-    horas_extras_cents INTEGER,
-    bonus_cents INTEGER,
-    descontos_cents INTEGER
-)""")
-conn.commit()
+# --- Medidas de arranque a frio: uma por processo ---
+@st.cache_resource
+def get_arranque():
+    return arranque.Arranque()
 
-# --------------------------
-# Funções utilitárias
-# --------------------------
-def cents_to_real(cents: int) -> str:
-    """
-    Converte um valor em centavos (inteiro) para string em reais no formato brasileiro.
-    Ex: 12345 → "123,45"
-    """
-    if cents is None:
-        return "0,00"
-    return f"{cents/100:.2f}".replace(".", ",")
+medidas = get_arranque()
+medidas.registrar_import("topo do gestao_main", _imports_ms)
 
-def real_to_cents(valor: str) -> int:
-    """
-    Converte um valor em reais (string) no formato brasileiro para centavos (inteiro).
-    Ex: "123,45" → 12345
-    """
-    if not valor:
-        return 0
 
-    # Remove espaços e símbolos
-    valor = valor.strip().replace("R$", "").replace(" ", "")
+# --- Pool de conexões: um por processo, compartilhado entre sessões e reruns ---
+@st.cache_resource
+def get_pool():
+    return db.Pool(
+        DATABASE_URL,
+        minconn=int(os.environ.get("DB_POOL_MIN", 1)),
+        maxconn=int(os.environ.get("DB_POOL_MAX", 10)),
+        timeout=float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+        cursor_factory=instrumentacao.CursorMedido,  # mede cada execute
+    )
 
-    # Troca vírgula por ponto
-    valor = valor.replace(",", ".")
+pool = get_pool()
 
-    try:
-        return int(float(valor) * 100)
-    except ValueError:
-        return 0
 
+# --- Esquema: migrações pendentes rodam uma vez por processo, não a cada rerun ---
+# (e as partições da folha dos próximos meses; as escritas criam as que faltarem)
+@st.cache_resource
+def init_schema():
+    aplicadas = migrations.migrate(pool)
+    particoes.criar_a_frente(pool)
+    return aplicadas
+
+init_schema()
+
+
+# --- Cache de leituras: por processo, invalidado pelas escritas ---
+@st.cache_resource
+def get_cache():
+    return cache.QueryCache(
+        maxsize=int(os.environ.get("QUERY_CACHE_MAX", 256)),
+        ttl=float(os.environ.get("QUERY_CACHE_TTL", 300)),
+    )
+
+query_cache = get_cache()
 
+
+# --- Escritas feitas por outros processos chegam por LISTEN/NOTIFY ---
+@st.cache_resource
+def start_cache_listener():
+    listener = notify.Listener(DATABASE_URL, query_cache)
+    listener.start()
+    return listener
+
+cache_listener = start_cache_listener()
+
+# --- Cópia colunar de colaboradores (Relatórios e exportação CSV), atualizada por diferença ---
+@st.cache_resource
+def get_snapshot():
+    snapshot = medidas.importar("gestao_colab.snapshot")
+    return snapshot.Snapshot(
+        pool,
+        snapshot.caminho_padrao(DATABASE_URL),
+        intervalo=float(os.environ.get("SNAPSHOT_INTERVALO", 5)),
+    )
+
+# --- Holerites em lote: renderizados no próprio processo; HOLERITES_PROCESSOS > 1 liga um
+# conjunto de processos (sobe no primeiro uso), um por processo do app ---
+HOLERITES_PROCESSOS = int(os.environ.get("HOLERITES_PROCESSOS", 1))
+
+@st.cache_resource
+def get_holerites_executor():
+    return medidas.importar("gestao_colab.holerites").novo_executor(HOLERITES_PROCESSOS)
+
+st.success("Conectado ao PostgreSQL via Tailscale!")
+
+# --- Instrumentação: tempo de SQL e das seções (painel com ?admin=1 ou GESTAO_ADMIN=1) ---
+metricas = instrumentacao.METRICAS
+METRICAS_PROM_ARQUIVO = os.environ.get("METRICAS_PROM_ARQUIVO")
+MODO_ADMIN = os.environ.get("GESTAO_ADMIN") == "1" or st.query_params.get("admin") == "1"
+
+# --------------------------
+# Funções utilitárias
+# --------------------------
 def to_date_or_none(s):
     try:
         if not s or str(s).strip() == "":
@@ -118,30 +118,145 @@ def safe_parse_date(s):
         return None
 
 
-def read_df(where_clause=None, params=None):
-    q = "SELECT * FROM colaboradores"
-    if where_clause:
-        q += " WHERE " + where_clause
-    # pandas will use the DBAPI connection
-    df = pd.read_sql_query(q, conn, params=params or [])
-    if df.empty:
+def query_df(q, params=None):
+    # pandas will use the DBAPI connection (emprestada do pool)
+    with pool.connection() as conn, metricas.medir(q, "read_sql_query") as r:
+        df = pd.read_sql_query(q, conn, params=params or [])
+        r["linhas"] = len(df)
         return df
-    df["ativo"] = df["ativo"].fillna(0).astype(int)
-    df["salario_cents"] = df["salario_cents"].fillna(0).astype(int)
-    df["salario_reais"] = df["salario_cents"] / 100
-    return df
+
+
+def cached_df(q, params=None, table="colaboradores", ids=None, unidades=None, meses=None, prepare=None):
+    """
+    Como query_df, mas passando pelo cache de consultas. `ids`, `unidades` e
+    `meses` descrevem o que o resultado cobre (None = tudo), para que a
+    invalidação descarte só o necessário. Devolve uma cópia: quem chama pode
+    alterar o DataFrame à vontade.
+    """
+    params = tuple(params or ())
+    def load():
+        df = query_df(q, params)
+        return prepare(df) if prepare else df
+    df = query_cache.get_or_load((q, params), load, table, ids=ids, unidades=unidades, meses=meses)
+    return df.copy()
+
+
+def read_grade_folha(mes_ref, unidade=None):
+    """Lançamentos do mês já com as colunas da grade da Folha (valores em reais)."""
+    def grade(df):
+        return pd.DataFrame({
+            "selecionar": False,
+            "id": df["id"],
+            "colaborador_nome": df["colaborador_nome"],
+            "cpf": df["cpf"],
+            "salario_base": dinheiro.cents_to_reais(df["salario_base_cents"]),
+            "valor_depositado": dinheiro.cents_to_reais(df["valor_depositado_cents"]),
+            "conta_deposito": df["conta_deposito"],
+            "data_pagamento": df["data_pagamento"],
+            "observacoes": df["observacoes"],
+            "remessa_id": df["remessa_id"],
+            "colaborador_id": df["colaborador_id"],  # para a busca; sai antes de mostrar
+        })
+    q = ("SELECT id, colaborador_id, colaborador_nome, cpf, salario_base_cents, valor_depositado_cents, "
+         "conta_deposito, data_pagamento, observacoes, remessa_id FROM folha_pagamento WHERE mes_referencia = %s")
+    if unidade is None:
+        return cached_df(q + " ORDER BY colaborador_nome", (mes_ref,), "folha_pagamento", meses=mes_ref, prepare=grade)
+    return cached_df(q + " AND unidade = %s ORDER BY colaborador_nome", (mes_ref, unidade), "folha_pagamento",
+                     unidades=unidade, meses=mes_ref, prepare=grade)
+
+
+def tem_lancamentos(mes_ref, unidade=None):
+    q = "SELECT count(*) AS n FROM folha_pagamento WHERE mes_referencia = %s"
+    if unidade is None:
+        df = cached_df(q, (mes_ref,), "folha_pagamento", meses=mes_ref)
+    else:
+        df = cached_df(q + " AND unidade = %s", (mes_ref, unidade), "folha_pagamento", unidades=unidade, meses=mes_ref)
+    return int(df["n"].iat[0]) > 0
+
+def buscar_colaboradores(termo, limite=20):
+    """
+    Até `limite` colaboradores que casam com `termo` e quantos casam ao todo
+    (a contagem só roda quando o limite é atingido).
+    """
+    # fora do cache de consultas: cada termo digitado seria uma entrada nova
+    # (e empurraria as úteis para fora); com os índices a busca leva milissegundos
+    achados = query_df(*colaboradores.busca_sql(termo, limite + 1))
+    if len(achados) <= limite:
+        return achados, len(achados)
+    total = int(query_df(*colaboradores.busca_contagem_sql(termo))["n"].iat[0])
+    return achados.head(limite), total
+
+
+def avisar_limite(achados, total):
+    if total > len(achados):
+        st.caption(f"Mostrando {len(achados)} de {total} — refine a busca.")
+
+
+def escolher_colaborador(rotulo, chave):
+    """
+    Campo de busca (nome, CPF ou conta) + seletor com os melhores resultados.
+    Devolve (id, nome) do escolhido ou (None, None).
+    """
+    termo = st.text_input("Buscar por nome, CPF ou conta", key=f"{chave}_busca",
+                          placeholder="ex: joao silva, 123.456.789-09")
+    achados, total = buscar_colaboradores(termo)
+    if achados.empty:
+        st.info("Nenhum colaborador encontrado." if termo.strip() else "Nenhum colaborador cadastrado ainda.")
+        return None, None
+    avisar_limite(achados, total)
+    nomes = dict(zip(achados["id"].tolist(), achados["nome"].fillna("")))
+    rotulos = dict(zip(nomes, achados["nome"].fillna("(sem nome)") + " — " + achados["unidade"].fillna("-")
+                       + " — CPF " + achados["cpf"].fillna("-")))
+    colab_id = st.selectbox(rotulo, list(rotulos), format_func=rotulos.get, key=f"{chave}_id")
+    return colab_id, nomes[colab_id]
 
 # --------------------------
 # Constantes
 # --------------------------
-UNIDADES = ["Serrinha", "Anguera", "Coração de Maria", "Ipirá"]
-ESCOLARIDADES = ["E.M. Completo", "E.M. Incompleto", "E.F. Completo", "E.F. Incompleto", "Ensino Superior", "Sem escolaridade"]
-ESTADOS_CIVIS = ["Solteiro(a)", "Casado(a)", "Viúvo(a)", "Divorciado(a)"]
-FUNCOES = ["Alimentador de Linha de Produção", "Auxiliar Administrativo(a)"]
+UNIDADES = colaboradores.UNIDADES
+ESCOLARIDADES = colaboradores.ESCOLARIDADES
+ESTADOS_CIVIS = colaboradores.ESTADOS_CIVIS
+FUNCOES = colaboradores.FUNCOES
+NACIONALIDADES = colaboradores.NACIONALIDADES
 
 # --- Menu lateral ---
 st.sidebar.title("📂 Navegação")
-pagina = st.sidebar.radio("Ir para:", ["Gestão de Colaboradores", "Folha de Pagamento", "Relatórios e Estatísticas"])
+pagina = st.sidebar.radio("Ir para:", ["Gestão de Colaboradores", "Folha de Pagamento", "Relatórios e Estatísticas", "Importação em Lote"])
+
+# SELECT 1 no máximo a cada 30 s por processo, não a cada rerun
+@st.cache_data(ttl=30, show_spinner=False)
+def saude_do_banco():
+    return pool.health_check()
+
+with st.sidebar.expander("🔌 Conexões com o banco"):
+    ok, latencia_ms, erro = saude_do_banco()
+    if ok:
+        st.caption(f"Banco OK — {latencia_ms:.1f} ms")
+    else:
+        st.error(f"Banco indisponível: {erro}")
+    st.json(pool.stats())
+    st.caption("Cache de consultas")
+    st.json({**query_cache.stats(), "listener": cache_listener.stats()})
+    if st.button("Conferir índices (EXPLAIN)"):
+        indices = medidas.importar("gestao_colab.indices")
+        st.dataframe(pd.DataFrame(indices.check_indexes(pool)))
+
+with st.sidebar.expander("⏱️ Arranque"):
+    st.json(medidas.stats())
+
+if MODO_ADMIN:
+    with st.sidebar.expander("🛠️ Desempenho (admin)"):
+        st.caption("Seções das páginas")
+        st.dataframe(pd.DataFrame(metricas.secoes()), hide_index=True)
+        st.caption("Consultas mais custosas (tempo total)")
+        st.dataframe(pd.DataFrame(metricas.consultas()), hide_index=True)
+        st.caption("Cópia colunar (Relatórios)")
+        st.json(get_snapshot().stats())
+        if st.button("Zerar métricas"):
+            metricas.limpar()
+
+secoes = metricas.cronometro(pagina)
+secoes.marcar("barra lateral")
 
 # =========================================================
 # GESTÃO
@@ -200,7 +315,7 @@ if pagina == "Gestão de Colaboradores":
             with col2:
                 escolaridade = st.selectbox("Escolaridade", ESCOLARIDADES, index=None)
             with col3:
-                nacionalidade = st.selectbox("Nacionalidade", ["Brasileiro(a)"], index=None)
+                nacionalidade = st.selectbox("Nacionalidade", NACIONALIDADES, index=None)
 
             col1, col2 = st.columns(2)
             with col1:
@@ -232,21 +347,23 @@ if pagina == "Gestão de Colaboradores":
                     emissao_v = safe_parse_date(emissao)
                     nascimento_v = safe_parse_date(nascimento)
 
-                    cursor.execute("""
-                        INSERT INTO colaboradores (
-                            nome, conta_deposito, nascimento, cpf, rg_outro, orgao_emissor,
-                            emissao, admissao, saida, ativo, funcao, salario_cents,
+                    with pool.cursor() as cursor:
+                        cursor.execute("""
+                            INSERT INTO colaboradores (
+                                nome, conta_deposito, nascimento, cpf, rg_outro, orgao_emissor,
+                                emissao, admissao, saida, ativo, funcao, salario_cents,
+                                estado_civil, escolaridade, nacionalidade, naturalidade,
+                                cep, bairro, endereco, telefone, unidade, observacoes
+                            )
+                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        """, (
+                            nome, conta_deposito, nascimento_v, cpf, rg_outro, orgao_emissor,
+                            emissao_v, admissao_v, saida_v, ativo_val, funcao, salario_cents,
                             estado_civil, escolaridade, nacionalidade, naturalidade,
                             cep, bairro, endereco, telefone, unidade, observacoes
-                        )
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (
-                        nome, conta_deposito, nascimento_v, cpf, rg_outro, orgao_emissor,
-                        emissao_v, admissao_v, saida_v, ativo_val, funcao, salario_cents,
-                        estado_civil, escolaridade, nacionalidade, naturalidade,
-                        cep, bairro, endereco, telefone, unidade, observacoes
-                    ))
-                    conn.commit()
+                        ))
+                        resumos.atualizar(cursor, *resumos.movimento_colaborador((unidade, admissao_v, saida_v)))
+                    query_cache.invalidate("colaboradores", unidades=unidade)
                     st.success(f"✅ Colaborador {nome} adicionado com sucesso!")
 
     # -------------------------
@@ -254,13 +371,9 @@ if pagina == "Gestão de Colaboradores":
     # -------------------------
     elif aba == "✏️ Editar":
         st.subheader("Editar colaborador existente")
-        df_ids = pd.read_sql_query("SELECT id, nome FROM colaboradores ORDER BY nome", conn)
-        if df_ids.empty:
-            st.info("Nenhum colaborador cadastrado ainda.")
-        else:
-            colab_id = st.selectbox("Selecione o colaborador", df_ids["id"],
-                                    format_func=lambda x: df_ids.loc[df_ids["id"] == x, "nome"].values[0])
-            dados = pd.read_sql_query("SELECT * FROM colaboradores WHERE id = %s", conn, params=(colab_id,)).iloc[0]
+        colab_id, _ = escolher_colaborador("Selecione o colaborador", "editar")
+        if colab_id is not None:
+            dados = cached_df("SELECT * FROM colaboradores WHERE id = %s", (colab_id,), ids=colab_id).iloc[0]
 
             with st.form("editar_colab"):
                 col1, col2, col3 = st.columns(3)
@@ -331,7 +444,6 @@ if pagina == "Gestão de Colaboradores":
                     idx_esc = ESCOLARIDADES.index(esc_atual) if esc_atual in ESCOLARIDADES else 0
                     escolaridade = st.selectbox("Escolaridade", ESCOLARIDADES, index=idx_esc)
                 with col3:
-                    NACIONALIDADES = ["Brasileiro(a)"]
                     nac_atual = dados["nacionalidade"]
                     idx_nac = NACIONALIDADES.index(nac_atual) if nac_atual in NACIONALIDADES else 0
                     nacionalidade = st.selectbox("Nacionalidade", NACIONALIDADES, index=idx_nac)
@@ -363,20 +475,25 @@ if pagina == "Gestão de Colaboradores":
                     emissao_v = safe_parse_date(emissao)
                     nascimento_v = safe_parse_date(nascimento)
 
-                    cursor.execute("""
-                        UPDATE colaboradores
-                        SET nome=%s, conta_deposito=%s, nascimento=%s, cpf=%s, rg_outro=%s, orgao_emissor=%s,
-                            emissao=%s, admissao=%s, saida=%s, ativo=%s, funcao=%s, salario_cents=%s,
-                            estado_civil=%s, escolaridade=%s, nacionalidade=%s, naturalidade=%s,
-                            cep=%s, bairro=%s, endereco=%s, telefone=%s, unidade=%s, observacoes=%s
-                        WHERE id=%s
-                    """, (
-                        nome, conta_deposito, nascimento_v, cpf, rg_outro, orgao_emissor,
-                        emissao_v, admissao_v, saida_v, ativo_val, funcao, salario_cents,
-                        estado_civil, escolaridade, nacionalidade, naturalidade,
-                        cep, bairro, endereco, telefone, unidade, observacoes, colab_id
-                    ))
-                    conn.commit()
+                    with pool.cursor() as cursor:
+                        cursor.execute("""
+                            UPDATE colaboradores
+                            SET nome=%s, conta_deposito=%s, nascimento=%s, cpf=%s, rg_outro=%s, orgao_emissor=%s,
+                                emissao=%s, admissao=%s, saida=%s, ativo=%s, funcao=%s, salario_cents=%s,
+                                estado_civil=%s, escolaridade=%s, nacionalidade=%s, naturalidade=%s,
+                                cep=%s, bairro=%s, endereco=%s, telefone=%s, unidade=%s, observacoes=%s
+                            WHERE id=%s
+                        """, (
+                            nome, conta_deposito, nascimento_v, cpf, rg_outro, orgao_emissor,
+                            emissao_v, admissao_v, saida_v, ativo_val, funcao, salario_cents,
+                            estado_civil, escolaridade, nacionalidade, naturalidade,
+                            cep, bairro, endereco, telefone, unidade, observacoes, colab_id
+                        ))
+                        resumos.atualizar(cursor, *resumos.movimento_colaborador(
+                            (dados["unidade"], to_date_or_none(dados["admissao"]), to_date_or_none(dados["saida"])),
+                            (unidade, admissao_v, saida_v),
+                        ))
+                    query_cache.invalidate("colaboradores", ids=colab_id, unidades={dados["unidade"], unidade})
                     st.success("✅ Alterações salvas com sucesso!")
 
     # -------------------------
@@ -384,18 +501,17 @@ if pagina == "Gestão de Colaboradores":
     # -------------------------
     elif aba == "🗑️ Excluir":
         st.subheader("Excluir colaborador")
-        df_ids = pd.read_sql_query("SELECT id, nome FROM colaboradores ORDER BY nome", conn)
-        if df_ids.empty:
-            st.info("Nenhum colaborador cadastrado ainda.")
-        else:
-            colab_id = st.selectbox("Selecione o colaborador para excluir", df_ids["id"],
-                                    format_func=lambda x: df_ids.loc[df_ids["id"] == x, "nome"].values[0])
-            nome_colab = df_ids.loc[df_ids["id"] == colab_id, "nome"].values[0]
+        colab_id, nome_colab = escolher_colaborador("Selecione o colaborador para excluir", "excluir")
+        if colab_id is not None:
             if st.button(f"🗑️ Confirmar exclusão de {nome_colab}"):
-                cursor.execute("DELETE FROM colaboradores WHERE id = %s", (colab_id,))
-                conn.commit()
+                with pool.cursor() as cursor:
+                    cursor.execute("DELETE FROM colaboradores WHERE id = %s RETURNING unidade, admissao, saida", (colab_id,))
+                    resumos.atualizar(cursor, *resumos.movimento_colaborador(*cursor.fetchall()))
+                query_cache.invalidate("colaboradores", ids=colab_id)
                 st.warning(f"Colaborador {nome_colab} foi removido permanentemente.")
 
+    secoes.marcar(aba)
+
     # -------------------------
     # VISUALIZAR
     # -------------------------
@@ -404,27 +520,44 @@ if pagina == "Gestão de Colaboradores":
     filtro_unidade = st.multiselect("Filtrar por unidade", UNIDADES)
     filtro_ativo = st.selectbox("Status", ["Todos", "Ativos", "Inativos"])
 
-    where_clauses = []
-    params = []
-    if filtro_unidade:
-        placeholders = ','.join(['%s']*len(filtro_unidade))
-        where_clauses.append(f"unidade IN ({placeholders})")
-        params.extend(filtro_unidade)
-    if filtro_ativo == "Ativos":
-        where_clauses.append("ativo = 1")
-    elif filtro_ativo == "Inativos":
-        where_clauses.append("ativo = 0")
-
-    where = " AND ".join(where_clauses) if where_clauses else None
-    df_vis = read_df(where, params)
-    if not df_vis.empty:
-        df_vis["ativo_texto"] = df_vis["ativo"].map({1: "Ativo", 0: "Não-ativo"})
-        cols = df_vis.columns.tolist()
+    where, params = colaboradores.filtros_sql(filtro_unidade, filtro_ativo)
+    escopo = filtro_unidade or None
+    total = int(cached_df(*colaboradores.contagem_sql(where, params), unidades=escopo)["total"].iloc[0])
+    if total:
+        opcoes_cols = colaboradores.COLUNAS + list(colaboradores.COLUNAS_DERIVADAS)
         default_cols = ["id", "nome", "funcao", "unidade", "salario_reais", "ativo_texto"]
-        selected = st.multiselect("Colunas para exibir", cols, default=[c for c in default_cols if c in cols])
+        selected = st.multiselect("Colunas para exibir", opcoes_cols, default=default_cols)
+
+        # paginação por chave (nome, id): pilha com a chave inicial de cada página visitada
+        filtro_atual = (tuple(filtro_unidade), filtro_ativo)
+        if st.session_state.get("lista_filtro") != filtro_atual:
+            st.session_state["lista_filtro"] = filtro_atual
+            st.session_state["lista_paginas"] = [None]
+        paginas = st.session_state["lista_paginas"]
+
+        q, q_params = colaboradores.pagina_sql(selected, where, params, depois_de=paginas[-1])
+        df_vis = cached_df(q, q_params, unidades=escopo)
+        if "salario_reais" in selected:
+            df_vis["salario_reais"] = df_vis["salario_cents"].fillna(0) / 100
+        if "ativo_texto" in selected:
+            df_vis["ativo_texto"] = df_vis["ativo"].map({1: "Ativo", 0: "Não-ativo"})
         st.dataframe(df_vis[selected])
+
+        n_paginas = -(-total // colaboradores.PAGE_SIZE)
+        col1, col2, col3 = st.columns([1, 3, 1])
+        with col1:
+            if st.button("◀ Anterior", disabled=len(paginas) == 1):
+                paginas.pop()
+                st.rerun()
+        with col2:
+            st.caption(f"Página {len(paginas)} de {n_paginas} — {total} colaboradores")
+        with col3:
+            if st.button("Próxima ▶", disabled=len(df_vis) < colaboradores.PAGE_SIZE or len(paginas) >= n_paginas):
+                paginas.append(colaboradores.chave_da_linha(df_vis.iloc[-1]))
+                st.rerun()
     else:
         st.info("Nenhum colaborador encontrado com esses filtros.")
+    secoes.marcar("lista")
 
 # --------------------------
 # FOLHA DE PAGAMENTO
@@ -440,225 +573,272 @@ elif pagina == "Folha de Pagamento":
         # normalizar para primeiro dia do mês
         mes_ref = date(mes_input.year, mes_input.month, 1)
     with col3:
-        st.write("")  # espaço
+        mes_fim_input = st.date_input("Gerar até o mês", value=mes_ref, min_value=mes_ref)
         if st.button("Gerar lançamentos para unidade/mês"):
-            # pegar colaboradores da unidade (ou todos)
-            if unidade_sel == "(Todas)":
-                q_col = "SELECT id, nome, salario_cents, conta_deposito, cpf, unidade FROM colaboradores"
-                params = ()
-            else:
-                q_col = "SELECT id, nome, salario_cents, conta_deposito, cpf, unidade FROM colaboradores WHERE unidade = %s"
-                params = (unidade_sel,)
-            cols = read_df(q_col, params)
-            if cols.empty:
-                st.warning("Nenhum colaborador encontrado para gerar lançamentos.")
+            # um único INSERT … SELECT para todos os colaboradores e meses do intervalo
+            meses = folha.meses_entre(mes_ref, mes_fim_input)
+            unidade_ger = None if unidade_sel == "(Todas)" else unidade_sel
+            try:
+                inseridos, ignorados = folha.gerar_lancamentos(pool, meses, unidade_ger)
+            except ValueError as e:
+                # mês com a partição arquivada
+                st.error(str(e))
             else:
-                inserted = 0
-                for _, r in cols.iterrows():
-                    colaborador_id = int(r["id"])
-                    colaborador_nome = r["nome"]
-                    cpf = r.get("cpf")
-                    conta = r.get("conta_deposito")
-                    salario_cents = int(r["salario_cents"]) if pd.notna(r["salario_cents"]) else 0
-                    unidade = r.get("unidade")
-                    # inserir só se não existir
-                    cursor.execute("""
-                        SELECT 1 FROM folha_pagamento
-                        WHERE colaborador_id = %s AND mes_referencia = %s
-                        LIMIT 1
-                    """, (colaborador_id, mes_ref))
-                    if cursor.fetchone():
-                        continue
-                    cursor.execute("""
-                        INSERT INTO folha_pagamento (
-                            colaborador_id, colaborador_nome, cpf, unidade, mes_referencia,
-                            salario_base_cents, valor_depositado_cents, conta_deposito
-                        ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
-                    """, (
-                        colaborador_id, colaborador_nome, cpf, unidade, mes_ref,
-                        salario_cents, None, conta
-                    ))
-                    inserted += 1
-                conn.commit()
-                st.success(f"{inserted} lançamentos gerados (não duplicados).")
+                if inseridos:
+                    query_cache.invalidate("folha_pagamento", unidades=unidade_ger, meses=meses)
+                if inseridos + ignorados == 0:
+                    st.warning("Nenhum colaborador encontrado para gerar lançamentos.")
+                else:
+                    st.success(f"{inseridos} lançamentos gerados, {ignorados} já existiam ({len(meses)} mês(es)).")
 
     st.markdown("---")
-
-    # buscar lançamentos para o filtro
-    if unidade_sel == "(Todas)":
-        df_f = pd.read_sql_query(
-        "SELECT * FROM folha_pagamento WHERE mes_referencia = %s ORDER BY colaborador_nome", conn, params=(mes_ref,)
-        )
-    else:
-        df_f = read_df("SELECT * FROM folha_pagamento WHERE mes_referencia = %s AND unidade = %s ORDER BY colaborador_nome", params=(mes_ref, unidade_sel))
-
-    if df_f.empty:
-        st.info("Nenhum lançamento para o mês/unidade selecionados.")
-    else:
-        # preparar colunas de exibição
-        df_show = df_f.copy()
-        df_show["salario_base_reais"] = df_show["salario_base_cents"].apply(cents_to_real)
-        df_show["valor_depositado_reais"] = df_show["valor_depositado_cents"].apply(cents_to_real)
-        df_show["mes_referencia_str"] = pd.to_datetime(df_show["mes_referencia"]).dt.strftime("%Y-%m")
-        display_cols = ["id","colaborador_nome","salario_base_reais","valor_depositado_reais","conta_deposito","mes_referencia_str","data_pagamento","cpf"]
-        st.dataframe(df_show[display_cols].rename(columns={
-            "colaborador_nome":"Nome",
-            "salario_base_reais":"Salário base (R$)",
-            "valor_depositado_reais":"Valor depositado (R$)",
-            "conta_deposito":"Conta",
-            "mes_referencia_str":"Mês",
-            "data_pagamento":"Data Pagamento",
-            "cpf":"CPF",
-            "id":"ID"
-        }))
-
-        # seleção para edição/exportação
+    secoes.marcar("geração")
+
+    # Cada seção abaixo é um st.fragment: mexer num widget dela (busca, seleção na
+    # grade, "incluir extras", formato da remessa…) reexecuta só aquela seção.
+    # Mudar unidade/mês ou gerar lançamentos reexecuta a página inteira.
+    # As seções leem o que precisam pelo cache de consultas.
+    @st.fragment
+    def secao_grade(mes_ref, unidade):
+        secoes.zerar()
+        grid = read_grade_folha(mes_ref, unidade)
+        busca_folha = st.text_input("Buscar colaborador na grade (nome, CPF ou conta)", key="folha_busca").strip()
+        if busca_folha:
+            achados, total = buscar_colaboradores(busca_folha, limite=500)
+            grid = grid[grid["colaborador_id"].isin(achados["id"])]
+            if total > len(achados):
+                st.warning(f"A busca encontrou {total} colaboradores; a grade considera só os {len(achados)} "
+                           "primeiros — refine a busca.")
+        grid = grid.drop(columns="colaborador_id")
+
+        if grid.empty:
+            st.info("Nenhum lançamento para o mês/unidade/busca selecionados.")
+            st.session_state["folha_selecionados"] = []
+            secoes.marcar("grade")
+            return
+        # grade para seleção e edição (valores em reais); lançamentos que já
+        # estão numa remessa vão numa segunda grade, em que só a seleção muda
         st.markdown("### Selecionar para editar / exportar")
-        df_show_idx = df_show.reset_index(drop=True)
-        df_show_idx["select"] = False
-        # build a simple selection UI (checkboxes)
-        selected_ids = []
-        for i, row in df_show_idx.iterrows():
-            col1, col2 = st.columns([8,1])
-            with col1:
-                st.write(f"{row['id']} — {row['colaborador_nome']} — Salário: {cents_to_real(row['salario_base_cents'])}")
-            with col2:
-                if st.checkbox("Selecionar", key=f"sel_{int(row['id'])}"):
-                    selected_ids.append(int(row["id"]))
-
-        # botão editar linha (abrir formulário)
-        st.markdown("---")
-        st.subheader("Editar um lançamento")
-        edit_id = st.number_input("Informe o ID do lançamento para editar", min_value=1, step=1, value=0)
-        if edit_id:
-            df_sel = df_f[df_f["id"] == edit_id]
-            if df_sel.empty:
-                st.error("ID não encontrado para o mês/unidade selecionados.")
-            else:
-                r = df_sel.iloc[0]
-                with st.form("editar_lanc"):
-                    nome = st.text_input("Nome (readonly)", r["colaborador_nome"], disabled=True)
-                    salario_base = st.number_input("Salário base (R$)", value=cents_to_real(r["salario_base_cents"]) or 0.0, format="%.2f")
-                    valor_depositado = st.number_input("Valor depositado (R$)", value=cents_to_real(r["valor_depositado_cents"]) if r["valor_depositado_cents"] is not None else 0.0, format="%.2f")
-                    conta = st.text_input("Conta de depósito", r.get("conta_deposito") or "")
-                    data_pag = st.date_input("Data de pagamento", value=r["data_pagamento"] if r["data_pagamento"] is not None else date.today())
-                    obs = st.text_area("Observações", r.get("observacoes") or "")
-                    btn = st.form_submit_button("Salvar alteração")
-                    if btn:
-                        cursor.execute("""
-                            UPDATE folha_pagamento
-                            SET salario_base_cents=%s, valor_depositado_cents=%s, conta_deposito=%s, data_pagamento=%s, observacoes=%s
-                            WHERE id=%s
-                        """, (
-                            real_to_cents(salario_base),
-                            real_to_cents(valor_depositado),
-                            conta,
-                            data_pag,
-                            obs,
-                            edit_id
-                        ))
-                        conn.commit()
-                        st.success("Alteração salva.")
-                        st.experimental_rerun()
-
-        # --------------------
-        # Exportar para XLSX
-        # --------------------
+        grid_key = f"folha_grid_{mes_ref}_{unidade}_{busca_folha}"
+        colunas_grade = {
+            "selecionar": st.column_config.CheckboxColumn("Selecionar"),
+            "id": "ID",
+            "colaborador_nome": "Nome",
+            "cpf": "CPF",
+            "salario_base": st.column_config.NumberColumn("Salário base (R$)", min_value=0.0, format="%.2f"),
+            "valor_depositado": st.column_config.NumberColumn("Valor depositado (R$)", min_value=0.0, format="%.2f"),
+            "conta_deposito": st.column_config.TextColumn("Conta"),
+            "data_pagamento": st.column_config.DateColumn("Data Pagamento", format="YYYY-MM-DD"),
+            "observacoes": st.column_config.TextColumn("Observações"),
+            "remessa_id": st.column_config.NumberColumn("Remessa", format="%d"),
+        }
+        em_remessa = grid["remessa_id"].notna()
+        grid, grid_remessa = grid[~em_remessa].drop(columns="remessa_id"), grid[em_remessa]
+        editado = grid
+        if not grid.empty:
+            editado = st.data_editor(
+                grid,
+                key=grid_key,
+                hide_index=True,
+                use_container_width=True,
+                disabled=["id", "colaborador_nome", "cpf"],
+                column_config=colunas_grade,
+            )
+        selected_ids = editado.loc[editado["selecionar"], "id"].astype(int).tolist()
+        if not grid_remessa.empty:
+            st.markdown(f"**Já incluídos em remessa** ({len(grid_remessa)}) — somente leitura")
+            marcados = st.data_editor(
+                grid_remessa,
+                key=grid_key + "_remessa",
+                hide_index=True,
+                use_container_width=True,
+                disabled=[c for c in grid_remessa.columns if c != "selecionar"],
+                column_config=colunas_grade,
+            )
+            selected_ids += marcados.loc[marcados["selecionar"], "id"].astype(int).tolist()
+        # a exportação (outro fragmento) lê a seleção daqui quando o botão é clicado
+        st.session_state["folha_selecionados"] = selected_ids
+
+        editaveis = ["salario_base", "valor_depositado", "conta_deposito", "data_pagamento", "observacoes"]
+        alteradas = folha.diff_lancamentos(grid, editado, editaveis)
+        st.caption(f"{len(selected_ids)} selecionado(s), {len(alteradas)} linha(s) alterada(s).")
+        if st.button("💾 Salvar alterações da grade", disabled=alteradas.empty):
+            linhas = pd.DataFrame({
+                "id": alteradas["id"].astype(int),
+                "salario_base_cents": dinheiro.reais_to_cents(alteradas["salario_base"]),
+                "valor_depositado_cents": dinheiro.reais_to_cents(alteradas["valor_depositado"]),
+                "conta_deposito": alteradas["conta_deposito"],
+                "data_pagamento": alteradas["data_pagamento"],
+                "observacoes": alteradas["observacoes"],
+            })
+            n = folha.atualizar_lancamentos(pool, linhas, mes=mes_ref)
+            query_cache.invalidate("folha_pagamento", ids=linhas["id"].tolist(), meses=mes_ref)
+            st.success(f"{n} lançamento(s) atualizado(s).")
+            if n < len(linhas):
+                # entraram numa remessa depois que a grade foi lida
+                st.warning(f"{len(linhas) - n} lançamento(s) já estavam numa remessa e não foram alterados.")
+            del st.session_state[grid_key]
+            st.rerun()
+        secoes.marcar("grade")
+
+    # --------------------
+    # Exportar para XLSX
+    # --------------------
+    @st.fragment
+    def secao_exportacao(mes_ref, unidade):
+        secoes.zerar()
         st.markdown("---")
         st.subheader("Exportar para Excel (.xlsx)")
         st.write("Por padrão serão exportadas as 8 colunas: id, nome, valor_depositado, conta, salario_base, mês, data_pagamento, cpf (nessa ordem).")
         incluir_extras = st.checkbox("Incluir colunas extras (horas_extras, bonus, descontos, observacoes)", value=False)
 
-        if st.button("Exportar selecionados (XLSX)"):
-            if not selected_ids:
-                st.error("Nenhum lançamento selecionado para exportação.")
-            else:
-                q = f"SELECT * FROM folha_pagamento WHERE id IN ({','.join(['%s']*len(selected_ids))}) ORDER BY colaborador_nome"
-                df_export = read_df(q, params=tuple(selected_ids))
-                if df_export.empty:
+        col1, col2 = st.columns(2)
+        with col1:
+            exportar_sel = st.button("Exportar selecionados (XLSX)")
+        with col2:
+            exportar_mes = st.button("Exportar mês inteiro (XLSX, uma aba por unidade)")
+        selected_ids = st.session_state.get("folha_selecionados", [])
+        if exportar_sel and not selected_ids:
+            st.error("Nenhum lançamento selecionado para exportação.")
+        elif exportar_sel or exportar_mes:
+            # o arquivo é montado em disco, linha a linha, a partir de um cursor no servidor
+            exportacao = medidas.importar("gestao_colab.exportacao")
+            with tempfile.TemporaryFile() as towrite:
+                totais = exportacao.exportar_folha_xlsx(
+                    pool, towrite, mes_ref,
+                    unidade=unidade,
+                    ids=selected_ids if exportar_sel else None,
+                    incluir_extras=incluir_extras,
+                )
+                if not totais:
                     st.error("Erro: nada para exportar.")
                 else:
-                    # construir DataFrame na ordem pedida
-                    df_export["valor_depositado_reais"] = df_export["valor_depositado_cents"].apply(cents_to_real)
-                    df_export["salario_base_reais"] = df_export["salario_base_cents"].apply(cents_to_real)
-                    df_export["mes_referencia"] = pd.to_datetime(df_export["mes_referencia"]).dt.strftime("%Y-%m")
-                    cols_order = ["id","colaborador_nome","valor_depositado_reais","conta_deposito","salario_base_reais","mes_referencia","data_pagamento","cpf"]
-                    rename_map = {
-                        "colaborador_nome":"Nome",
-                        "valor_depositado_reais":"Valor depositado (R$)",
-                        "conta_deposito":"Conta de depósito",
-                        "salario_base_reais":"Salário base (R$)",
-                        "mes_referencia":"Mês referência",
-                        "data_pagamento":"Data pagamento",
-                        "cpf":"CPF",
-                        "id":"ID"
-                    }
-                    df_out = df_export.copy()
-                    # se tiver colunas faltando, preencher com None
-                    for c in cols_order:
-                        if c not in df_out.columns:
-                            df_out[c] = None
-                    df_out = df_out[cols_order].rename(columns=rename_map)
-                    if incluir_extras:
-                        extras = ["horas_extras_cents","bonus_cents","descontos_cents","observacoes"]
-                        for e in extras:
-                            if e in df_export.columns:
-                                df_out[e] = df_export[e]
-                            else:
-                                df_out[e] = None
-                        # converter extras cents -> reais se aplicável
-                        for e in ["horas_extras_cents","bonus_cents","descontos_cents"]:
-                            if e in df_out.columns:
-                                df_out[e.replace("_cents","")] = df_out[e].apply(cents_to_real)
-                                df_out.drop(columns=[e], inplace=True)
-
-                    # criar arquivo em memória
-                    towrite = io.BytesIO()
-                    with pd.ExcelWriter(towrite, engine="openpyxl") as writer:
-                        df_out.to_excel(writer, index=False, sheet_name="Folha")
                     towrite.seek(0)
+                    sufixo = "selecionados" if exportar_sel else "completo"
+                    st.download_button(
+                        label=f"⬇️ Baixar Excel ({sufixo})",
+                        data=towrite.read(),
+                        file_name=f"folha_{mes_ref.strftime('%Y_%m')}_{sufixo}.xlsx",
+                        mime=exportacao.XLSX_MIME
+                    )
+        secoes.marcar("exportação")
+
+    # --------------------
+    # Holerites em lote
+    # --------------------
+    @st.fragment
+    def secao_holerites(mes_ref, unidade):
+        secoes.zerar()
+        st.markdown("---")
+        st.subheader("Holerites (ZIP)")
+        st.write("Um holerite em HTML por lançamento da unidade/mês selecionados (pronto para imprimir ou salvar em PDF pelo navegador).")
+        if st.button("Gerar holerites"):
+            holerites = medidas.importar("gestao_colab.holerites")
+            barra = st.progress(0.0, text="Gerando holerites…")
+            with tempfile.TemporaryFile() as towrite:
+                n = holerites.gerar_zip(
+                    pool, towrite, mes_ref, unidade=unidade,
+                    executor=get_holerites_executor(), processos=HOLERITES_PROCESSOS,
+                    progresso=lambda feitos, total: barra.progress(feitos / total, text=f"{feitos} de {total} holerites"),
+                )
+                barra.empty()
+                if not n:
+                    st.error("Nenhum lançamento para gerar holerites.")
+                else:
+                    towrite.seek(0)
+                    sufixo = f"_{unidade}" if unidade else ""
+                    st.download_button(
+                        label=f"⬇️ Baixar {n} holerite(s) (ZIP)",
+                        data=towrite.read(),
+                        file_name=f"holerites_{mes_ref.strftime('%Y_%m')}{sufixo}.zip",
+                        mime=holerites.ZIP_MIME,
+                    )
+        secoes.marcar("holerites")
+
+    # --------------------
+    # Remessa bancária
+    # --------------------
+    @st.fragment
+    def secao_remessa(mes_ref, unidade):
+        secoes.zerar()
+        st.markdown("---")
+        st.subheader("Remessa bancária")
+        st.write("Arquivo para o banco com os depósitos da unidade/mês selecionados que ainda não foram remetidos. "
+                 "Os lançamentos que entram no arquivo ficam marcados e não saem numa próxima remessa.")
+        remessa = medidas.importar("gestao_colab.remessa")
+        formato = st.selectbox("Formato", list(remessa.FORMATOS), format_func=remessa.FORMATOS.get)
+        if st.button("Gerar remessa"):
+            with tempfile.TemporaryFile() as towrite:
+                try:
+                    r = remessa.gerar(pool, towrite, mes_ref, formato, unidade=unidade)
+                except ValueError as e:
+                    st.error(str(e))
+                    r = None
+                if r and not r["remessa"]:
+                    st.error("Nenhum lançamento com depósito a remeter.")
+                elif r:
+                    query_cache.invalidate("folha_pagamento", meses=mes_ref)
+                    towrite.seek(0)
+                    st.success(f"Remessa {r['remessa']}: {r['lancamentos']} lançamento(s), "
+                               f"R$ {dinheiro.cents_to_real(r['total_cents'])}")
+                    sufixo = f"_{unidade}" if unidade else ""
                     st.download_button(
-                        label="⬇️ Baixar Excel (selecionados)",
-                        data=towrite,
-                        file_name=f"folha_{mes_ref.strftime('%Y_%m')}.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                        label=f"⬇️ Baixar remessa {r['remessa']}",
+                        data=towrite.read(),
+                        file_name=f"remessa_{r['remessa']}_{mes_ref.strftime('%Y_%m')}{sufixo}.{remessa.EXTENSOES[formato]}",
+                        mime="text/plain" if formato == "cnab240" else "text/csv",
                     )
+                if r and not r["invalidos"].empty:
+                    st.warning(f"{len(r['invalidos'])} lançamento(s) ficaram de fora; corrija o cadastro e gere outra remessa.")
+                    st.dataframe(r["invalidos"], hide_index=True, use_container_width=True)
+        secoes.marcar("remessa")
 
+    unidade_f = None if unidade_sel == "(Todas)" else unidade_sel
+    if not tem_lancamentos(mes_ref, unidade_f):
+        st.info("Nenhum lançamento para o mês/unidade selecionados.")
+    else:
+        secao_grade(mes_ref, unidade_f)
+        secao_exportacao(mes_ref, unidade_f)
+        secao_holerites(mes_ref, unidade_f)
+        secao_remessa(mes_ref, unidade_f)
 
 # =========================================================
 # RELATÓRIOS E ESTATÍSTICAS
 # =========================================================
 elif pagina == "Relatórios e Estatísticas":
     st.title("📊 Relatórios e Estatísticas")
-    df = read_df()
-    if df.empty:
+    px = medidas.importar("plotly.express")
+    snapshot = medidas.importar("gestao_colab.snapshot")
+    analise = medidas.importar("gestao_colab.analise")
+    # as análises vêm da cópia colunar do processo (só as linhas alteradas são relidas do banco);
+    # as linhas dos alertas e o CSV, com os dados pessoais, vêm do banco
+    tab = get_snapshot().tabela()
+    unidades_cad = snapshot.unidades(tab)
+    if tab.num_rows == 0:
         st.info("Nenhum dado cadastrado ainda.")
     else:
         # --- Filtros ---
         st.sidebar.markdown("### Filtros (Relatórios)")
-        sel_unidades = st.sidebar.multiselect("Unidades", options=sorted(df["unidade"].dropna().unique()), default=sorted(df["unidade"].dropna().unique()))
+        sel_unidades = st.sidebar.multiselect("Unidades", options=unidades_cad, default=unidades_cad)
         sel_status = st.sidebar.multiselect("Status", options=["Ativos", "Inativos"], default=["Ativos", "Inativos"])
 
-        df_r = df.copy()
-        if sel_unidades:
-            df_r = df_r[df_r["unidade"].isin(sel_unidades)]
         if "Ativos" in sel_status and "Inativos" not in sel_status:
-            df_r = df_r[df_r["ativo"] == 1]
+            status = "Ativos"
         elif "Inativos" in sel_status and "Ativos" not in sel_status:
-            df_r = df_r[df_r["ativo"] == 0]
-
-        # Garantir parsing de datas
-        df_r["admissao_parsed"] = pd.to_datetime(df_r["admissao"], errors="coerce")
-        df_r["saida_parsed"] = pd.to_datetime(df_r["saida"], errors="coerce")
+            status = "Inativos"
+        else:
+            status = "Todos"
+        filtrada = snapshot.filtrar(tab, sel_unidades, status)
+        df_a = snapshot.para_pandas(filtrada, analise.COLUNAS_ANALISE)
+        where, params = colaboradores.filtros_sql(sel_unidades, status)
+        escopo = sel_unidades or None
 
-        today = pd.to_datetime(date.today())
+        secoes.marcar("filtros")
 
         # --------------------
         # Antiguidade / Tempo de Casa
         # --------------------
-        df_r["tenure_days"] = (today - df_r["admissao_parsed"]).dt.days
-        tenure_valid = df_r.dropna(subset=["admissao_parsed"]).copy()
-        avg_by_unit = tenure_valid.groupby("unidade")["tenure_days"].mean().reset_index()
+        avg_by_unit = analise.tempo_medio(df_a)
         def format_days_to_years_months(d):
             if pd.isna(d):
                 return "-"
@@ -672,101 +852,56 @@ elif pagina == "Relatórios e Estatísticas":
         st.table(avg_by_unit[["unidade", "media_tempo"]].rename(columns={"unidade":"Unidade","media_tempo":"Média"}))
 
         st.markdown("**Top 10 mais antigos**")
-        top10 = tenure_valid.sort_values("tenure_days", ascending=False).head(10)
+        top10 = analise.mais_antigos(df_a)
         if not top10.empty:
-            top10_display = top10[["id","nome","unidade","tenure_days","admissao_parsed"]].copy()
-            top10_display["tempo"] = top10_display["tenure_days"].apply(format_days_to_years_months)
-            st.dataframe(top10_display[["id","nome","unidade","tempo","admissao_parsed"]].rename(columns={"admissao_parsed":"Admissão"}))
+            top10["tempo"] = top10["tenure_days"].apply(format_days_to_years_months)
+            st.dataframe(top10[["id","nome","unidade","tempo","admissao_parsed"]].rename(columns={"admissao_parsed":"Admissão"}))
         else:
             st.info("Nenhuma admissão válida encontrada para calcular antiguidade.")
 
         st.markdown("**Pessoas com menos de 3 meses (novatos)**")
-        novatos = tenure_valid[tenure_valid["tenure_days"] < 90]
+        novatos = analise.novatos(df_a)
         if not novatos.empty:
             st.dataframe(novatos[["id","nome","unidade","tenure_days","admissao_parsed"]].rename(columns={"admissao_parsed":"Admissão","tenure_days":"Dias de casa"}))
         else:
             st.info("Nenhum novato (menos de 3 meses) encontrado.")
 
+        secoes.marcar("tempo de casa")
+
         # --------------------
         # Folha Total por Unidade
         # --------------------
         st.subheader("💰 Folha Total por Unidade")
-        folha_unit = df_r.groupby("unidade")["salario_reais"].sum().reset_index().sort_values("salario_reais", ascending=False)
-        folha_unit = folha_unit.rename(columns={"salario_reais":"folha_total"})
+        folha_unit = analise.folha_por_unidade(df_a)
         st.dataframe(folha_unit)
         if not folha_unit.empty:
             fig_folha = px.pie(folha_unit, names="unidade", values="folha_total", title="Distribuição da folha por unidade")
             st.plotly_chart(fig_folha, use_container_width=True)
 
+        secoes.marcar("folha por unidade")
+
         # --------------------
         # Alertas Automáticos (qualidade de dados)
         # --------------------
         st.subheader("🚨 Alertas Automáticos (Qualidade de Dados)")
 
-        def show_alert(title, df_alert, extra_cols):
-            base = ["id", "nome", "unidade"]
-            cols = base + extra_cols
-            cols = [c for c in cols if c in df_alert.columns]
-            st.markdown(f"**{title}** — {len(df_alert)}")
-            st.dataframe(df_alert[cols].head(200))
-
-        nasc_ou_adm_sem_data = df_r[(df_r["nascimento"].fillna("").str.strip() == "") | (df_r["admissao_parsed"].isna())]
-        if not nasc_ou_adm_sem_data.empty:
-            show_alert("Nascimento/Admissão sem data", nasc_ou_adm_sem_data, ["nascimento", "admissao"]) 
-
-        salarios_zerados = df_r[df_r["salario_cents"] == 0]
-        if not salarios_zerados.empty:
-            show_alert("Salário zerado", salarios_zerados, ["salario_reais"]) 
-
-        faltando_doc = df_r[(df_r["cpf"].fillna("").str.strip() == "") | (df_r["rg_outro"].fillna("").str.strip() == "") | (df_r["emissao"].fillna("").str.strip() == "")]
-        if not faltando_doc.empty:
-            show_alert("Faltando CPF/RG/Emissão", faltando_doc, ["cpf", "rg_outro", "emissao"]) 
-
-        phone_pattern = re.compile(r'^\(\d{2}\)\s?\d{4,5}-\d{4}$')
-        invalid_phone = df_r[df_r["telefone"].fillna("").apply(lambda x: not bool(phone_pattern.match(x)))]
-        if not invalid_phone.empty:
-            show_alert("Telefone inválido", invalid_phone, ["telefone"]) 
-
-        inativo_sem_saida = df_r[(df_r["ativo"] == 0) & (df_r["saida_parsed"].isna())]
-        if not inativo_sem_saida.empty:
-            show_alert("Inativo sem data de saída", inativo_sem_saida, ["saida"]) 
-
-        conta_vazia = df_r[df_r["conta_deposito"].fillna("").str.strip() == ""]
-        if not conta_vazia.empty:
-            show_alert("Conta de depósito vazia", conta_vazia, ["conta_deposito"]) 
-
-        faltando_sociais = df_r[(df_r["estado_civil"].fillna("").str.strip() == "") | (df_r["escolaridade"].fillna("").str.strip() == "") | (df_r["naturalidade"].fillna("").str.strip() == "")]
-        if not faltando_sociais.empty:
-            show_alert("Faltando dados sociais", faltando_sociais, ["estado_civil", "escolaridade", "naturalidade"]) 
-
-        faltando_endereco = df_r[(df_r["cep"].fillna("").str.strip() == "") | (df_r["bairro"].fillna("").str.strip() == "") | (df_r["endereco"].fillna("").str.strip() == "")]
-        if not faltando_endereco.empty:
-            show_alert("Endereço incompleto", faltando_endereco, ["cep", "bairro", "endereco"]) 
-
-        if (nasc_ou_adm_sem_data.empty and salarios_zerados.empty and faltando_doc.empty and
-            invalid_phone.empty and inativo_sem_saida.empty and conta_vazia.empty and
-            faltando_sociais.empty and faltando_endereco.empty):
+        contagens = analise.alerta_contagens(df_a)
+        for i, (titulo, _, _) in enumerate(relatorios.ALERTAS):
+            n = int(contagens[f"a{i}"])
+            if n:
+                st.markdown(f"**{titulo}** — {n}")
+                st.dataframe(cached_df(*relatorios.alerta_linhas_sql(i, where, params), unidades=escopo))
+
+        if int(contagens.sum()) == 0:
             st.success("Nenhum problema de qualidade de dados detectado!")
 
+        secoes.marcar("alertas")
+
         # --------------------
         # Dashboard Comparativo Entre Unidades
         # --------------------
         st.subheader("📊 Dashboard Comparativo Entre Unidades")
-        comp = df_r.copy()
-        comp["unidade"] = comp["unidade"].fillna("(Sem Unidade)")
-        summary = comp.groupby("unidade").agg(
-            Total=("id", "count"),
-            Ativos=("ativo", lambda s: int((s==1).sum())),
-            Media_Salarial=("salario_reais", lambda s: round(s.mean() if len(s)>0 else 0,2)),
-            Folha=("salario_reais", "sum")
-        ).reset_index()
-
-        last_12 = today - pd.Timedelta(days=365)
-        exits_12m = df_r[(df_r["saida_parsed"].notna()) & (df_r["saida_parsed"] >= last_12)]
-        exits_count = exits_12m.groupby("unidade")["id"].count().reset_index().rename(columns={"id":"saidas_12m"})
-        summary = summary.merge(exits_count, on="unidade", how="left")
-        summary["saidas_12m"] = summary["saidas_12m"].fillna(0).astype(int)
-        summary["Turnover"] = summary.apply(lambda r: round(r["saidas_12m"] / r["Total"], 3) if r["Total"]>0 else 0, axis=1)
+        summary = analise.comparativo(df_a)
 
         overall_avg_sal = summary["Media_Salarial"].mean()
         def sal_flag(x):
@@ -777,8 +912,125 @@ elif pagina == "Relatórios e Estatísticas":
 
         st.dataframe(summary)
 
-        # Exportar CSV
-        csv = df_r.to_csv(index=False).encode("utf-8")
-        st.download_button("⬇️ Exportar dados (CSV)", csv, file_name="colaboradores_filtrados.csv", mime="text/csv")
+        secoes.marcar("comparativo")
+
+        # --------------------
+        # Tendências mensais (lidas só de resumo_mensal)
+        # --------------------
+        # o período e a exportação são st.fragment: mexer neles não refaz as seções de cima
+        @st.fragment
+        def secao_tendencias(sel_unidades):
+            secoes.zerar()
+            st.subheader("📈 Tendências Mensais por Unidade")
+            n_meses = st.slider("Período (meses)", min_value=6, max_value=60, value=24, step=6)
+            desde = (pd.Timestamp(date.today()).to_period("M") - (n_meses - 1)).to_timestamp().date()
+            # tabela pequena e já agregada: lida direto, sem passar pelo cache
+            tend = query_df(*resumos.tendencia_sql(sel_unidades, desde))
+            if tend.empty:
+                st.info("Sem lançamentos ou movimentações no período.")
+            else:
+                tend["mes_referencia"] = pd.to_datetime(tend["mes_referencia"])
+                col1, col2 = st.columns(2)
+                with col1:
+                    fig = px.line(tend, x="mes_referencia", y="salario_base", color="unidade", markers=True,
+                                  title="Folha (salário base) por mês", labels={"mes_referencia": "Mês", "salario_base": "R$"})
+                    st.plotly_chart(fig, use_container_width=True)
+                with col2:
+                    fig = px.line(tend, x="mes_referencia", y="depositado", color="unidade", markers=True,
+                                  title="Valor depositado por mês", labels={"mes_referencia": "Mês", "depositado": "R$"})
+                    st.plotly_chart(fig, use_container_width=True)
+                col1, col2 = st.columns(2)
+                with col1:
+                    fig = px.line(tend, x="mes_referencia", y="headcount", color="unidade", markers=True,
+                                  title="Headcount (lançamentos) por mês", labels={"mes_referencia": "Mês"})
+                    st.plotly_chart(fig, use_container_width=True)
+                with col2:
+                    mov = tend.melt(id_vars=["mes_referencia", "unidade"], value_vars=["admissoes", "saidas"],
+                                    var_name="movimento", value_name="pessoas")
+                    fig = px.bar(mov, x="mes_referencia", y="pessoas", color="movimento", barmode="group",
+                                 facet_row="unidade" if len(sel_unidades) > 1 else None,
+                                 title="Admissões e saídas por mês", labels={"mes_referencia": "Mês"})
+                    st.plotly_chart(fig, use_container_width=True)
+                extras = tend.groupby("mes_referencia")[["horas_extras", "bonus", "descontos"]].sum().reset_index()
+                fig = px.bar(extras, x="mes_referencia", y=["horas_extras", "bonus", "descontos"], barmode="group",
+                             title="Horas extras, bônus e descontos (unidades selecionadas)", labels={"mes_referencia": "Mês", "value": "R$"})
+                st.plotly_chart(fig, use_container_width=True)
+            secoes.marcar("tendências")
+
+        @st.fragment
+        def secao_exportacao_csv(where, params):
+            secoes.zerar()
+            # Exportar CSV (só busca as linhas quando pedido; direto do banco, sem guardar no cache)
+            if st.button("Preparar exportação (CSV)"):
+                df_r = query_df(*relatorios.exportacao_sql(where, params))
+                if not df_r.empty:
+                    df_r["salario_reais"] = dinheiro.cents_to_real_series(df_r["salario_cents"])
+                csv = df_r.to_csv(index=False).encode("utf-8")
+                st.download_button("⬇️ Exportar dados (CSV)", csv, file_name="colaboradores_filtrados.csv", mime="text/csv")
+            secoes.marcar("exportação CSV")
+
+        secao_tendencias(sel_unidades)
+        secao_exportacao_csv(where, params)
+
+# =========================================================
+# IMPORTAÇÃO EM LOTE
+# =========================================================
+elif pagina == "Importação em Lote":
+    st.title("📥 Importação em Lote")
+    importacao = medidas.importar("gestao_colab.importacao")
+    tipo = st.radio("O que importar?", ["Colaboradores", "Lançamentos da folha"], horizontal=True)
+    if tipo == "Colaboradores":
+        st.caption("Colunas: " + ", ".join(importacao.COLUNAS_COLABORADOR[:11]) + ", salario (R$), … "
+                   "Colaboradores com CPF já cadastrado são atualizados.")
+    else:
+        st.caption("Colunas: cpf, mes_referencia (AAAA-MM), " + ", ".join(importacao.DINHEIRO_FOLHA)
+                   + " (R$), conta_deposito, data_pagamento, observacoes. Um lançamento por CPF e mês.")
+    arquivo = st.file_uploader("Arquivo CSV ou XLSX", type=["csv", "xlsx"])
+
+    if arquivo is not None:
+        try:
+            bruto = importacao.ler_planilha(arquivo, arquivo.name)
+        except Exception as e:
+            st.error(f"Não foi possível ler o arquivo: {e}")
+            st.stop()
+        if tipo == "Colaboradores":
+            validos, erros = importacao.validar_colaboradores(bruto, UNIDADES, FUNCOES)
+        else:
+            validos, erros = importacao.validar_folha(bruto)
+
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Linhas no arquivo", len(bruto))
+        c2.metric("Válidas", len(validos))
+        c3.metric("Com erro", len(bruto) - len(validos))
+        if not erros.empty:
+            st.warning("Linhas com erro não serão importadas (linha conta a partir do cabeçalho = 1).")
+            st.dataframe(erros, use_container_width=True, hide_index=True)
+            st.download_button("⬇️ Baixar erros (CSV)", erros.to_csv(index=False).encode("utf-8"),
+                               file_name="erros_importacao.csv", mime="text/csv")
+
+        secoes.marcar("leitura e validação")
+
+        if len(validos) and st.button(f"Importar {len(validos)} linha(s) válida(s)"):
+            try:
+                if tipo == "Colaboradores":
+                    inseridos, atualizados = importacao.carregar_colaboradores(pool, validos)
+                    query_cache.invalidate("colaboradores")
+                    st.success(f"{inseridos} colaborador(es) incluído(s), {atualizados} atualizado(s).")
+                else:
+                    gravados, sem_colab = importacao.carregar_folha(pool, validos)
+                    query_cache.invalidate("folha_pagamento", meses=set(validos["mes_referencia"]))
+                    st.success(f"{gravados} lançamento(s) gravado(s).")
+                    if sem_colab:
+                        st.warning(f"Sem colaborador com o CPF informado nas linhas: {', '.join(map(str, sem_colab))}")
+            except Exception as e:
+                st.error(f"Erro na importação (nada foi gravado): {e}")
+    secoes.marcar("carga")
+
+medidas.registrar_render(pagina, (time.perf_counter() - _inicio_script) * 1000)
+if METRICAS_PROM_ARQUIVO:
+    metricas.gravar_prometheus(METRICAS_PROM_ARQUIVO, {
+        **{f"pool_{k}": v for k, v in pool.stats().items()},
+        **{f"cache_{k}": v for k, v in query_cache.stats().items()},
+    })
 
 # Fim do arquivo
@@ -0,0 +1,112 @@
+"""Casos de borda do texto → centavos, passados pelas versões escalar e vetorizada."""
+import random
+
+import pandas as pd
+import pytest
+
+from gestao_colab import dinheiro
+
+# (texto, centavos); None = inválido
+CASOS = [
+    ("123,45", 12345),
+    ("0,29", 29),
+    ("1.234,5", 123450),
+    ("1.234,56", 123456),
+    ("R$ 1.234,56", 123456),
+    ("-1.234,5", -123450),
+    ("R$ -10,00", -1000),
+    ("1.000.000,00", 100000000),
+    ("1.234", 123400),
+    ("1.234.567", 123456700),
+    ("12.5", 1250),
+    ("12.34", 1234),
+    ("1.2345", 123),
+    ("0,005", 1),
+    (".5", 50),
+    (",5", 50),
+    # ponto de milhar só com grupos de 3 e sem zero à esquerda
+    ("0.290", 29),
+    ("01.234", 123),
+    ("1234.567", 123457),
+    ("12.34.5", None),
+    ("1.234.56", None),
+    ("1.23.456", None),
+    ("0.234,56", None),
+    ("1,2.3", None),
+    # sem expoente nem outras notações do float/Decimal
+    ("1e3", None),
+    ("1E3", None),
+    ("1,5e2", None),
+    ("+5", None),
+    ("1_000", None),
+    ("Infinity", None),
+    ("NaN", None),
+    # "R$" e sinal só na frente, espaços só em volta
+    ("R$1,00", 100),
+    ("-R$ 1,00", -100),
+    ("R$ - 1,00", -100),
+    (" 12,5\t", 1250),
+    ("-R$-1,00", None),
+    ("27$05.R77", None),
+    ("1,00 R$", None),
+    ("R 5", None),
+    ("$5", None),
+    ("R$", None),
+    ("1 234,56", None),
+    # limite do int64
+    ("9999999999999999,99", 999999999999999999),
+    ("99999999999999999", None),
+    ("99999999999999999999,00", None),
+    ("1,0000000000000000000", None),
+    # estrutura
+    ("1,2,3", None),
+    ("5-", None),
+    ("--5", None),
+    (".-5", None),
+    ("abc", None),
+    ("-", None),
+    (",", None),
+    ("", None),
+]
+
+
+@pytest.mark.parametrize("texto,centavos", CASOS)
+def test_real_to_cents(texto, centavos):
+    assert dinheiro.real_to_cents(texto) == (0 if centavos is None else centavos)
+
+
+def test_real_to_cents_series_igual_ao_escalar():
+    textos = pd.Series([t for t, _ in CASOS])
+    obtido = dinheiro.real_to_cents_series(textos, invalido=pd.NA)
+    esperado = pd.Series([pd.NA if c is None else c for _, c in CASOS], dtype="Int64")
+    pd.testing.assert_series_equal(obtido, esperado)
+    escalar = textos.map(dinheiro.real_to_cents)
+    assert (dinheiro.real_to_cents_series(textos) == escalar).all()
+
+
+def test_ida_e_volta():
+    cents = pd.Series([0, 5, -5, 29, 12345, -123450, 100000000])
+    texto = dinheiro.cents_to_real_series(cents)
+    assert list(texto) == [dinheiro.cents_to_real(c) for c in cents]
+    assert list(dinheiro.real_to_cents_series(texto)) == list(cents)
+
+
+def _texto_aleatorio(rnd):
+    if rnd.random() < 0.5:
+        return "".join(rnd.choice("0123456789.,-R$ \te") for _ in range(rnd.randint(0, 24)))
+    # parecido com dinheiro: prefixo, grupos de dígitos com pontos, vírgula, espaços
+    prefixo = rnd.choice(["", "", "R$", "R$ ", "-", "-R$ ", "R$ -", " ", "R"])
+    grupos = [str(rnd.randint(0, 10 ** rnd.randint(1, 8))) for _ in range(rnd.randint(1, 4))]
+    inteira = rnd.choice([".", ""]).join(grupos)
+    fracao = rnd.choice(["", "," + str(rnd.randint(0, 999)), ",", "." + str(rnd.randint(0, 99))])
+    return prefixo + inteira + fracao + rnd.choice(["", "", " ", "-", "R$"])
+
+
+def test_real_to_cents_series_igual_ao_escalar_aleatorio():
+    rnd = random.Random(20261017)
+    textos = pd.Series([_texto_aleatorio(rnd) for _ in range(20000)])
+    vetor = dinheiro.real_to_cents_series(textos, invalido=pd.NA)
+    for texto, v in zip(textos, vetor):
+        valido = dinheiro._limpar(texto) is not None
+        assert valido == (v is not pd.NA), texto
+        assert dinheiro.real_to_cents(texto) == (v if valido else 0), texto
@@ -0,0 +1,26 @@
+"""Validação das planilhas de importação: valor ruim vira erro da linha, não exceção."""
+import pandas as pd
+
+from gestao_colab import colaboradores, importacao
+
+CPFS = ["529.982.247-25", "111.444.777-35", "123.456.789-09", "935.411.347-80", "390.533.447-05", "987.654.321-00"]
+
+
+def _planilha(**colunas):
+    n = len(next(iter(colunas.values())))
+    return pd.DataFrame({"nome": ["Fulano"] * n, "cpf": CPFS[:n], "unidade": ["Serrinha"] * n, **colunas})
+
+
+def test_salario_cents_nao_inteiro_e_erro_da_linha():
+    df = _planilha(salario_cents=["12.5", "1500", "-3", "abc", "", "1e12"])
+    validos, erros = importacao.validar_colaboradores(df, colaboradores.UNIDADES)
+    sal = erros[erros["coluna"] == "salario_cents"]
+    assert sal[["linha", "erro"]].values.tolist() == [
+        [2, "salário inválido"], [4, "salário negativo"], [5, "salário inválido"], [7, "salário inválido"],
+    ]
+    assert validos["salario_cents"].tolist()[:1] == [1500]
+
+
+def test_salario_negativo_aponta_a_coluna_lida():
+    _, erros = importacao.validar_colaboradores(_planilha(salario=["-5,00"]), colaboradores.UNIDADES)
+    assert erros[["coluna", "erro"]].values.tolist() == [["salario", "salário negativo"]]
@@ -0,0 +1,13 @@
+"""Registros CNAB 240: tamanho errado é erro mesmo com python -O."""
+import pytest
+
+from gestao_colab import remessa
+
+
+def test_registro_240_posicoes():
+    assert remessa._registro("237", "0000", "0", " " * 232) == "2370000" + "0" + " " * 232 + "\r\n"
+
+
+def test_registro_fora_do_tamanho_e_value_error():
+    with pytest.raises(ValueError, match=r"tipo '3' com 239 posições"):
+        remessa._registro("237", "0001", "3", " " * 231)